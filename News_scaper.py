@@ -1,852 +1,3275 @@
-# ===== 대한민국 에너지 뉴스 스크랩 (Streamlit GUI, Tk 기능 이식) =====
-# - 체크박스 우선 키워드 / 직접 입력
-# - 저장 경로/파일명 입력(서버 로컬 저장 + 다운로드)
-# - 진행도 + 로그 스트림
-# - 전체 HTML 미리보기(렌더) + HTML 코드 미리보기(txt) + 다운로드
-# - 제목 클릭 → 모달 팝업에서 해당 기사 HTML 미리보기
-# - Google 뉴스 언랩 복원으로 원문 본문 파싱
-
-import os, io, re, json, time, random, html as pyhtml
-from datetime import datetime, timedelta, date
-from urllib.parse import urlparse, parse_qs, quote_plus, urlencode, urlunparse
-
-import streamlit as st
-import pandas as pd
-import requests
-from bs4 import BeautifulSoup
-from readability import Document
-import feedparser
-from dateutil import parser as dateparser
-from dateutil.tz import gettz
-from uuid import uuid4
-
-# 세션마다 고유한 로그 위젯 키를 한 번만 만든다
-if "logs_widget_key" not in st.session_state:
-    st.session_state.logs_widget_key = f"logs_text_area_{uuid4().hex}"
-
-
-def _dir_label(p: str) -> str:
-    try:
-        ap = os.path.abspath(os.path.expanduser(p))
-        base = os.path.basename(ap) or ap
-        return f"{base}  –  {ap}"
-    except Exception:
-        return p
-
-def list_save_dir_options() -> list[tuple[str, str]]:
-    """
-    (label, path) 튜플 리스트 반환.
-    기본 후보 + 현재 작업 디렉토리의 1뎁스 하위 폴더를 합쳐 중복 제거.
-    """
-    base_candidates = [
-        "./outputs",
-        ".",
-        "~/Downloads",
-        "/tmp",
-    ]
-
-    # 현재 폴더의 하위 디렉터리 1뎁스 추가
-    try:
-        for name in os.listdir("."):
-            if os.path.isdir(os.path.join(".", name)):
-                base_candidates.append(os.path.join(".", name))
-    except Exception:
-        pass
-
-    # 중복 제거 + 정규화
-    uniq = []
-    seen = set()
-    for p in base_candidates:
-        ap = os.path.abspath(os.path.expanduser(p))
-        if ap not in seen:
-            seen.add(ap)
-            uniq.append(ap)
-
-    # 라벨 생성
-    options = [(_dir_label(p), p) for p in uniq]
-    return options
-    
-# -------------------- 전역 설정 --------------------
-KST = gettz("Asia/Seoul")
-DEBUG = False
-DEFAULT_ORIGINAL_URL = (
-    "https://www.google.com/search?lr=&cr=countryKR&sca_esv=f6d19e7077c59f8e"
-    "&tbs=ctr:countryKR&q=%EC%88%98%EC%9A%94%EA%B4%80%EB%A6%AC+OR+%EA%B7%B8%EB%A6%AC%EB%93%9C%EC%9C%84%EC%A6%88+OR+DR+OR+%EC%A0%84%EB%A0%A5+OR+%ED%95%9C%EC%A0%84&tbm=nws&num=100"
-)
-
-BASE_PRIORITY_TERMS = [
-    "아이디알서비스", "iDRS", "idrs", "그리드위즈", "전력수급기본계획", "분산에너지", "계통"
-]
-EXCLUDE_TERMS = {"배구", "학폭"}
-PRIORITY_DOMAINS = {
-    "etnews.com", "khan.co.kr", "electimes.com", "marketin.edaily.co.kr",
-    "ekn.kr", "mk.co.kr", "energydaily.co.kr", "edaily.co.kr", "e2news.com",
-}
-PRIORITY_TERMS_WEIGHTS = {
-    "아이디알서비스": 3, "idrs": 3, "iDRS": 3,
-    "그리드위즈": 2, "전력수급기본계획": 2, "분산에너지": 2, "계통": 1,
-}
-PUB_NAME_MAP = {
-    "etnews.com":"전자신문","khan.co.kr":"경향신문","electimes.com":"전기신문","marketin.edaily.co.kr":"이데일리 마켓인",
-    "ekn.kr":"에너지경제","mk.co.kr":"매일경제","energydaily.co.kr":"에너지데일리","edaily.co.kr":"이데일리","e2news.com":"이투뉴스",
-    "yonhapnews.co.kr":"연합뉴스","yna.co.kr":"연합뉴스","newsis.com":"뉴시스","hankyung.com":"한국경제","chosun.com":"조선일보",
-    "hani.co.kr":"한겨레","joins.com":"중앙일보","hankookilbo.com":"한국일보","seoul.co.kr":"서울신문","kmib.co.kr":"국민일보",
-    "munhwa.com":"문화일보","ohmynews.com":"오마이뉴스","pressian.com":"프레시안","zdnet.co.kr":"지디넷코리아",
-    "sbs.co.kr":"SBS","mbc.co.kr":"MBC","jtbc.co.kr":"JTBC","kbs.co.kr":"KBS","busan.com":"부산일보","asiatoday.co.kr":"아시아투데이",
-    "naver.com":"네이버뉴스","daum.net":"다음뉴스","news1.kr":"뉴스1","sisajournal-e.com":"시사저널e",
-    "tongilnews.com":"통일신문","m-i.kr":"매일일보","newsspirit.kr":"뉴스스피릿","h2news.kr":"이투뉴스","incheontoday.com":"인천투데이",
-}
-_TRACKING_PARAMS = {"utm_source","utm_medium","utm_campaign","utm_content","utm_term","fbclid","gclid","igshid","ref"}
-SENT_SPLIT_RE = re.compile(r"(?<=[.!?。！？])\s+|(?<=다\.|요\.)\s+")
-
-# -------------------- Streamlit 페이지 설정 --------------------
-st.set_page_config(page_title="대한민국 에너지 뉴스 스크랩", layout="wide")
-st.title("대한민국 에너지 뉴스 스크랩 (Streamlit GUI 확장판)")
-
-# -------------------- 로그 유틸 --------------------
-if "logs" not in st.session_state:
-    st.session_state.logs = []
-
-def log(msg):
-    st.session_state.logs.append(msg)
-    if len(st.session_state.logs) > 1000:
-        st.session_state.logs = st.session_state.logs[-1000:]
-
-def get_headers():
-    uas = [
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Safari/605.1.15",
-        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0 Safari/537.36",
-    ]
-    ua = uas[int(time.time()) % len(uas)]
-    return {"User-Agent": ua, "Accept-Language":"ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7"}
-
-def clean_text(s):
-    return re.sub(r"\s+"," ",str(s)).strip() if s is not None else ""
-
-def get_soup(url, timeout=25, allow_redirects=True):
-    for i in range(4):
-        try:
-            r = requests.get(url, headers=get_headers(), timeout=timeout, allow_redirects=allow_redirects)
-            if r.status_code == 200 and "https://www.google.com/sorry" not in r.url:
-                return BeautifulSoup(r.text, "lxml"), r
-            time.sleep(1.0*(i+1))
-        except requests.RequestException:
-            time.sleep(1.0*(i+1))
-    return None, None
-
-def domain_of(url):
-    try:
-        host = urlparse(url).hostname or ""
-        return host.lower()
-    except Exception:
-        return ""
-
-def host_matches_suffix(host, suffix_set):
-    return any(host == s or host.endswith("."+s) or host.endswith(s) for s in suffix_set)
-
-def parse_query_from_original(url):
-    try:
-        return parse_qs(urlparse(url).query).get("q",[""])[0] or ""
-    except Exception:
-        return ""
-
-def compose_query(base_q: str, selected_terms, custom_terms) -> str:
-    base_q = (base_q or "").strip()
-    extra_terms = list(selected_terms or BASE_PRIORITY_TERMS)
-    for t in (custom_terms or []):
-        if t and t not in extra_terms:
-            extra_terms.append(t)
-    for t in extra_terms:
-        if t not in base_q:
-            base_q = (base_q + f" OR {t}") if base_q else t
-    if "-배구" not in base_q: base_q += " -배구"
-    if "-학폭" not in base_q: base_q += " -학폭"
-    return base_q
-
-def build_news_url_for_date(query, date_obj):
-    md = date_obj.strftime("%m/%d/%Y")
-    tbs = f"cdr:1,cd_min:{md},cd_max:{md},ctr:countryKR"
-    return f"https://www.google.com/search?tbm=nws&q={quote_plus(query)}&tbs={tbs}&num=100&hl=ko&lr=lang_ko&cr=countryKR&gl=KR"
-
-def unwrap_google_news_link(link: str) -> str:
-    try:
-        u = urlparse(link)
-        if "news.google." in (u.hostname or ""):
-            real = parse_qs(u.query).get("url", [None])[0]
-            if real: return real
-        return link
-    except Exception:
-        return link
-
-def normalize_url_for_dedupe(u: str) -> str:
-    try:
-        p = urlparse(u); qs = parse_qs(p.query)
-        clean = {k:v for k,v in qs.items() if k not in _TRACKING_PARAMS}
-        return urlunparse(p._replace(query=urlencode({k:v[0] for k,v in clean.items()}, doseq=True)))
-    except Exception:
-        return u
-
-def title_key(title: str) -> str:
-    return re.sub(r"[\s\W]+","", (title or "").lower())
-
-def _extract_card_title(card, a):
-    head = card.select_one("div[role='heading']") or card.find("h3")
-    if head:
-        t = clean_text(head.get_text(" "))
-        if t: return t
-    aria = a.get("aria-label")
-    if aria:
-        t = clean_text(aria)
-        if t: return t
-    return clean_text((a.get_text(" ") or "").splitlines()[0])
-
-def parse_google_news_results(search_url):
-    log(f"[검색] {search_url}")
-    soup, _ = get_soup(search_url)
-    if not soup:
-        log(" - HTML 파싱 실패")
-        return []
-    items, seen = [], set()
-    for card in soup.select("div.dbsr"):
-        a = card.find("a")
-        if not a or not a.get("href"): continue
-        raw_title = _extract_card_title(card, a)
-        raw_url = unwrap_google_news_link(a["href"])  # 원문 언랩
-        norm = (normalize_url_for_dedupe(raw_url), title_key(raw_title))
-        if norm in seen: continue
-        seen.add(norm); items.append({"title": raw_title, "url": raw_url})
-    if not items:
-        for a in soup.select("a.WlydOe, a.VDXfz"):
-            link = a.get("href")
-            if not link: continue
-            head = a.select_one("div[role='heading'], h3")
-            raw = head.get_text(" ") if head else a.get_text(" ")
-            title = clean_text((raw or "").splitlines()[0])
-            link = unwrap_google_news_link(link)
-            norm = (normalize_url_for_dedupe(link), title_key(title))
-            if norm in seen: continue
-            seen.add(norm); items.append({"title": title, "url": link})
-    log(f" - HTML 결과 {len(items)}건")
-    return [it for it in items if it["title"]]
-
-def build_news_rss_url(query):
-    return f"https://news.google.com/rss/search?q={quote_plus(query)}&hl=ko&gl=KR&ceid=KR:ko"
-
-def parse_google_news_results_rss(query, target_date):
-    url = build_news_rss_url(query)
-    log(f"[RSS] {url}")
-    feed = feedparser.parse(url)
-    items, seen = [], set()
-    for e in feed.entries:
-        title = clean_text(getattr(e,'title','')); link  = unwrap_google_news_link(getattr(e,'link',''))
-        published = dateparser.parse(getattr(e,'published','')) if hasattr(e,'published') else None
-        if not title or not link: continue
-        if published:
-            kst = published.astimezone(KST) if published.tzinfo else published
-            if kst.date() != target_date: continue
-        norm = (normalize_url_for_dedupe(link), title_key(title))
-        if norm in seen: continue
-        seen.add(norm); items.append({"title": title, "url": link})
-    log(f" - RSS 결과 {len(items)}건(필터 후)")
-    return items
-
-KR_TLDS = (".kr",)
-KR_DOMAINS = {"naver.com","daum.net","nate.com","chosun.com","hani.co.kr","khan.co.kr","joins.com",
-              "hankookilbo.com","seoul.co.kr","mk.co.kr","yonhapnews.co.kr","yna.co.kr","news1.kr",
-              "newspim.com","nocutnews.co.kr","ohmynews.com","pressian.com","newsis.com","mbc.co.kr",
-              "sbs.co.kr","jtbc.co.kr","kbs.co.kr","edaily.co.kr","etnews.com","zdnet.co.kr","asiatoday.co.kr",
-              "kmib.co.kr","munhwa.com","hankyung.com","isplus.com","busan.com","e2news.com","electimes.com",
-              "energydaily.co.kr","ekn.kr", *PRIORITY_DOMAINS}
-
-def looks_korean_by_meta_and_text(soup, html_text):
-    html_tag = soup.find("html")
-    if html_tag and (html_tag.get("lang") or html_tag.get("xml:lang")):
-        if (html_tag.get("lang") or html_tag.get("xml:lang") or "").lower().startswith("ko"): return True
-    og = soup.find("meta", {"property":"og:locale"})
-    if og and og.get("content") and og["content"].lower().startswith("ko"): return True
-    text = soup.get_text(" ", strip=True) or BeautifulSoup(html_text or "", "lxml").get_text(" ", strip=True)
-    hangul = len(re.findall(r"[가-힣]", text)); letters = len(re.findall(r"[A-Za-z가-힣]", text))
-    return bool(hangul >= 40 and letters and (hangul/letters) >= 0.30)
-
-def is_korean_source(final_url, soup, html_text):
-    host = domain_of(final_url)
-    if host.endswith(KR_TLDS) or host_matches_suffix(host, KR_DOMAINS): return True
-    return looks_korean_by_meta_and_text(soup, html_text)
-
-def is_priority_host(final_url): return host_matches_suffix(domain_of(final_url), PRIORITY_DOMAINS)
-
-def pick_meaningful_sentence(text: str) -> str:
-    text = clean_text(text); 
-    if not text: return ""
-    parts = re.split(SENT_SPLIT_RE, text)
-    for p in parts:
-        s = clean_text(p)
-        if not s: continue
-        if any(n in s for n in ("무단전재","재배포","저작권","사진","기자","연합뉴스")) and len(s) < 30: continue
-        if len(re.sub(r"[^가-힣A-Za-z0-9]","",s)) < 4: continue
-        return s
-    return clean_text(parts[0]) if parts else ""
-
-def concise_summary_from_text(text: str) -> str:
-    s = pick_meaningful_sentence(text)
-    return s if len(s) <= 30 else s[:30].rstrip()+"…"
-
-def extract_main_text(soup, html_text):
-    try:
-        doc = Document(html_text); main_html = doc.summary()
-        main_text = clean_text(BeautifulSoup(main_html,"lxml").get_text(" "))
-        if len(main_text) >= 60: return main_text
-    except Exception: pass
-    for sel in ["article","div[itemprop='articleBody']", ".article-body",".news_end",".article",
-                "#newsct_article",".newsct_article",".art_txt",".article_view","#articleBodyContents",
-                "#articeBody","#articleBody","#newsEndContents"]:
-        el = soup.select_one(sel)
-        if el:
-            txt = clean_text(el.get_text(" "))
-            if len(txt) >= 60: return txt
-    return clean_text(soup.get_text(" "))
-
-def extract_summary(soup, html_text, title_fallback=""):
-    main = extract_main_text(soup, html_text)
-    if main:
-        s = concise_summary_from_text(main)
-        if s: return s
-    og = soup.find("meta", property="og:description")
-    if og and og.get("content"):
-        s = concise_summary_from_text(og["content"])
-        if s: return s
-    md = soup.find("meta", attrs={"name":"description"})
-    if md and md.get("content"):
-        s = concise_summary_from_text(md["content"])
-        if s: return s
-    tf = title_fallback or ""
-    return tf[:30] + ("…" if len(tf) > 30 else "")
-
-_TITLES_RE = re.compile(r"(기자|특파원|논설위원|평론가|칼럼니스트|사진기자|에디터|부장|팀장|국장)")
-_KO_NAME_RE = re.compile(r"([가-힣]{2,4})")
-_EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
-
-def _strip_noise(txt):
-    if not txt: return ""
-    txt = _EMAIL_RE.sub("", txt)
-    txt = re.sub(r"\(.*?\)|\[.*?\]|<.*?>"," ", txt)
-    txt = re.sub(r"[-–—•·▶◇]|By|by|기자명?:?"," ", txt, flags=re.I)
-    return clean_text(txt)
-
-def extract_json_ld(soup):
-    out=[]
-    for tag in soup.find_all("script", type="application/ld+json"):
-        try:
-            block=json.loads(tag.string or "")
-            out.extend(block if isinstance(block,list) else [block])
-        except Exception: pass
-    return out
-
-def extract_authors_from_jsonld(jsonld):
-    names=[]
-    for b in (jsonld if isinstance(jsonld,list) else [jsonld]):
-        for key in ("author","creator"):
-            author=b.get(key); 
-            if not author: continue
-            vals = author if isinstance(author,list) else [author]
-            for a in vals:
-                if isinstance(a,dict) and a.get("name"): names.append(a["name"])
-                elif isinstance(a,str): names.append(a)
-    names=[_strip_noise(n) for n in names if n]
-    return [n for n in names if n]
-
-def extract_author_meta_and_dom(soup):
-    cands=[]
-    for sel in [('meta',{'name':'author'}),('meta',{'property':'article:author'}),
-                ('meta',{'name':'parsely-author'}),('meta',{'name':'byl'})]:
-        tag = soup.find(*sel)
-        if tag and tag.get("content"): cands.append(tag["content"])
-    for sel in [
-        "a[rel='author']","[itemprop='author']","[itemprop='author'] [itemprop='name']",
-        "address.byline","p.byline","span.byline","div.byline",
-        "span[class*=author]","div[class*=author]","p[class*=author]",
-        "span[class*=writer]","div[class*=writer]","p[class*=writer]",
-        "span[class*=reporter]","div[class*=reporter]","p[class*=reporter]",
-        "span[class*=journalist]","div[class*=journalist]","p[class*=journalist]",
-        "span.article_writer","div.article_writer","em.article_writer",
-        ".info_view .writer",".press_writer","#news_writer","#author",
-        "strong.name","span.name",
-    ]:
-        for el in soup.select(sel):
-            t = clean_text(el.get_text(" "))
-            if t: cands.append(t)
-    for el in soup.find_all(True):
-        for attr in el.attrs:
-            if "author" in attr or "writer" in attr or "reporter" in attr:
-                val = el.get(attr)
-                if isinstance(val,str) and len(val)<=40: cands.append(val)
-    cleaned=[]
-    for c in cands:
-        c=_strip_noise(c)
-        for p in re.split(r"[,/;•·]| 그리고 | 및 | and ", c):
-            p = clean_text(p)
-            if not p: continue
-            m=_KO_NAME_RE.search(p)
-            if not m: continue
-            name=m.group(1); t=_TITLES_RE.search(p)
-            cleaned.append(f"{name} {t.group(1)}" if t else name)
-    uniq=list(dict.fromkeys(cleaned))
-    uniq.sort(key=lambda s:(bool(_TITLES_RE.search(s)),-len(s)), reverse=True)
-    return uniq[:2]
-
-def try_parse_date(text):
-    try: return dateparser.parse(text)
-    except: return None
-
-def map_publisher_name(host):
-    host=host.lower()
-    for key,name in PUB_NAME_MAP.items():
-        if host==key or host.endswith("."+key) or host.endswith(key): return name
-    parts=host.split(".")
-    return ".".join(parts[-2:]) if len(parts)>=2 else host
-
-def normalize_author_with_title(author: str) -> str:
-    s=clean_text(author)
-    m=re.search(r"([가-힣]{2,4})\s*(기자|특파원|논설위원|평론가|칼럼니스트|사진기자|에디터|부장|팀장|국장)?", s)
-    if m:
-        name=m.group(1); title=m.group(2)
-        return f"{name} {title}" if title else f"{name} 기자"
-    return s if s.endswith("기자") else (s+" 기자" if s else "")
-
-def build_reporter_cell(host, authors):
-    pub = map_publisher_name(host.replace("www.",""))
-    if authors:
-        return f"{pub} {normalize_author_with_title(authors[0])}"
-    return pub
-
-def wednesday_based_week_info(d: date):
-    delta=(d.weekday()-2)%7
-    anchor=d - timedelta(days=delta)
-    y,m=anchor.year, anchor.month
-    first=date(y,m,1)
-    days_to_wed=(2-first.weekday())%7
-    first_wed=first + timedelta(days=days_to_wed)
-    week_no=1 + (anchor-first_wed).days//7
-    return y,m,week_no
-
-def week_sheet_name_wed_kst(now_dt):
-    d=now_dt.date()
-    y,m,w=wednesday_based_week_info(d)
-    return f"{str(y)[-2:]}.{m:02d}.{w}주차"
-
-def contains_excluded(text:str)->bool:
-    if not text: return False
-    return any(x in str(text) for x in EXCLUDE_TERMS)
-
-def has_priority_term(title:str, summary:str, url:str)->int:
-    blob = " ".join([title or "", summary or "", url or ""]).lower()
-    sc=0
-    for term,w in PRIORITY_TERMS_WEIGHTS.items():
-        if term.lower() in blob: sc+=w
-    return sc
-
-def fetch_article_details(url:str)->dict:
-    # ★ 원문으로 언랩
-    try: url = unwrap_google_news_link(url)
-    except: pass
-    soup, resp = get_soup(url, allow_redirects=True)
-    if not soup or not resp:
-        return {"final_url": url, "soup": None, "html":"", "authors":[], "published":None}
-    final_url = resp.url; html_text = resp.text
-
-    authors=[]
-    try:
-        jsonlds = extract_json_ld(soup)
-        authors = extract_authors_from_jsonld(jsonlds)
-    except: pass
-    if not authors: authors = extract_author_meta_and_dom(soup)
-
-    published=None
-    try:
-        for b in (jsonlds if isinstance(jsonlds,list) else []):
-            for key in ("datePublished","dateCreated","uploadDate"):
-                if isinstance(b,dict) and b.get(key):
-                    dt = try_parse_date(b.get(key))
-                    if dt: published = dt; break
-            if published: break
-    except: pass
-    if not published:
-        meta = soup.find("meta", {"property":"article:published_time"}) or soup.find("meta", {"name":"pubdate"})
-        if meta and meta.get("content"): published = try_parse_date(meta["content"])
-    if not published:
-        ttag = soup.find("time")
-        if ttag and ttag.get("datetime"): published = try_parse_date(ttag.get("datetime"))
-
-    return {"final_url": final_url, "soup": soup, "html": html_text, "authors": authors, "published": published}
-
-def parse_one_day(query, d, cand_cap, status=None, progress=None):
-    items = parse_google_news_results(build_news_url_for_date(query, d))
-    if not items:
-        items = parse_google_news_results_rss(query, d)
-    if cand_cap:
-        items = items[:cand_cap]
-    detailed=[]
-    total=len(items)
-    for idx, item in enumerate(items):
-        if status: status.info(f"[파싱] {d} {idx+1}/{total}")
-        if progress and total: progress.progress(min((idx+1)/total,1.0))
-        if contains_excluded(item.get("title","")) or contains_excluded(item.get("url","")): 
-            continue
-        det = fetch_article_details(item["url"])
-        if det.get("soup") is None or not is_korean_source(det["final_url"], det["soup"], det["html"]):
-            continue
-        summary = extract_summary(det["soup"], det["html"], title_fallback=item["title"])
-        if contains_excluded(summary):
-            continue
-        host = domain_of(det["final_url"]) or domain_of(item["url"]) or ""
-        prio = (20 if is_priority_host(det["final_url"]) else 0) + has_priority_term(item["title"], summary, det.get("final_url",""))
-        published = det.get("published")
-        pub_date = (published.astimezone(KST).date() if published and published.tzinfo else (published.date() if published else d))
-        detailed.append({
-            "rank": idx, "prio_score": prio, "title": item["title"],
-            "url": det["final_url"] or item["url"], "summary": clean_text(summary),
-            "authors_list": det.get("authors", []), "published": pub_date, "host": host,
-        })
-    return detailed
-
-def run_pipeline(selected_terms, custom_terms, per_day=5, days=7, cand_cap=40, status=None, progress=None):
-    base_q = parse_query_from_original(DEFAULT_ORIGINAL_URL)
-    query = compose_query(base_q, selected_terms, custom_terms)
-
-    today_kst = datetime.now(tz=KST)
-    date_list = [today_kst.date() - timedelta(days=i) for i in range(days)]
-
-    rows_all = []  # ["", None, title, url, summary, 기자, 일자]
-    for d in date_list:
-        if status: status.info(f"[검색] {d} 뉴스 검색 중…")
-        detailed = parse_one_day(query, d, cand_cap, status=status, progress=progress)
-        detailed.sort(key=lambda x: (-x["prio_score"], x["rank"]))
-        picked = detailed[:per_day]
-        for r in picked:
-            reporter_cell = build_reporter_cell(r["host"], r["authors_list"])
-            rows_all.append(["", None, r["title"], r["url"], r["summary"], reporter_cell, r["published"].strftime("%Y-%m-%d")])
-
-    random.shuffle(rows_all)
-    rows = rows_all[:days*per_day]
-    for i, row in enumerate(rows, start=1): row[1] = i
-
-    df = pd.DataFrame([[""]*7, ["", "순번","타이틀","링크","세부내용","기자","일자"], *rows])
-    sheet_name = week_sheet_name_wed_kst(datetime.now(tz=KST))
-    return df, sheet_name, rows
-
-def build_html_from_rows(rows, sheet_name):
-    def html_br(n=1): return "<br>"*int(n)
-    def html_p(txt, small=False, bold=False):
-        t = pyhtml.escape(str(txt)).replace("\n","<br>")
-        if bold: t=f"<b>{t}</b>"
-        if small: t=f'<span style="font-size:90%">{t}</span>'
-        return f'<p align="left">{t}</p>'
-    def week_label_from_sheet(s):
-        m = re.match(r"(\d{2})\.(\d{2})\.(\d+)주차", s)
-        return f"{m.group(1)}년 {m.group(2)}월 {m.group(3)}주차" if m else s
-
-    parts=['<div align="">', html_p("안녕하세요."), html_br(1),
-           html_p("아이디알서비스 입니다."), html_br(1),
-           html_p(f"{week_label_from_sheet(sheet_name)} 에너지 뉴스 모음 입니다."), html_br(5)]
-    for idx, r in enumerate(rows, start=1):
-        title, url, summary, reporter, d = r[2], r[3], r[4], r[5], r[6]
-        parts.append(html_p(f"{idx}.\u00A0{title}", bold=True)); parts.append(html_br(2))
-        if url:
-            parts.append(f'<p align="left"><a href="{pyhtml.escape(url,quote=True)}" target="_blank" rel="noopener noreferrer">기사원문</a></p>')
-            parts.append(html_br(2))
-        if summary: parts.append(html_p(summary))
-        if reporter: parts.append(html_p(reporter, small=True, bold=True))
-        if d: parts.append(html_p(d, small=True, bold=True))
-        parts.append(html_br(6))
-    parts.append("</div>")
-    return "".join(parts)
-
-def build_item_html_from_row(r, idx):
-    import html as pyhtml
-    def html_br(n=1): return "<br>"*int(n)
-    def html_p(txt, small=False, bold=False):
-        t = pyhtml.escape(str(txt)).replace("\n","<br>")
-        if bold: t=f"<b>{t}</b>"
-        if small: t=f'<span style="font-size:90%">{t}</span>'
-        return f'<p align="left">{t}</p>'
-    title, url, summary, reporter, d = r[2], r[3], r[4], r[5], r[6]
-    parts=['<div align="">', html_p(f"{idx}. {title}", bold=True), html_br(1)]
-    if url:
-        parts.append(f'<p align="left"><a href="{pyhtml.escape(url,quote=True)}" target="_blank" rel="noopener noreferrer">기사원문</a></p>')
-        parts.append(html_br(1))
-    if summary: parts.append(html_p(summary))
-    if reporter: parts.append(html_p(reporter, small=True, bold=True))
-    if d: parts.append(html_p(d, small=True, bold=True))
-    parts.append("</div>")
-    return "".join(parts)
-
-
-
-# -------------------- GUI (Tk 기능 이식) --------------------
-left, right = st.columns([1.1,1])
-
-with left:
-    st.markdown("#### 우선 키워드")
-    selected = st.multiselect("체크/해제", BASE_PRIORITY_TERMS, default=BASE_PRIORITY_TERMS)
-    custom_raw = st.text_input("사용자 직접 입력 키워드(쉼표로 구분)", placeholder="예: 전력거래소, 한전, 송전망, 재생에너지")
-
-    c1, c2, c3 = st.columns(3)
-    with c1:
-        per_day = st.number_input("일자별 최대 건수", 1, 20, 5, 1)
-    with c2:
-        days = st.number_input("최근 N일(오늘 포함)", 1, 14, 7, 1)
-    with c3:
-        cand_cap = st.number_input("일자별 후보 파싱 상한", 10, 200, 40, 10)
-
-    st.markdown("#### 저장 설정")
-    dir_options = list_save_dir_options()
-    dir_labels = [lab for lab, _ in dir_options]
-    
-    # 기본 선택은 ./outputs (없으면 첫 번째 옵션)
-    default_idx = 0
-    for i, (lab, p) in enumerate(dir_options):
-        if os.path.abspath(p) == os.path.abspath(os.path.expanduser("./outputs")):
-            default_idx = i
-            break
-
-    selected_label = st.selectbox("저장 폴더 선택", dir_labels, index=default_idx)
-    # 선택된 경로
-    save_dir = dict(dir_options)[selected_label]
-    
-    save_name = st.text_input(
-        "저장 파일명(확장자 없이)",
-        value=f"에너지뉴스_{datetime.now(tz=KST).strftime('%Y%m%d_%H%M%S')}"
-    )
-
-
-    run = st.button("실행", type="primary")
-    reset = st.button("초기화")
-
-with right:
-    st.markdown("#### 진행도")
-    status_box = st.empty()
-    progress_bar = st.progress(0)
-
-    st.markdown("#### 로그")
-    logs_area = st.empty()
-
-if reset:
-    st.session_state.logs = []
-
-def write_logs():
-    # 표시할 로그 문자열
-    text = "\n".join(st.session_state.logs[-500:])
-    # 동일 key로 "한 번만" 렌더됨 (컨테이너를 비우거나 여러 번 만들지 않음)
-    st.text_area(
-        "실시간 로그",
-        value=text,
-        height=260,
-        key=st.session_state.logs_widget_key,
-        disabled=True
-    )
-
-
-
-# -------------------- 실행 --------------------
-if run:
-    # 폴더 보장
-    try:
-        os.makedirs(save_dir, exist_ok=True)
-    except Exception as e:
-        st.warning(f"저장 폴더 생성 실패: {e}")
-
-    custom_terms = [s.strip() for s in (custom_raw or "").split(",") if s.strip()]
-    st.session_state.logs = []
-    log("[시작] 파이프라인 실행")
-    write_logs()
-
-    df_out, sheet_name, rows = run_pipeline(
-        selected_terms=set(selected),
-        custom_terms=custom_terms,
-        per_day=int(per_day),
-        days=int(days),
-        cand_cap=int(cand_cap),
-        status=status_box,
-        progress=progress_bar
-    )
-
-    status_box.success("완료!")
-    log("[완료] 파이프라인 종료")
-    write_logs()
-
-    # 엑셀 저장(서버)
-    excel_path = os.path.join(save_dir, f"{save_name}.xlsx")
-    try:
-        with pd.ExcelWriter(excel_path, engine="openpyxl") as writer:
-            df_out.to_excel(writer, index=False, header=False, sheet_name=sheet_name)
-        log(f"[저장] 엑셀: {excel_path}")
-    except Exception as e:
-        log(f"[저장 실패] 엑셀: {e}")
-    write_logs()
-
-    # HTML 코드(txt) 생성/저장
-    html_txt = build_html_from_rows(rows, sheet_name)
-    txt_path = os.path.join(save_dir, f"{save_name}.txt")
-    try:
-        with open(txt_path, "w", encoding="utf-8") as f:
-            f.write(html_txt)
-        log(f"[저장] HTML 코드(txt): {txt_path}")
-    except Exception as e:
-        log(f"[저장 실패] HTML txt: {e}")
-    write_logs()
-
-    # 다운로드 버튼
-    d1, d2 = st.columns(2)
-    with d1:
-        buf_xlsx = io.BytesIO()
-        with pd.ExcelWriter(buf_xlsx, engine="openpyxl") as writer:
-            df_out.to_excel(writer, index=False, header=False, sheet_name=sheet_name)
-        buf_xlsx.seek(0)
-        st.download_button("엑셀 다운로드 (.xlsx)", data=buf_xlsx,
-            file_name=f"{save_name}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-
-    with d2:
-        st.download_button("HTML 코드 다운로드 (.txt)", data=html_txt.encode("utf-8"),
-            file_name=f"{save_name}.txt", mime="text/plain; charset=utf-8")
-
-    st.divider()
-
-    # 표 미리보기
-    try:
-        df_prev = pd.read_excel(io.BytesIO(buf_xlsx.getvalue()), sheet_name=sheet_name, header=None)
-        df_prev.columns = df_prev.iloc[1]; df_prev = df_prev.iloc[2:].reset_index(drop=True)
-        st.subheader("수집 결과 (표 미리보기)")
-        st.dataframe(df_prev, use_container_width=True, height=380)
-    except Exception as e:
-        st.warning(f"표 미리보기를 만들 수 없습니다: {e}")
-        # ===== 뉴스 목록 표 + 행 클릭(HTML 코드 보기/다운로드) =====
-    st.subheader("뉴스 목록")
-    
-    # rows -> 표용 DataFrame
-    df_list = pd.DataFrame(
-        [{
-            "순번": r[1],
-            "제목": r[2],
-            "링크": r[3],
-            "세부내용": r[4],
-            "기자": r[5],
-            "일자": r[6],
-        } for r in rows]
-    )
-    
-    # 링크 컬럼을 클릭 가능하게
-    try:
-        st.dataframe(
-            df_list,
-            use_container_width=True,
-            column_config={
-                "링크": st.column_config.LinkColumn("링크"),
-            },
-            hide_index=True,
-            height=420,
-        )
-    except Exception:
-        st.dataframe(df_list, use_container_width=True, hide_index=True, height=420)
-    
-    st.caption("행 우측의 버튼을 눌러 해당 기사 HTML 코드를 확인/다운로드하세요.")
-    
-    # 모달: 코드 미리보기 (HTML 코드 txt로 보여줌)
-    @st.dialog("HTML 코드 미리보기", width="large")
-    def show_code_dialog(item_html, filename):
-        st.code(item_html, language="html")
-        st.download_button(
-            "이 HTML 코드를 .txt로 다운로드",
-            data=item_html.encode("utf-8"),
-            file_name=f"{filename}.txt",
-            mime="text/plain; charset=utf-8",
-            key=f"dl_code_{filename}"
-        )
-    
-    # 행 버튼들
-    for r in rows:
-        idx = r[1]
-        title = r[2] or "(제목 없음)"
-        url = r[3]
-    
-        cA, cB, cC = st.columns([0.62, 0.19, 0.19])
-        with cA:
-            st.write(f"**{idx}. {title}**")
-        with cB:
-            if url:
-                st.link_button("원문 열기", url, use_container_width=True, key=f"open_{idx}")
-            else:
-                st.button("원문 없음", disabled=True, use_container_width=True, key=f"open_na_{idx}")
-        with cC:
-            if st.button("HTML 코드 보기", use_container_width=True, key=f"code_{idx}"):
-                item_html = build_item_html_from_row(r, idx)
-                # 파일명은 '순번_YYYYMMDD_제목앞몇자' 형태
-                safe_title = re.sub(r"[^\w\-가-힣]+", "_", title)[:20] or "no_title"
-                fname = f"{idx}_{datetime.now(tz=KST).strftime('%Y%m%d')}_{safe_title}"
-                show_code_dialog(item_html, fname)
-    
-    st.divider()
-    
-
-    # HTML 코드 미리보기(렌더 + 코드)
-    st.subheader("전체 HTML 렌더 미리보기")
-    st.components.v1.html(html_txt, height=600, scrolling=True)
-
-    st.subheader("전체 HTML 코드 (txt 미리보기)")
-    st.code(html_txt, language="html")
-
-    # -------- 제목 클릭 → 모달 팝업(개별 HTML) --------
-    st.subheader("제목 목록 (클릭하면 팝업에서 개별 미리보기)")
-
-    # dialog 정의
-    @st.dialog("기사 미리보기", width="large")
-    def show_preview_dialog(item_html):
-        st.components.v1.html(item_html, height=420, scrolling=True)
-
-    # 행 유틸
-    def choose_title_col(df: pd.DataFrame) -> str:
-        for c in df.columns:
-            if "타이틀" in str(c): return c
-        return "타이틀"
-
-    # rows는 이미 확정된 리스트 형식이므로 각 항목을 버튼으로 노출
-    for idx, r in enumerate(rows, start=1):
-        title = r[2] or "(제목 없음)"
-        url   = r[3]
-        colA, colB = st.columns([0.75, 0.25])
-        with colA:
-            if st.button(f"{idx}. {title}", key=f"title_btn_{idx}"):
-                # 개별 HTML 구성 후 모달 오픈
-                # (df 없이 rows 직접 사용)
-                def build_item_html():
-                    def html_br(n=1): return "<br>"*int(n)
-                    def html_p(txt, small=False, bold=False):
-                        t = pyhtml.escape(str(txt)).replace("\n","<br>")
-                        if bold: t=f"<b>{t}</b>"
-                        if small: t=f'<span style="font-size:90%">{t}</span>'
-                        return f'<p align="left">{t}</p>'
-                    parts=['<div align="">', html_p(f"{idx}. {title}", bold=True), html_br(1)]
-                    if url:
-                        parts.append(f'<p align="left"><a href="{pyhtml.escape(url,quote=True)}" target="_blank" rel="noopener noreferrer">기사원문</a></p>')
-                        parts.append(html_br(1))
-                    if r[4]: parts.append(html_p(r[4]))
-                    if r[5]: parts.append(html_p(r[5], small=True, bold=True))
-                    if r[6]: parts.append(html_p(r[6], small=True, bold=True))
-                    parts.append("</div>")
-                    return "".join(parts)
-                show_preview_dialog(build_item_html())
-        with colB:
-            if url:
-                st.link_button("원문 열기", url, use_container_width=True)
-            else:
-                st.button("원문 없음", disabled=True, use_container_width=True)
-
-    progress_bar.progress(1.0)
-    status_box.empty()
-
-# 항상 최신 로그 보이기
-write_logs()
-
-
-
+# ===== 대한민국 에너지 뉴스 스크랩 (Streamlit GUI, Tk 기능 이식) =====
+# - 체크박스 우선 키워드 / 직접 입력
+# - 저장 경로/파일명 입력(서버 로컬 저장 + 다운로드)
+# - 진행도 + 로그 스트림
+# - 전체 HTML 미리보기(렌더) + HTML 코드 미리보기(txt) + 다운로드
+# - 제목 클릭 → 모달 팝업에서 해당 기사 HTML 미리보기
+# - Google 뉴스 언랩 복원으로 원문 본문 파싱
+#
+# 실행:
+#   streamlit run News_scaper.py                                  (GUI)
+#   python -m News_scaper run --days 7 --per-day 5 --out ./outputs  (헤드리스/cron)
+# streamlit·pandas·readability·feedparser·bs4·lxml·requests는 실제로 쓰는 함수 안에서 import 한다
+# (헤드리스 실행과 모듈 import가 Streamlit 없이, 빠르게 시작되도록).
+
+import os, io, re, sys, json, time, calendar, random, sqlite3, threading, zlib, hashlib, codecs, argparse, logging, html as pyhtml
+from collections import Counter, OrderedDict, deque
+from contextvars import ContextVar
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from datetime import datetime, timedelta, date
+from functools import lru_cache, wraps
+import inspect
+from urllib.parse import urlparse, parse_qs, quote_plus, urlencode, urlunparse
+
+from dateutil.tz import gettz
+
+
+def _dir_label(p: str) -> str:
+    try:
+        ap = os.path.abspath(os.path.expanduser(p))
+        base = os.path.basename(ap) or ap
+        return f"{base}  –  {ap}"
+    except Exception:
+        return p
+
+def list_save_dir_options() -> list[tuple[str, str]]:
+    """
+    (label, path) 튜플 리스트 반환.
+    기본 후보 + 현재 작업 디렉토리의 1뎁스 하위 폴더를 합쳐 중복 제거.
+    """
+    base_candidates = [
+        "./outputs",
+        ".",
+        "~/Downloads",
+        "/tmp",
+    ]
+
+    # 현재 폴더의 하위 디렉터리 1뎁스 추가
+    try:
+        for name in os.listdir("."):
+            if os.path.isdir(os.path.join(".", name)):
+                base_candidates.append(os.path.join(".", name))
+    except Exception:
+        pass
+
+    # 중복 제거 + 정규화
+    uniq = []
+    seen = set()
+    for p in base_candidates:
+        ap = os.path.abspath(os.path.expanduser(p))
+        if ap not in seen:
+            seen.add(ap)
+            uniq.append(ap)
+
+    # 라벨 생성
+    options = [(_dir_label(p), p) for p in uniq]
+    return options
+    
+# -------------------- 전역 설정 --------------------
+KST = gettz("Asia/Seoul")
+DEBUG = False
+DEFAULT_ORIGINAL_URL = (
+    "https://www.google.com/search?lr=&cr=countryKR&sca_esv=f6d19e7077c59f8e"
+    "&tbs=ctr:countryKR&q=%EC%88%98%EC%9A%94%EA%B4%80%EB%A6%AC+OR+%EA%B7%B8%EB%A6%AC%EB%93%9C%EC%9C%84%EC%A6%88+OR+DR+OR+%EC%A0%84%EB%A0%A5+OR+%ED%95%9C%EC%A0%84&tbm=nws&num=100"
+)
+
+BASE_PRIORITY_TERMS = [
+    "아이디알서비스", "iDRS", "idrs", "그리드위즈", "전력수급기본계획", "분산에너지", "계통"
+]
+EXCLUDE_TERMS = {"배구", "학폭"}
+PRIORITY_DOMAINS = {
+    "etnews.com", "khan.co.kr", "electimes.com", "marketin.edaily.co.kr",
+    "ekn.kr", "mk.co.kr", "energydaily.co.kr", "edaily.co.kr", "e2news.com",
+}
+PRIORITY_TERMS_WEIGHTS = {
+    "아이디알서비스": 3, "idrs": 3, "iDRS": 3,
+    "그리드위즈": 2, "전력수급기본계획": 2, "분산에너지": 2, "계통": 1,
+}
+CUSTOM_TERM_WEIGHT = 1  # 사용자 직접 입력 키워드의 기본 가중치("용어:가중치"로 용어마다 따로 줄 수 있다)
+TERM_AUTOMATON_MIN = 150  # 키워드+제외어가 이만큼 이상이면 Aho-Corasick 한 번 훑기, 적으면 용어별 C 수준 검색이 더 빠르다
+PUB_NAME_MAP = {
+    "etnews.com":"전자신문","khan.co.kr":"경향신문","electimes.com":"전기신문","marketin.edaily.co.kr":"이데일리 마켓인",
+    "ekn.kr":"에너지경제","mk.co.kr":"매일경제","energydaily.co.kr":"에너지데일리","edaily.co.kr":"이데일리","e2news.com":"이투뉴스",
+    "yonhapnews.co.kr":"연합뉴스","yna.co.kr":"연합뉴스","newsis.com":"뉴시스","hankyung.com":"한국경제","chosun.com":"조선일보",
+    "hani.co.kr":"한겨레","joins.com":"중앙일보","hankookilbo.com":"한국일보","seoul.co.kr":"서울신문","kmib.co.kr":"국민일보",
+    "munhwa.com":"문화일보","ohmynews.com":"오마이뉴스","pressian.com":"프레시안","zdnet.co.kr":"지디넷코리아",
+    "sbs.co.kr":"SBS","mbc.co.kr":"MBC","jtbc.co.kr":"JTBC","kbs.co.kr":"KBS","busan.com":"부산일보","asiatoday.co.kr":"아시아투데이",
+    "naver.com":"네이버뉴스","daum.net":"다음뉴스","news1.kr":"뉴스1","sisajournal-e.com":"시사저널e",
+    "tongilnews.com":"통일신문","m-i.kr":"매일일보","newsspirit.kr":"뉴스스피릿","h2news.kr":"이투뉴스","incheontoday.com":"인천투데이",
+}
+FETCH_WORKERS = 8      # 전역 동시 요청 상한(스레드 풀 크기)
+PARSE_WORKERS = max(0, (os.cpu_count() or 1) - 1)  # 기사 파싱 프로세스 수(GIL 밖에서 코어마다). 0이면 수집 스레드에서 직접
+PER_HOST_LIMIT = 2     # 호스트별 동시 요청 상한
+HTTP_POOL_SIZE = 32    # 공용 세션의 호스트별 keep-alive 연결 풀 크기
+RETRY_ATTEMPTS = 4
+RETRY_AFTER_CAP = 30.0 # Retry-After가 이보다 길면 기다리지 않고 포기(초)
+BREAKER_THRESHOLD = 3  # 호스트별 연속 실패가 이만큼 쌓이면 실행 끝까지 건너뜀
+FETCH_MAX_BYTES = 512*1024  # 기사 본문은 이만큼(압축 해제 후)만 읽는다. 0이면 상한 없음
+HTML_CONTENT_TYPES = {"text/html", "application/xhtml+xml"}  # 이 외의 Content-Type(PDF/영상 등)은 받지 않는다
+CHARSET_SNIFF_BYTES = 8192  # <meta charset> 을 찾는 문서 앞부분 길이
+METRIC_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)  # 지연 히스토그램 경계(초)
+LOG_LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+LOG_MAX_EVENTS = 2000   # 이벤트 버스가 메모리에 두는 최근 이벤트 수(넘치면 오래된 것부터 밀려남)
+LOG_VIEW_LINES = 500    # Streamlit 로그 창에 보이는 최근 줄 수
+LOG_REFRESH_SECS = 0.3  # 수집 중 로그 창을 다시 그리는 최소 간격(초)
+CACHE_DIR = "./.news_cache"
+CACHE_DB = os.path.join(CACHE_DIR, "articles.sqlite3")
+CACHE_FRESH_HOURS = 12  # 이 시간 안에 받은 기사는 네트워크 없이 캐시 사용
+CACHE_TTL_DAYS = 30     # 이보다 오래된 항목은 삭제
+CACHE_MAX_MB = 256      # 초과 시 가장 오래 안 쓴 항목부터 삭제(LRU)
+HOST_LANG_FILE = os.path.join(CACHE_DIR, "host_lang.json")
+RSS_DIR = os.path.join(CACHE_DIR, "rss")  # 검색어별 RSS 본문과 ETag/Last-Modified(다음 실행의 조건부 GET용)
+GNEWS_LINK_FILE = os.path.join(CACHE_DIR, "gnews_links.json")  # 해독 못 한 Google 뉴스 기사 토큰 → 원문 URL(요청으로 알아낸 것만)
+GNEWS_LINK_TTL_DAYS = 90  # 이보다 오래된 토큰 매핑은 버린다
+KO_SAMPLE_CHARS = 4000  # 한국어 판정에 쓰는 본문 텍스트 표본 상한(글자 수)
+KO_MIN_HANGUL = 40      # 표본 안 한글 글자 수 하한
+KO_MIN_RATIO = 0.30     # 표본 안 (한글 / 한글+영문) 비율 하한
+KO_HOST_MIN_VOTES = 3   # 같은 판정이 이만큼 쌓이고 반대 판정이 없으면 그 호스트는 내용 검사 생략
+SIMHASH_CHARS = 3000    # 근접 중복 판정에 쓰는 본문 앞부분 길이(글자 수)
+SIMHASH_MAX_DIST = 6    # SimHash(64비트) 해밍 거리가 이 이하면 같은 기사(통신사 전재 등)로 본다
+DEDUPE_FILE = os.path.join(CACHE_DIR, "dedupe.json")
+STORE_DB = os.path.join(CACHE_DIR, "store.sqlite3")  # 일자별 후보 저장소(증분 수집)
+STORE_SETTLE_HOURS = 6  # 일자가 끝나고 이만큼 지난 뒤에 수집한 일자는 확정으로 보고 다시 긁지 않는다
+STORE_PER_DAY = 20      # crawl 명령이 일자별로 확정해 두는 상위 건수(보고서의 per_day는 이 이하에서 재사용)
+STORE_TTL_DAYS = 120    # 이보다 오래된 일자는 저장소에서 지운다
+SEARCH_DB = os.path.join(CACHE_DIR, "search.sqlite3")  # 수집한 기사의 전문 검색 색인(FTS5)
+SEARCH_TEXT_CHARS = 4000  # 기사 본문은 앞부분 이만큼만 색인한다(기사 캐시에도 이만큼 보관)
+SEARCH_TTL_DAYS = 365   # 기사 일자가 이보다 오래되면 색인에서 지운다
+SEARCH_LIMIT = 50       # 검색 결과 기본 건수
+LOG_FILE = os.path.join(CACHE_DIR, "logs", "events.jsonl")  # 사후 분석용 이벤트 기록(JSONL)
+LOG_FILE_MAX_MB = 5     # 이 크기를 넘으면 events.jsonl.1, .2 … 로 돌린다
+LOG_FILE_BACKUPS = 3
+DEDUPE_TTL_DAYS = 14    # 영구 중복 색인에서 이보다 오래된 기사는 잊는다
+RESULTS_TTL_HOURS = 6   # Streamlit 결과 저장소: 이 시간이 지난 결과는 버린다
+RESULTS_MAX_ENTRIES = 8 # Streamlit 결과 저장소: 보관할 실행 결과 수(넘치면 가장 오래 안 본 것부터)
+JOB_WORKERS = 2         # 동시에 돌리는 백그라운드 수집 작업 수(나머지는 대기열)
+JOB_POLL_SECS = 1.0     # 화면이 작업 상태를 다시 읽는 간격(초)
+JOB_HISTORY = 20        # 끝난 작업은 이만큼만 기억
+EXPORT_FORMATS = ("xlsx", "txt", "csv", "jsonl")  # 내보내기 기본 형식
+OPTIONAL_EXPORT_FORMATS = {"parquet": "pyarrow"}  # 형식 → 필요한 패키지(requirements에 없음). 설치돼 있을 때만 고를 수 있다
+LAZY_EXTRA = 2          # 지연 수집: 일자별로 per_day보다 이만큼 더 동시에 수집(판정 탈락 대비)
+TRANSIENT_STATUS = {408, 425, 429, 500, 502, 503, 504}  # 재시도할 가치가 있는 응답(그 외 비200은 영구 오류)
+BLOCKING_STATUS = {401, 403, 429, 451}                  # 호스트가 우리를 막고 있다는 신호
+_TRACKING_PARAMS = {"utm_source","utm_medium","utm_campaign","utm_content","utm_term","fbclid","gclid","igshid","ref"}
+SENT_SPLIT_RE = re.compile(r"(?<=[.!?。！？])\s+|(?<=다\.|요\.)\s+")
+
+# -------------------- 로그 유틸 --------------------
+LOG_ECHO = False    # True면 헤드리스 로그를 stderr로도 출력(CLI가 켬)
+_LOG_CTX = ContextVar("log_ctx", default={})  # 지금 처리 중인 일자/기사 등 이벤트에 붙일 문맥
+
+def running_in_streamlit():
+    """streamlit run 으로 실행 중인지. streamlit을 새로 import 하지 않는다."""
+    if "streamlit" not in sys.modules: return False
+    try:
+        from streamlit import runtime
+        return runtime.exists()
+    except Exception:
+        return False
+
+@lru_cache(maxsize=None)
+def _jsonl_handler(path, max_mb=LOG_FILE_MAX_MB, backups=LOG_FILE_BACKUPS):
+    # 같은 파일을 쓰는 버스(세션)들이 핸들러 하나를 공유해야 파일 돌리기가 꼬이지 않는다
+    from logging.handlers import RotatingFileHandler
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    h = RotatingFileHandler(path, maxBytes=int(max_mb*1024*1024), backupCount=backups, encoding="utf-8", delay=True)
+    h.setFormatter(logging.Formatter("%(message)s"))
+    return h
+
+class EventBus:
+    """
+    스레드 안전 로그/이벤트 버스. 수집 워커 스레드도 그대로 publish 할 수 있다.
+    - 이벤트: {"seq", "ts", "level", "msg", "bus", 문맥(day/url/host …)}
+    - 최근 max_events개만 deque에 보관(오래된 것은 자동으로 밀려남)
+    - 화면은 since(seq)로 마지막으로 본 뒤의 이벤트만 받아 간다
+    - path가 있으면 JSONL 파일에도 쓴다(LOG_FILE_MAX_MB마다 돌림, 세션 종료 후 사후 분석용)
+    """
+    def __init__(self, name="main", max_events=LOG_MAX_EVENTS, path=None):
+        self.name = name
+        self._lock = threading.Lock()
+        self._events = deque(maxlen=max_events)
+        self._seq = 0
+        self._file = None
+        if path:
+            try: self._file = _jsonl_handler(path)
+            except OSError: pass  # 기록 파일 없이 메모리로만
+
+    def publish(self, msg, level="info", **ctx):
+        with self._lock:
+            self._seq += 1
+            ev = {"seq": self._seq, "ts": time.time(), "level": level, "msg": msg, "bus": self.name, **ctx}
+            self._events.append(ev)
+        if self._file:
+            self._file.handle(logging.makeLogRecord({"msg": json.dumps(ev, ensure_ascii=False, default=str)}))
+        return ev
+
+    def since(self, seq=0, level="info"):
+        """seq 뒤에 들어온 이벤트 중 level 이상(이미 밀려난 것은 빠진다)."""
+        floor = LOG_LEVELS.get(level, 20)
+        with self._lock:
+            if not self._events or self._events[-1]["seq"] <= seq: return []
+            evs = list(self._events)
+        return [e for e in evs if e["seq"] > seq and LOG_LEVELS.get(e["level"], 20) >= floor]
+
+    def tail(self, n=None, level="info"):
+        evs = self.since(0, level)
+        return evs[-n:] if n else evs
+
+    def clear(self):
+        with self._lock:
+            self._events.clear()
+
+    @property
+    def last_seq(self):
+        with self._lock:
+            return self._seq
+
+_DEFAULT_BUS = EventBus("headless")  # Streamlit 세션 밖(헤드리스)에서 쓰는 버스
+_LOG_BUS = ContextVar("log_bus", default=_DEFAULT_BUS)
+
+def get_log_bus():
+    return _LOG_BUS.get()
+
+def use_log_bus(bus):
+    """현재 스레드(컨텍스트)의 log()가 bus로 가게 한다. 수집 풀 스레드는 RunContext가 같은 버스를 물려준다."""
+    _LOG_BUS.set(bus)
+
+@contextmanager
+def log_context(**ctx):
+    """블록 안의 log() 이벤트에 문맥(일자/기사 URL 등)을 붙인다."""
+    token = _LOG_CTX.set({**_LOG_CTX.get(), **ctx})
+    try:
+        yield
+    finally:
+        _LOG_CTX.reset(token)
+
+def log(msg, level="info", **ctx):
+    ev = get_log_bus().publish(msg, level, **_LOG_CTX.get(), **ctx)
+    if LOG_ECHO and LOG_LEVELS.get(level, 20) >= LOG_LEVELS["info"]:
+        print(msg, file=sys.stderr, flush=True)
+    return ev
+
+def format_event(ev):
+    """이벤트 → 로그 창 한 줄."""
+    mark = {"warning": "⚠ ", "error": "✖ ", "debug": "· "}.get(ev["level"], "")
+    return f"{datetime.fromtimestamp(ev['ts'], tz=KST).strftime('%H:%M:%S')} {mark}{ev['msg']}"
+
+def get_headers():
+    uas = [
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Safari/605.1.15",
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0 Safari/537.36",
+    ]
+    ua = uas[int(time.time()) % len(uas)]
+    return {"User-Agent": ua, "Accept-Language":"ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7"}
+
+def clean_text(s):
+    return re.sub(r"\s+"," ",str(s)).strip() if s is not None else ""
+
+# -------------------- 실행 지표 --------------------
+class Metrics:
+    """
+    실행 1회의 지표. 여러 수집 스레드가 함께 쓰므로 잠금으로 보호한다.
+    - stages: 단계별 소요 시간(span/timed로 기록)
+    - hosts: 호스트별 HTTP 응답 지연(헤더 도착까지)
+    - counters: 요청/재시도/실패/바이트 등 누적 값
+    report()는 JSON용 dict, prometheus()는 Prometheus 텍스트 형식.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages, self.hosts = {}, {}
+        self.counters = Counter()
+        self.started = time.time()
+
+    def observe(self, stage, secs):
+        with self._lock: self.stages.setdefault(stage, []).append(secs)
+
+    def observe_host(self, host, secs):
+        with self._lock: self.hosts.setdefault(host or "?", []).append(secs)
+
+    def count(self, **kw):
+        with self._lock: self.counters.update(kw)
+
+    @contextmanager
+    def span(self, stage):
+        t0 = time.perf_counter()
+        try: yield
+        finally: self.observe(stage, time.perf_counter() - t0)
+
+    @staticmethod
+    def _summary(xs):
+        xs = sorted(xs)
+        pct = lambda p: xs[min(len(xs)-1, int(p*len(xs)))]*1000
+        return {"count": len(xs), "total_s": round(sum(xs), 6), "mean_ms": round(sum(xs)/len(xs)*1000, 1),
+                "p50_ms": round(pct(0.5), 1), "p95_ms": round(pct(0.95), 1), "max_ms": round(xs[-1]*1000, 1),
+                "buckets": {str(b): sum(1 for x in xs if x <= b) for b in METRIC_BUCKETS}}
+
+    def report(self):
+        with self._lock:
+            stages = {k: self._summary(v) for k, v in self.stages.items()}
+            hosts = {k: self._summary(v) for k, v in self.hosts.items()}
+            counters = dict(self.counters)
+        return {"started": datetime.fromtimestamp(self.started, tz=KST).isoformat(timespec="seconds"),
+                "wall_s": round(time.time() - self.started, 3), "stages": stages, "hosts": hosts, "counters": counters}
+
+    def prometheus(self, prefix="news_scaper"):
+        rep = self.report(); out = []
+        def hist(name, label, data, help_):
+            out.append(f"# HELP {prefix}_{name} {help_}"); out.append(f"# TYPE {prefix}_{name} histogram")
+            for key, s in sorted(data.items()):
+                lab = f'{label}="{key}"'
+                for b, n in s["buckets"].items(): out.append(f'{prefix}_{name}_bucket{{{lab},le="{b}"}} {n}')
+                out.append(f'{prefix}_{name}_bucket{{{lab},le="+Inf"}} {s["count"]}')
+                out.append(f"{prefix}_{name}_sum{{{lab}}} {s['total_s']}"); out.append(f"{prefix}_{name}_count{{{lab}}} {s['count']}")
+        hist("stage_seconds", "stage", rep["stages"], "단계별 소요 시간")
+        hist("http_request_seconds", "host", rep["hosts"], "호스트별 HTTP 응답 지연(헤더 도착까지)")
+        for k, v in sorted(rep["counters"].items()):
+            out.append(f"# TYPE {prefix}_{k}_total counter"); out.append(f"{prefix}_{k}_total {v}")
+        out.append(f"# TYPE {prefix}_run_seconds gauge"); out.append(f"{prefix}_run_seconds {rep['wall_s']}")
+        return "\n".join(out) + "\n"
+
+    def save(self, json_path=None, prom_path=None):
+        if json_path: save_text(json.dumps(self.report(), ensure_ascii=False, indent=1), json_path)
+        if prom_path: save_text(self.prometheus(), prom_path)
+
+def _metrics_of(run):
+    return getattr(run, "metrics", None)
+
+@contextmanager
+def span(run, stage):
+    """run에 지표가 있으면 stage 소요 시간을 기록한다."""
+    m = _metrics_of(run)
+    if m is None:
+        yield
+        return
+    with m.span(stage):
+        yield
+
+def timed(stage):
+    """run 인자를 받는 함수의 소요 시간을 run.metrics에 stage로 기록하는 데코레이터."""
+    def deco(fn):
+        sig = inspect.signature(fn)
+        @wraps(fn)
+        def wrapper(*a, **kw):
+            run = kw.get("run") if "run" in kw else sig.bind_partial(*a, **kw).arguments.get("run")
+            with span(run, stage):
+                return fn(*a, **kw)
+        return wrapper
+    return deco
+
+# -------------------- HTTP 전송 계층 --------------------
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+def get_session():
+    """
+    프로세스 공용 requests.Session (keep-alive 연결 풀, gzip/br 압축).
+    재시도는 http_get에서 직접 하므로 어댑터 자체 재시도는 끈다.
+    """
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.request import ACCEPT_ENCODING
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=0)
+            s.mount("http://", adapter); s.mount("https://", adapter)
+            # ACCEPT_ENCODING은 brotli가 설치돼 있으면 br을 포함한다(디코딩 가능한 것만 광고)
+            s.headers.update({"Accept-Encoding": ACCEPT_ENCODING,
+                              "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8"})
+            _SESSION = s
+        return _SESSION
+
+def is_google_host(host):
+    return ".google." in f".{(host or '').lower()}."  # google.com, www.google.co.kr, news.google.com …
+
+def is_google_sorry(url):
+    u = urlparse(url or "")
+    return is_google_host(u.hostname) and u.path.startswith("/sorry")
+
+class CircuitBreaker:
+    """
+    호스트별 연속 실패(요청 단위, http_get 참고)를 세다가 BREAKER_THRESHOLD에 닿으면 그 호스트를 연다(이후 요청 즉시 건너뜀).
+    Google(검색/RSS)은 호스트별로 세지 않는다: 실패 몇 번으로 모든 일자의 검색을 막지 않도록, /sorry(봇 차단)를
+    만났을 때만 Google 전체를 연다.
+    한 번 열리면 실행(RunContext)이 끝날 때까지 닫지 않는다.
+    """
+    def __init__(self, threshold=BREAKER_THRESHOLD):
+        self.threshold = max(1, int(threshold))
+        self._lock = threading.Lock()
+        self._fails = {}
+        self._open = set()
+        self.google_blocked = False
+
+    def allow(self, url):
+        host = domain_of(url)
+        with self._lock:
+            if self.google_blocked and is_google_host(host): return False
+            return host not in self._open
+
+    def success(self, url):
+        with self._lock:
+            self._fails.pop(domain_of(url), None)
+
+    def failure(self, url):
+        host = domain_of(url)
+        if is_google_host(host): return
+        with self._lock:
+            n = self._fails[host] = self._fails.get(host, 0) + 1
+            tripped = n >= self.threshold and host not in self._open
+            if tripped: self._open.add(host)
+        if tripped: log(f"[차단] {host} 연속 실패 {n}회 → 이번 실행에서 건너뜀", level="warning")
+
+    def block_google(self):
+        with self._lock:
+            tripped = not self.google_blocked
+            self.google_blocked = True
+        if tripped: log("[차단] Google /sorry 감지 → 이번 실행에서 Google 요청 중단", level="warning")
+
+def _retry_after_seconds(resp):
+    """Retry-After 헤더(초 또는 HTTP 날짜)를 초 단위로. 없거나 해석 불가면 None."""
+    from email.utils import parsedate_to_datetime
+    val = (resp.headers.get("Retry-After") or "").strip()
+    if not val: return None
+    if val.isdigit(): return float(val)
+    try:
+        return max(0.0, (parsedate_to_datetime(val) - datetime.now(tz=KST)).total_seconds())
+    except Exception:
+        return None
+
+def http_get(url, timeout=25, allow_redirects=True, run=None, attempts=RETRY_ATTEMPTS, headers=None, stream=False):
+    """
+    공용 세션으로 GET 후 200 응답(조건부 요청이면 304도)을 돌려준다. 실패하면 None.
+    stream=True면 본문을 읽지 않은 응답을 돌려주므로 호출한 쪽이 read_body 등으로 읽고 닫아야 한다.
+    - 영구 오류(404/410 등)는 재시도하지 않음
+    - 일시 오류(5xx/429/타임아웃/연결 오류)는 Retry-After 또는 1,2,3초 간격으로 재시도
+    - 차단성 응답(403/429 등)·5xx·타임아웃·연결 오류로 끝내 실패하면 요청 1건당 한 번만 브레이커에 실패로 기록
+      (느린 기사 1건의 재시도가 호스트 전체를 막지 않도록)
+    - 브레이커가 열린 호스트·Google 차단 중인 요청은 네트워크 없이 바로 None
+    """
+    import requests
+    breaker = run.breaker if run else CircuitBreaker()
+    session = get_session()
+    metrics = _metrics_of(run) or Metrics()  # 지표가 없으면 버리는 임시 객체
+    host = domain_of(url)
+    failed = False  # 브레이커에 실패로 남길 시도가 있었는지
+    for i in range(attempts):
+        if not breaker.allow(url):
+            metrics.count(http_skipped_breaker=1)
+            return None
+        if i: metrics.count(http_retries=1)
+        wait = 1.0*(i+1)
+        try:
+            # 호스트 슬롯은 요청 중에만 잡고, 재시도 대기 중에는 놓아준다
+            with (run.hosts.slot(url) if run else _nullslot()):
+                metrics.count(http_requests=1); t0 = time.perf_counter()
+                r = session.get(url, headers={**get_headers(), **(headers or {})}, timeout=timeout,
+                                allow_redirects=allow_redirects, stream=stream)
+                metrics.observe_host(host, time.perf_counter() - t0)
+        except requests.Timeout:
+            metrics.count(http_fail_timeout=1); failed = True
+            log(f"[HTTP] 시간 초과({i+1}/{attempts}) {host}", level="debug", req=url)
+        except requests.RequestException as e:
+            metrics.count(http_fail_connection=1); failed = True
+            log(f"[HTTP] 연결 오류({i+1}/{attempts}) {host}: {type(e).__name__}", level="debug", req=url)
+        else:
+            if r.status_code not in (200, 304):
+                metrics.count(**{f"http_status_{r.status_code}": 1})
+                log(f"[HTTP] {r.status_code}({i+1}/{attempts}) {host}", level="debug", req=url)
+            if is_google_sorry(r.url):
+                metrics.count(http_google_sorry=1)
+                breaker.block_google(); r.close()
+                return None
+            if r.status_code == 200 or (r.status_code == 304 and headers):
+                breaker.success(url)
+                if not stream: metrics.count(bytes_read=len(r.content))
+                return r
+            if r.status_code in BLOCKING_STATUS or r.status_code >= 500: failed = True
+            r.close()
+            if r.status_code not in TRANSIENT_STATUS and r.status_code < 500: break
+            ra = _retry_after_seconds(r)
+            if ra is not None:
+                if ra > RETRY_AFTER_CAP: break
+                wait = max(wait, ra)
+        if i < attempts - 1: time.sleep(wait)
+    if failed: breaker.failure(url)
+    return None
+
+def _content_length(resp):
+    try: return int(resp.headers.get("Content-Length") or "")
+    except ValueError: return None
+
+def is_html_response(resp):
+    """Content-Type 헤더로 HTML 여부 판단. 헤더가 없으면 일단 HTML로 본다."""
+    ct = (resp.headers.get("Content-Type") or "").split(";")[0].strip().lower()
+    return not ct or ct in HTML_CONTENT_TYPES
+
+def read_body(resp, max_bytes=FETCH_MAX_BYTES, run=None):
+    """
+    stream=True 응답의 본문을 max_bytes(압축 해제 후)까지만 읽고 연결을 닫는다.
+    (bytes, 잘림 여부), 읽는 중 연결이 끊기면 (None, False).
+    잘랐을 때 Content-Length를 알면 덜 받은 전송 바이트를 run 통계에 더한다.
+    """
+    import requests
+    buf = bytearray(); truncated = False
+    try:
+        for chunk in resp.iter_content(64*1024):
+            buf += chunk
+            if max_bytes and len(buf) > max_bytes:
+                # 마지막 '>'에서 자른다: UTF-8/CP949 어느 쪽이든 글자 중간이 아니다
+                truncated = True; cut = buf.rfind(b">", 0, max_bytes) + 1
+                del buf[cut or max_bytes:]
+                break
+        wire = resp.raw.tell() if hasattr(resp.raw, "tell") else len(buf)
+    except requests.RequestException:
+        return None, False
+    finally:
+        resp.close()
+    if run:
+        total = _content_length(resp)
+        run.count(bytes_read=wire)
+        if truncated: run.count(capped=1, capped_saved=max(0, total - wire) if total else 0)
+    return bytes(buf), truncated
+
+# -------------------- 문자 인코딩 판별 --------------------
+_BOMS = ((codecs.BOM_UTF8, "utf-8"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"))
+_CT_CHARSET_RE = re.compile(r"""charset\s*=\s*["']?([\w.:-]+)""", re.I)
+_META_CHARSET_RE = re.compile(rb"""<meta[^>]+?charset\s*=\s*["']?\s*([\w.:-]+)""", re.I)
+_KO_CHARSETS = {"euc_kr", "cp949", "x-windows-949", "windows-949", "ks_c_5601"}
+# 서버가 기본값으로 잘못 붙이는 일이 많은 charset. <meta>에 다른 선언이 있으면 그쪽을 믿는다
+_WEAK_CHARSETS = {"iso8859-1", "cp1252", "ascii"}
+
+def normalize_charset(name):
+    """charset 이름 → 파이썬 코덱 이름. EUC-KR 계열은 상위 집합인 cp949로. 모르는 이름이면 None."""
+    name = (name or "").strip().strip("'\"").lower()
+    if name in _KO_CHARSETS: return "cp949"
+    try: codec = codecs.lookup(name).name
+    except LookupError: return None
+    return "cp949" if codec in _KO_CHARSETS else codec
+
+def sniff_charset(data, content_type="", host_hint=None):
+    """
+    (인코딩, 출처). 통계적 추정 없이 BOM → Content-Type charset → 앞부분 <meta charset> →
+    같은 호스트에서 전에 본 인코딩 → UTF-8로 깨짐 없이 읽히면 utf-8, 아니면 cp949 순으로 정한다.
+    """
+    for bom, enc in _BOMS:
+        if data.startswith(bom): return enc, "bom"
+    m = _CT_CHARSET_RE.search(content_type or "")
+    header = normalize_charset(m.group(1)) if m else None
+    if header and header not in _WEAK_CHARSETS: return header, "header"
+    m = _META_CHARSET_RE.search(data[:CHARSET_SNIFF_BYTES])
+    meta = normalize_charset(m.group(1).decode("ascii", "ignore")) if m else None
+    if meta: return ("utf-8" if meta.startswith("utf-16") else meta), "meta"  # 바이트 문서의 utf-16 선언은 무시
+    if header: return header, "header"
+    if host_hint: return host_hint, "host"
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(data[:65536])  # 끝의 잘린 글자는 허용
+        return "utf-8", "guess"
+    except UnicodeDecodeError:
+        return "cp949", "guess"
+
+@timed("get_soup")
+def get_soup(url, timeout=25, allow_redirects=True, run=None):
+    r = http_get(url, timeout=timeout, allow_redirects=allow_redirects, run=run)
+    if r is None: return None, None
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(r.text, "lxml"), r
+
+def domain_of(url):
+    try:
+        host = urlparse(url).hostname or ""
+        return host.lower()
+    except Exception:
+        return ""
+
+def host_matches_suffix(host, suffix_set):
+    return any(host == s or host.endswith("."+s) or host.endswith(s) for s in suffix_set)
+
+def parse_query_from_original(url):
+    try:
+        return parse_qs(urlparse(url).query).get("q",[""])[0] or ""
+    except Exception:
+        return ""
+
+def compose_query(base_q: str, selected_terms, custom_terms) -> str:
+    base_q = (base_q or "").strip()
+    # 선택 용어는 set으로 오기도 하므로 순서를 고정한다(검색어가 실행마다 같아야 RSS/일자 저장소 키가 맞는다)
+    selected_terms = selected_terms or BASE_PRIORITY_TERMS
+    extra_terms = [t for t in BASE_PRIORITY_TERMS if t in selected_terms]
+    extra_terms += sorted(t for t in selected_terms if t not in extra_terms)
+    for t in (custom_terms or []):
+        if t and t not in extra_terms:
+            extra_terms.append(t)
+    for t in extra_terms:
+        if t not in base_q:
+            base_q = (base_q + f" OR {t}") if base_q else t
+    if "-배구" not in base_q: base_q += " -배구"
+    if "-학폭" not in base_q: base_q += " -학폭"
+    return base_q
+
+def build_news_url_for_date(query, date_obj):
+    md = date_obj.strftime("%m/%d/%Y")
+    tbs = f"cdr:1,cd_min:{md},cd_max:{md},ctr:countryKR"
+    return f"https://www.google.com/search?tbm=nws&q={quote_plus(query)}&tbs={tbs}&num=100&hl=ko&lr=lang_ko&cr=countryKR&gl=KR"
+
+_GNEWS_TOKEN_RE = re.compile(r"(?:^|/)(?:articles|read)/([A-Za-z0-9_-]{16,})")
+
+def google_news_token(link):
+    """Google 뉴스 기사 링크(news.google.com/rss/articles/CBMi…, ./articles/…)의 토큰. 아니면 None."""
+    try: u = urlparse(link or "")
+    except ValueError: return None
+    if u.hostname and "news.google." not in u.hostname: return None
+    m = _GNEWS_TOKEN_RE.search(u.path)
+    return m.group(1) if m else None
+
+def _pb_varint(buf, i):
+    n = shift = 0
+    while True:
+        b = buf[i]; i += 1
+        n |= (b & 0x7F) << shift; shift += 7
+        if b < 0x80: return n, i
+
+def _pb_strings(buf):
+    """protobuf 메시지의 길이 구분 필드(wire type 2) 값들. 형식이 깨졌으면 IndexError/ValueError."""
+    i = 0
+    while i < len(buf):
+        key, i = _pb_varint(buf, i)
+        wt = key & 7
+        if wt == 0: _, i = _pb_varint(buf, i)
+        elif wt == 1: i += 8
+        elif wt == 5: i += 4
+        elif wt == 2:
+            n, i = _pb_varint(buf, i)
+            if i + n > len(buf): raise ValueError("truncated")
+            yield buf[i:i+n]; i += n
+        else: raise ValueError(f"wire type {wt}")
+
+def decode_google_news_token(token):
+    """
+    기사 토큰(URL-safe base64 protobuf)에 들어 있는 원문 URL. 네트워크 없음.
+    예전 형식(CBMi…)은 필드 4에 원문(필드 26에 AMP 주소)이 그대로 있다. 2024년 이후 형식은
+    그 자리에 불투명한 ID(AU_yqL…)만 있어 해독할 수 없으므로 None(요청으로 알아내야 한다).
+    """
+    import base64, binascii
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        for val in _pb_strings(raw):
+            if not val.startswith((b"http://", b"https://")): continue
+            url = val.decode("utf-8")
+            if not is_google_host(domain_of(url)): return url
+    except (binascii.Error, IndexError, ValueError):
+        pass
+    return None
+
+def unwrap_google_news_link(link: str) -> str:
+    """Google 뉴스 링크 → 원문 URL(예전 ?url= 파라미터, 기사 토큰 해독). 네트워크 없음, 못 풀면 그대로."""
+    try:
+        u = urlparse(link)
+        if "news.google." in (u.hostname or ""):
+            real = parse_qs(u.query).get("url", [None])[0]
+            if real: return real
+        token = google_news_token(link)
+        return (decode_google_news_token(token) if token else None) or link
+    except Exception:
+        return link
+
+def normalize_url_for_dedupe(u: str) -> str:
+    try:
+        p = urlparse(u); qs = parse_qs(p.query)
+        clean = {k:v for k,v in qs.items() if k not in _TRACKING_PARAMS}
+        return urlunparse(p._replace(query=urlencode({k:v[0] for k,v in clean.items()}, doseq=True)))
+    except Exception:
+        return u
+
+def title_key(title: str) -> str:
+    return re.sub(r"[\s\W]+","", (title or "").lower())
+
+def _extract_card_title(card, a):
+    head = card.select_one("div[role='heading']") or card.find("h3")
+    if head:
+        t = clean_text(head.get_text(" "))
+        if t: return t
+    aria = a.get("aria-label")
+    if aria:
+        t = clean_text(aria)
+        if t: return t
+    return clean_text((a.get_text(" ") or "").splitlines()[0])
+
+@timed("parse_google_news_results")
+def parse_google_news_results(search_url, run=None):
+    log(f"[검색] {search_url}")
+    soup, _ = get_soup(search_url, run=run)
+    if not soup:
+        log(" - HTML 파싱 실패", level="warning")
+        return []
+    items = extract_google_news_items(soup)
+    log(f" - HTML 결과 {len(items)}건")
+    return items
+
+def extract_google_news_items(soup):
+    """Google 뉴스 검색 결과 페이지(BeautifulSoup) → [{"title","url"}] (언랩·중복 제거, 네트워크 없음)."""
+    items, seen = [], set()
+    for card in soup.select("div.dbsr"):
+        a = card.find("a")
+        if not a or not a.get("href"): continue
+        raw_title = _extract_card_title(card, a)
+        raw_url = unwrap_google_news_link(a["href"])  # 원문 언랩
+        norm = (normalize_url_for_dedupe(raw_url), title_key(raw_title))
+        if norm in seen: continue
+        seen.add(norm); items.append({"title": raw_title, "url": raw_url})
+    if not items:
+        for a in soup.select("a.WlydOe, a.VDXfz"):
+            link = a.get("href")
+            if not link: continue
+            head = a.select_one("div[role='heading'], h3")
+            raw = head.get_text(" ") if head else a.get_text(" ")
+            title = clean_text((raw or "").splitlines()[0])
+            link = unwrap_google_news_link(link)
+            norm = (normalize_url_for_dedupe(link), title_key(title))
+            if norm in seen: continue
+            seen.add(norm); items.append({"title": title, "url": link})
+    return [it for it in items if it["title"]]
+
+def build_news_rss_url(query):
+    return f"https://news.google.com/rss/search?q={quote_plus(query)}&hl=ko&gl=KR&ceid=KR:ko"
+
+@timed("parse_google_news_results_rss")
+def parse_google_news_results_rss(query, target_date, run=None):
+    """RSS 피드는 날짜와 무관하므로 실행당 검색어마다 한 번만 받고(run.rss), 일자별로는 색인만 찾는다."""
+    feeds = run.rss if run else RssFeedCache(path=None)
+    items = feeds.items(query, target_date, run=run)
+    log(f" - RSS 결과 {len(items)}건({target_date})")
+    return items
+
+def _rss_published_kst(e):
+    """RSS 항목의 발행 시각 → KST datetime 또는 None. feedparser가 UTC로 풀어 둔 값을 먼저 쓴다."""
+    if getattr(e, "published_parsed", None):
+        return datetime.fromtimestamp(calendar.timegm(e.published_parsed), tz=KST)
+    if not getattr(e, "published", ""): return None
+    from dateutil import parser as dateparser
+    try: published = dateparser.parse(e.published)
+    except (ValueError, OverflowError): return None
+    return published.astimezone(KST) if published.tzinfo else published
+
+def index_rss_items(content, undated=None):
+    """
+    Google 뉴스 RSS 본문 → {KST 발행일: [{"title","url"}]} (언랩·피드 전체에서 중복 제거, 네트워크 없음).
+    발행일이 없는 항목은 undated 날짜에 넣고, undated가 None이면 버린다.
+    """
+    import feedparser
+    feed = feedparser.parse(content)
+    by_date, seen = {}, set()
+    for e in feed.entries:
+        # 기사 토큰 링크는 그대로 둔다: 수집할 때 GoogleLinkResolver가 해독/캐시/요청 중 하나로 푼다(적중·해독률 집계)
+        title = clean_text(getattr(e,'title','')); link = getattr(e,'link','')
+        if not google_news_token(link): link = unwrap_google_news_link(link)
+        if not title or not link: continue
+        published = _rss_published_kst(e)
+        d = published.date() if published else undated
+        if d is None: continue
+        norm = (normalize_url_for_dedupe(unwrap_google_news_link(link)), title_key(title))
+        if norm in seen: continue
+        seen.add(norm); by_date.setdefault(d, []).append({"title": title, "url": link})
+    return by_date
+
+def extract_rss_items(content, target_date):
+    """Google 뉴스 RSS 본문 → target_date(KST) 기사 [{"title","url"}] (발행일 없는 항목 포함, 네트워크 없음)."""
+    return index_rss_items(content, undated=target_date).get(target_date, [])
+
+class RssFeedCache:
+    """
+    Google 뉴스 RSS를 실행당 검색어마다 한 번만 받아 KST 발행일별로 색인해 둔다.
+    - 여러 일자가 동시에 찾아도 처음 온 스레드만 받고, 나머지는 그 결과를 기다렸다가 색인만 찾는다
+    - path(디렉터리)가 있으면 본문과 ETag/Last-Modified를 저장해 다음 실행에서 조건부 GET(304면 저장본 사용)
+    - 발행일이 없는 항목은 받은 날(KST)의 기사로 본다
+    """
+    def __init__(self, path=RSS_DIR, ttl_days=CACHE_TTL_DAYS):
+        self.path = path
+        self._lock = threading.Lock()
+        self._feeds = {}  # url → {"lock", "index"}
+        if path: self._evict(ttl_days)
+
+    def items(self, query, target_date, run=None):
+        url = build_news_rss_url(query)
+        with self._lock:
+            feed = self._feeds.setdefault(url, {"lock": threading.Lock(), "index": None})
+        with feed["lock"]:
+            if feed["index"] is None:
+                feed["index"] = self._load(url, run)
+        return list(feed["index"].get(target_date, ()))
+
+    def _files(self, url):
+        stem = os.path.join(self.path, hashlib.sha1(url.encode("utf-8")).hexdigest()[:20])
+        return stem + ".xml", stem + ".json"
+
+    def _stored(self, url):
+        """(저장된 본문, 검증 헤더) 또는 (None, {})."""
+        if not self.path: return None, {}
+        body_path, meta_path = self._files(url)
+        try:
+            with open(meta_path, encoding="utf-8") as f: meta = json.load(f)
+            with open(body_path, "rb") as f: body = f.read()
+        except (OSError, ValueError):
+            return None, {}
+        validators = {}
+        if meta.get("etag"): validators["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"): validators["If-Modified-Since"] = meta["last_modified"]
+        return body, validators
+
+    def _store(self, url, resp):
+        if not self.path: return
+        body_path, meta_path = self._files(url)
+        meta = {"url": url, "etag": resp.headers.get("ETag"), "last_modified": resp.headers.get("Last-Modified"),
+                "fetched_at": time.time()}
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            with open(body_path, "wb") as f: f.write(resp.content)
+            save_text(json.dumps(meta, ensure_ascii=False), meta_path)
+        except OSError as e:
+            log(f"[RSS] 저장 실패: {e}", level="warning")
+
+    def _load(self, url, run):
+        log(f"[RSS] {url}")
+        stored, validators = self._stored(url)
+        metrics = _metrics_of(run) or Metrics()
+        r = http_get(url, run=run, headers=validators or None)
+        if r is None:
+            log(" - RSS 수신 실패", level="warning")
+            return {}
+        if r.status_code == 304 and stored is not None:
+            content = stored
+            metrics.count(rss_not_modified=1)
+            log(" - RSS 변경 없음(304) → 저장본 사용")
+        else:
+            content = r.content
+            metrics.count(rss_fetched=1)
+            self._store(url, r)
+        with metrics.span("index_rss_items"):
+            index = index_rss_items(content, undated=datetime.now(tz=KST).date())
+        log(f" - RSS 전체 {sum(map(len, index.values()))}건 / {len(index)}일치 색인")
+        return index
+
+    def _evict(self, ttl_days):
+        # 검색어(선택 용어)가 바뀌면 옛 피드는 다시 쓰이지 않으므로 오래된 파일은 지운다
+        cutoff = time.time() - ttl_days*86400
+        try: names = os.listdir(self.path)
+        except OSError: return
+        for name in names:
+            p = os.path.join(self.path, name)
+            try:
+                if os.path.getmtime(p) < cutoff: os.remove(p)
+            except OSError: pass
+
+_GNEWS_TARGET_RES = (re.compile(rb'data-n-au="([^"]+)"'), re.compile(rb'<a[^>]+href="(https?://[^"]+)"'))
+
+class GoogleLinkResolver:
+    """
+    Google 뉴스 기사 토큰 링크(news.google.com/rss/articles/…) → 원문 URL. 수집 스레드에서 함께 쓴다.
+    - 토큰에 원문이 들어 있으면 네트워크 없이 해독(decode_google_news_token)
+    - 해독 못 하는 토큰은 path(JSON)에 실행 간 기억해 둔 매핑을 쓰고, 없을 때만 링크를 한 번 요청해
+      리디렉트 끝 주소(또는 Google 중간 페이지의 원문 링크)를 알아내 기억한다. 해독되는 토큰은 저장하지 않는다
+    - decoded/hits/resolved/failed: 이번 실행에서 해독/캐시 적중/요청으로 확인/실패한 링크 수
+    """
+    def __init__(self, path=GNEWS_LINK_FILE, ttl_days=GNEWS_LINK_TTL_DAYS):
+        self.path = path
+        self._lock = threading.Lock()
+        self._links = {}  # 토큰 → [원문 URL, 저장 시각]
+        self._dirty = False
+        self.decoded = self.hits = self.resolved = self.failed = 0
+        if not path: return
+        cutoff = time.time() - ttl_days*86400
+        try:
+            with open(path, encoding="utf-8") as f:
+                self._links = {t: v for t, v in json.load(f).items() if v[1] >= cutoff}
+        except (OSError, ValueError, TypeError, IndexError):
+            pass
+
+    def resolve(self, link, run=None):
+        """원문 URL. 기사 토큰 링크가 아니면 unwrap_google_news_link 결과, 끝내 못 알아내면 None."""
+        token = google_news_token(link)
+        if not token: return unwrap_google_news_link(link)
+        url = decode_google_news_token(token)
+        with self._lock:
+            if url:
+                self.decoded += 1
+                return url
+            hit = self._links.get(token)
+            if hit:
+                self.hits += 1
+                return hit[0]
+        url = self._fetch(link, run)
+        with self._lock:
+            if url:
+                self.resolved += 1
+                self._links[token] = [url, time.time()]; self._dirty = True
+            else:
+                self.failed += 1
+        if not url: log(f"[Google 링크] 원문을 찾지 못함: {link}", level="debug")
+        return url
+
+    def _fetch(self, link, run):
+        from urllib.parse import urljoin
+        r = http_get(urljoin("https://news.google.com/", link), run=run, stream=True)
+        if r is None: return None
+        if not is_google_host(domain_of(r.url)):
+            r.close()  # 원문까지 리디렉트됐으면 본문은 기사 수집 때 받는다
+            return r.url
+        body, _ = read_body(r, run=run)
+        for rx in _GNEWS_TARGET_RES:
+            for m in rx.finditer(body or b""):
+                url = pyhtml.unescape(m.group(1).decode("utf-8", "replace"))
+                if not is_google_host(domain_of(url)): return url
+        return None
+
+    def stats(self):
+        with self._lock:
+            return {"decoded": self.decoded, "hits": self.hits, "resolved": self.resolved, "failed": self.failed}
+
+    def summary(self):
+        st = self.stats(); total = sum(st.values())
+        if not total: return ""
+        pct = lambda n: f"{n*100/total:.0f}%"
+        return (f"[Google 링크] {total}건: 해독 {st['decoded']}({pct(st['decoded'])}) / 캐시 {st['hits']}({pct(st['hits'])})"
+                f" / 요청 {st['resolved']}({pct(st['resolved'])}) / 실패 {st['failed']}")
+
+    def save(self):
+        if not self.path or not self._dirty: return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with self._lock:
+                data = json.dumps(self._links, ensure_ascii=False)
+            save_text(data, self.path)
+            self._dirty = False
+        except OSError as e:
+            log(f"[Google 링크 캐시] 저장 실패: {e}", level="warning")
+
+KR_TLDS = (".kr",)
+KR_DOMAINS = {"naver.com","daum.net","nate.com","chosun.com","hani.co.kr","khan.co.kr","joins.com",
+              "hankookilbo.com","seoul.co.kr","mk.co.kr","yonhapnews.co.kr","yna.co.kr","news1.kr",
+              "newspim.com","nocutnews.co.kr","ohmynews.com","pressian.com","newsis.com","mbc.co.kr",
+              "sbs.co.kr","jtbc.co.kr","kbs.co.kr","edaily.co.kr","etnews.com","zdnet.co.kr","asiatoday.co.kr",
+              "kmib.co.kr","munhwa.com","hankyung.com","isplus.com","busan.com","e2news.com","electimes.com",
+              "energydaily.co.kr","ekn.kr", *PRIORITY_DOMAINS}
+
+# -------------------- 기사 HTML 파싱(문서당 lxml 트리 1개) --------------------
+# 기사 1건은 parse_html로 한 번만 파싱하고, 그 트리를 JSON-LD/기자/날짜/한국어 판정/본문 추출이 함께 쓴다.
+# readability는 트리를 일부 변경(숨김 요소 제거)하므로 extract_main_text가 항상 마지막 소비자여야 한다.
+_NON_TEXT_TAGS = ("script", "style", "template")
+
+@lru_cache(maxsize=None)
+def _text_xpath():
+    from lxml import etree
+    return etree.XPath(".//text()[not(ancestor::script or ancestor::style or ancestor::template)]")
+
+def parse_html(html_text, encoding=None):
+    """
+    기사 HTML → lxml 문서 루트(<html>). 비어 있거나 파싱 불가면 None.
+    bytes + encoding을 받으면 UTF-8은 디코딩 없이 바이트 그대로 lxml에 넘긴다.
+    다른 인코딩은 파이썬에서 디코딩한다(libxml2는 CP949의 잘못된 바이트를 만나면 거기서 파싱을 멈춘다).
+    """
+    import lxml.html
+    from lxml import etree
+    if not html_text: return None
+    if isinstance(html_text, bytes):
+        encoding = encoding or "utf-8"
+        if encoding != "utf-8":
+            html_text = html_text.decode(encoding, errors="replace")
+        else:
+            try: return lxml.html.document_fromstring(html_text, parser=lxml.html.HTMLParser(encoding="utf-8"))
+            except etree.ParserError: return None
+    try:
+        return lxml.html.document_fromstring(html_text)
+    except ValueError:
+        # <?xml encoding=...?> 선언이 붙은 XHTML 문자열은 바이트로 넘겨야 한다
+        return lxml.html.document_fromstring(html_text.encode("utf-8"), parser=lxml.html.HTMLParser(encoding="utf-8"))
+    except etree.ParserError:
+        return None
+
+def node_texts(el):
+    """el 아래 텍스트 노드들(script/style/template·주석 제외, bs4 get_text와 같은 규칙)."""
+    if el is None or el.tag in _NON_TEXT_TAGS: return []
+    return _text_xpath()(el)
+
+def node_text(el, sep=" "):
+    return sep.join(node_texts(el))
+
+def meta_content(doc, attr, value):
+    """<meta attr=value content=…> 중 첫 번째의 content (없으면 None)."""
+    tag = doc.find(f".//meta[@{attr}='{value}']")
+    return tag.get("content") if tag is not None else None
+
+_HANGUL_RE = re.compile(r"[가-힣]")
+_LETTER_RE = re.compile(r"[A-Za-z가-힣]")
+
+def _iter_text_nodes(el):
+    """node_texts의 지연 버전(표본 추출용): 필요한 만큼만 텍스트 노드를 꺼낸다."""
+    for node in el.iter():
+        if isinstance(node.tag, str) and node.tag not in _NON_TEXT_TAGS and node.text: yield node.text
+        if node is not el and node.tail: yield node.tail
+
+def looks_korean_by_meta_and_text(doc, sample_chars=KO_SAMPLE_CHARS):
+    lang = doc.get("lang") or doc.get("xml:lang")
+    if lang and lang.lower().startswith("ko"): return True
+    og = meta_content(doc, "property", "og:locale")
+    if og and og.lower().startswith("ko"): return True
+    # 앞에서부터 sample_chars 글자까지만 세되, 남은 표본을 전부 어느 쪽으로 채워도
+    # 결론이 바뀌지 않는 순간(= 표본 전체로 판정한 것과 같은 결과) 바로 멈춘다.
+    hangul = letters = 0
+    remaining = sample_chars
+    for t in _iter_text_nodes(doc):
+        t = t[:remaining]; remaining -= len(t)
+        hangul += len(_HANGUL_RE.findall(t)); letters += len(_LETTER_RE.findall(t))
+        if hangul >= KO_MIN_HANGUL and hangul >= KO_MIN_RATIO*(letters + remaining): return True
+        if hangul + remaining < KO_MIN_HANGUL or hangul + remaining < KO_MIN_RATIO*(letters + remaining): return False
+        if remaining <= 0: break
+    return bool(hangul >= KO_MIN_HANGUL and letters and (hangul/letters) >= KO_MIN_RATIO)
+
+class HostLangCache:
+    """
+    호스트별 한국어 판정 누적(JSON 파일로 실행 간 유지).
+    같은 판정이 KO_HOST_MIN_VOTES번 쌓이고 반대 판정이 한 번도 없으면 그 호스트는 확정으로 보고
+    이후 기사는 내용을 보지 않고 바로 판정한다.
+    """
+    def __init__(self, path=HOST_LANG_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._votes = {}  # host → [한국어, 비한국어]
+        self.skipped = 0
+        if not path: return  # path=None: 이번 실행 안에서만 쓰는 메모리 캐시
+        try:
+            with open(path, encoding="utf-8") as f:
+                self._votes = {h: list(v) for h, v in json.load(f).items()}
+        except (OSError, ValueError):
+            pass
+
+    def known(self, host):
+        """확정된 호스트면 True/False, 아니면 None."""
+        with self._lock:
+            ko, other = self._votes.get(host, (0, 0))
+            verdict = None
+            if ko >= KO_HOST_MIN_VOTES and not other: verdict = True
+            elif other >= KO_HOST_MIN_VOTES and not ko: verdict = False
+            if verdict is not None: self.skipped += 1  # 내용 검사를 건너뛴 기사 수(수집 스레드들이 함께 센다)
+        return verdict
+
+    def record(self, host, is_ko):
+        with self._lock:
+            v = self._votes.setdefault(host, [0, 0])
+            v[0 if is_ko else 1] += 1
+
+    def save(self):
+        if not self.path: return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with self._lock:
+                data = json.dumps(self._votes, ensure_ascii=False)
+            with open(self.path, "w", encoding="utf-8") as f:
+                f.write(data)
+        except OSError as e:
+            log(f"[한국어 판정 캐시] 저장 실패: {e}", level="warning")
+
+def known_korean_host(final_url, host_lang=None):
+    """주소(국내 TLD/도메인)나 호스트 판정 누적만으로 정해지는 한국어 여부. 본문을 봐야 하면 None."""
+    host = domain_of(final_url)
+    if host.endswith(KR_TLDS) or host_matches_suffix(host, KR_DOMAINS): return True
+    if host_lang is None: return None
+    return host_lang.known(host)
+
+def is_priority_host(final_url): return host_matches_suffix(domain_of(final_url), PRIORITY_DOMAINS)
+
+def pick_meaningful_sentence(text: str) -> str:
+    text = clean_text(text); 
+    if not text: return ""
+    parts = re.split(SENT_SPLIT_RE, text)
+    for p in parts:
+        s = clean_text(p)
+        if not s: continue
+        if any(n in s for n in ("무단전재","재배포","저작권","사진","기자","연합뉴스")) and len(s) < 30: continue
+        if len(re.sub(r"[^가-힣A-Za-z0-9]","",s)) < 4: continue
+        return s
+    return clean_text(parts[0]) if parts else ""
+
+def concise_summary_from_text(text: str) -> str:
+    s = pick_meaningful_sentence(text)
+    return s if len(s) <= 30 else s[:30].rstrip()+"…"
+
+_MAIN_TEXT_SELECTORS = [
+    "article","div[itemprop='articleBody']", ".article-body",".news_end",".article",
+    "#newsct_article",".newsct_article",".art_txt",".article_view","#articleBodyContents",
+    "#articeBody","#articleBody","#newsEndContents"]
+
+@lru_cache(maxsize=None)
+def _main_text_selectors():
+    from lxml.cssselect import CSSSelector
+    return [CSSSelector(sel) for sel in _MAIN_TEXT_SELECTORS]
+
+def extract_main_text(doc):
+    from readability import Document
+    # readability에 같은 트리를 넘기고, 결과 노드(rd.html)에서 바로 텍스트를 읽어 재파싱을 피한다
+    try:
+        rd = Document(doc); rd.summary()
+        main_text = clean_text(node_text(rd.html))
+        if len(main_text) >= 60: return main_text
+    except Exception: pass
+    for sel in _main_text_selectors():
+        found = sel(doc)
+        if found:
+            txt = clean_text(node_text(found[0]))
+            if len(txt) >= 60: return txt
+    return clean_text(node_text(doc))
+
+def extract_summary(doc, title_fallback="", main=None):
+    main = extract_main_text(doc) if main is None else main
+    if main:
+        s = concise_summary_from_text(main)
+        if s: return s
+    og = meta_content(doc, "property", "og:description")
+    if og:
+        s = concise_summary_from_text(og)
+        if s: return s
+    md = meta_content(doc, "name", "description")
+    if md:
+        s = concise_summary_from_text(md)
+        if s: return s
+    tf = title_fallback or ""
+    return tf[:30] + ("…" if len(tf) > 30 else "")
+
+_TITLES_RE = re.compile(r"(기자|특파원|논설위원|평론가|칼럼니스트|사진기자|에디터|부장|팀장|국장)")
+_KO_NAME_RE = re.compile(r"([가-힣]{2,4})")
+_EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+
+def _strip_noise(txt):
+    if not txt: return ""
+    txt = _EMAIL_RE.sub("", txt)
+    txt = re.sub(r"\(.*?\)|\[.*?\]|<.*?>"," ", txt)
+    txt = re.sub(r"[-–—•·▶◇]|By|by|기자명?:?"," ", txt, flags=re.I)
+    return clean_text(txt)
+
+def extract_json_ld(doc):
+    out=[]
+    for tag in doc.iterfind(".//script[@type='application/ld+json']"):
+        try:
+            block=json.loads(tag.text or "")
+            out.extend(block if isinstance(block,list) else [block])
+        except Exception: pass
+    return out
+
+def extract_authors_from_jsonld(jsonld):
+    names=[]
+    for b in (jsonld if isinstance(jsonld,list) else [jsonld]):
+        for key in ("author","creator"):
+            author=b.get(key); 
+            if not author: continue
+            vals = author if isinstance(author,list) else [author]
+            for a in vals:
+                if isinstance(a,dict) and a.get("name"): names.append(a["name"])
+                elif isinstance(a,str): names.append(a)
+    names=[_strip_noise(n) for n in names if n]
+    return [n for n in names if n]
+
+# 기자 후보 규칙. 나열 순서가 곧 후보 순서(동점일 때 우선순위)이므로 순서를 바꾸지 않는다.
+# 단순 CSS 부분집합(태그 .클래스 #id [속성='값'] [속성*=값], 자손 결합 1단계)만 쓰며
+# _compile_author_rules가 import 시 한 번 컴파일해 문서를 1회 순회하며 모든 규칙을 평가한다.
+_AUTHOR_META = [('name','author'),('property','article:author'),('name','parsely-author'),('name','byl')]
+_AUTHOR_SELECTORS = [
+    "a[rel='author']","[itemprop='author']","[itemprop='author'] [itemprop='name']",
+    "address.byline","p.byline","span.byline","div.byline",
+    "span[class*=author]","div[class*=author]","p[class*=author]",
+    "span[class*=writer]","div[class*=writer]","p[class*=writer]",
+    "span[class*=reporter]","div[class*=reporter]","p[class*=reporter]",
+    "span[class*=journalist]","div[class*=journalist]","p[class*=journalist]",
+    "span.article_writer","div.article_writer","em.article_writer",
+    ".info_view .writer",".press_writer","#news_writer","#author",
+    "strong.name","span.name",
+]
+_AUTHOR_ATTR_NAMES = ("author", "writer", "reporter")  # 속성 이름에 이 단어가 들어가면 값 자체가 후보
+_COMPOUND_RE = re.compile(r"(?P<tag>^[a-z]+)|\.(?P<cls>[\w-]+)|#(?P<id>[\w-]+)|\[(?P<attr>[\w-]+)(?P<op>\*?=)'?(?P<val>[^'\]]+)'?\]")
+
+def _compile_compound(text):
+    c = {"tag": None, "classes": frozenset(), "id": None, "eq": {}, "sub": {}}
+    pos = 0
+    for m in _COMPOUND_RE.finditer(text):
+        if m.start() != pos: break
+        pos = m.end()
+        if m["tag"]: c["tag"] = m["tag"]
+        elif m["cls"]: c["classes"] |= {m["cls"]}
+        elif m["id"]: c["id"] = m["id"]
+        elif m["op"] == "=": c["eq"][m["attr"]] = m["val"]
+        else: c["sub"][m["attr"]] = m["val"]
+    if pos != len(text): raise ValueError(f"지원하지 않는 선택자: {text}")
+    return c
+
+def _compound_ok(el, c):
+    if c["tag"] and el.tag != c["tag"]: return False
+    if c["id"] and el.get("id") != c["id"]: return False
+    if c["classes"] and not c["classes"] <= set((el.get("class") or "").split()): return False
+    for a, v in c["eq"].items():
+        if el.get(a) != v: return False
+    for a, v in c["sub"].items():
+        if v not in (el.get(a) or ""): return False
+    return True
+
+def _compile_author_rules(selectors, first_index):
+    """
+    선택자 → (규칙 번호, 조상 조건, 대상 조건). 각 규칙은 가장 좁은 키 하나로 색인해
+    요소마다 해당할 수 있는 규칙만 꺼내 검사한다.
+    - exact: ("id", v) / ("cls", 토큰) / ("eq", 속성, 값) → 규칙 목록
+    - substr: (속성, 부분문자열) → 규칙 목록
+    """
+    exact, substr = {}, {}
+    for i, sel in enumerate(selectors, start=first_index):
+        parts = sel.split()
+        anc = _compile_compound(parts[0]) if len(parts) == 2 else None
+        c = _compile_compound(parts[-1])
+        rule = (i, anc, c)
+        if c["id"]: exact.setdefault(("id", c["id"]), []).append(rule)
+        elif c["classes"]: exact.setdefault(("cls", min(c["classes"])), []).append(rule)
+        elif c["eq"]: exact.setdefault(("eq", *next(iter(c["eq"].items()))), []).append(rule)
+        else: substr.setdefault(next(iter(c["sub"].items())), []).append(rule)
+    return exact, substr
+
+_AUTHOR_EXACT, _AUTHOR_SUBSTR = _compile_author_rules(_AUTHOR_SELECTORS, len(_AUTHOR_META))
+_AUTHOR_EQ_ATTRS = frozenset(k[1] for k in _AUTHOR_EXACT if k[0] == "eq")
+_AUTHOR_SUBSTR_BY_ATTR = {}  # 속성 → [(부분문자열, 규칙 목록)]
+for (_a, _needle), _rules in _AUTHOR_SUBSTR.items():
+    _AUTHOR_SUBSTR_BY_ATTR.setdefault(_a, []).append((_needle, _rules))
+_AUTHOR_ATTR_RE = re.compile("|".join(_AUTHOR_ATTR_NAMES))
+_AUTHOR_ATTR_RULE = len(_AUTHOR_META) + len(_AUTHOR_SELECTORS)
+
+def _author_candidates(doc):
+    """
+    문서를 한 번 순회하며 meta/선택자/속성 이름 규칙을 모두 평가해 기자 후보 원문을 모은다.
+    결과 순서는 (규칙 번호, 문서 순서, 속성 순서) — 규칙별로 문서를 훑던 이전 방식과 같다.
+    """
+    from lxml import etree
+    hits = []
+    meta_done = set()
+    exact = _AUTHOR_EXACT
+    for order, el in enumerate(doc.iter(etree.Element)):
+        attrib = el.attrib
+        if not attrib: continue
+        if el.tag == "meta":
+            for i, (a, v) in enumerate(_AUTHOR_META):
+                if i not in meta_done and attrib.get(a) == v:
+                    meta_done.add(i)  # 규칙마다 첫 meta만 본다(content가 비어도)
+                    if attrib.get("content"): hits.append((i, order, 0, attrib.get("content")))
+        rules = []
+        for k, (a, v) in enumerate(attrib.items()):
+            if a in _AUTHOR_EQ_ATTRS: rules += exact.get(("eq", a, v), ())
+            if len(v) <= 40 and _AUTHOR_ATTR_RE.search(a): hits.append((_AUTHOR_ATTR_RULE, order, k, v))
+            if a == "id": rules += exact.get(("id", v), ())
+            elif a == "class":
+                for tok in set(v.split()): rules += exact.get(("cls", tok), ())
+            for needle, rs in _AUTHOR_SUBSTR_BY_ATTR.get(a, ()):
+                if needle in v: rules += rs
+        if not rules: continue
+        text = None
+        for i, anc, c in rules:
+            if not _compound_ok(el, c): continue
+            if anc and not any(_compound_ok(p, anc) for p in el.iterancestors()): continue
+            if text is None: text = clean_text(node_text(el))
+            if text: hits.append((i, order, 0, text))
+    hits.sort(key=lambda h: h[:3])
+    return [h[3] for h in hits]
+
+def extract_author_meta_and_dom(doc):
+    cands = _author_candidates(doc)
+    cleaned=[]
+    for c in cands:
+        c=_strip_noise(c)
+        for p in re.split(r"[,/;•·]| 그리고 | 및 | and ", c):
+            p = clean_text(p)
+            if not p: continue
+            m=_KO_NAME_RE.search(p)
+            if not m: continue
+            name=m.group(1); t=_TITLES_RE.search(p)
+            cleaned.append(f"{name} {t.group(1)}" if t else name)
+    uniq=list(dict.fromkeys(cleaned))
+    uniq.sort(key=lambda s:(bool(_TITLES_RE.search(s)),-len(s)), reverse=True)
+    return uniq[:2]
+
+def try_parse_date(text):
+    from dateutil import parser as dateparser
+    try: return dateparser.parse(text)
+    except: return None
+
+def map_publisher_name(host):
+    host=host.lower()
+    for key,name in PUB_NAME_MAP.items():
+        if host==key or host.endswith("."+key) or host.endswith(key): return name
+    parts=host.split(".")
+    return ".".join(parts[-2:]) if len(parts)>=2 else host
+
+def normalize_author_with_title(author: str) -> str:
+    s=clean_text(author)
+    m=re.search(r"([가-힣]{2,4})\s*(기자|특파원|논설위원|평론가|칼럼니스트|사진기자|에디터|부장|팀장|국장)?", s)
+    if m:
+        name=m.group(1); title=m.group(2)
+        return f"{name} {title}" if title else f"{name} 기자"
+    return s if s.endswith("기자") else (s+" 기자" if s else "")
+
+def build_reporter_cell(host, authors):
+    pub = map_publisher_name(host.replace("www.",""))
+    if authors:
+        return f"{pub} {normalize_author_with_title(authors[0])}"
+    return pub
+
+def wednesday_based_week_info(d: date):
+    delta=(d.weekday()-2)%7
+    anchor=d - timedelta(days=delta)
+    y,m=anchor.year, anchor.month
+    first=date(y,m,1)
+    days_to_wed=(2-first.weekday())%7
+    first_wed=first + timedelta(days=days_to_wed)
+    week_no=1 + (anchor-first_wed).days//7
+    return y,m,week_no
+
+def week_sheet_name_wed_kst(now_dt):
+    d=now_dt.date()
+    y,m,w=wednesday_based_week_info(d)
+    return f"{str(y)[-2:]}.{m:02d}.{w}주차"
+
+_CUSTOM_WEIGHT_RE = re.compile(r"^(.+?)\s*:\s*(\d+)$")
+
+def custom_term_weights(custom_terms, default=CUSTOM_TERM_WEIGHT):
+    """사용자 키워드 목록 → {용어: 가중치}. "한전:2"처럼 쓰면 그 용어만 가중치를 따로 준다."""
+    out = {}
+    for t in custom_terms or []:
+        m = _CUSTOM_WEIGHT_RE.match(t.strip())
+        term, w = (m.group(1).strip(), int(m.group(2))) if m else (t.strip(), default)
+        if term: out[term] = w
+    return out
+
+def build_automaton(patterns):
+    """Aho-Corasick 오토마톤(goto, fail, out). out[상태]는 그 상태에서 끝나는 패턴 집합(실패 링크 쪽 포함)."""
+    goto, fail, out = [{}], [0], [set()]
+    for pat in patterns:
+        s = 0
+        for ch in pat:
+            if ch not in goto[s]:
+                goto.append({}); fail.append(0); out.append(set()); goto[s][ch] = len(goto) - 1
+            s = goto[s][ch]
+        out[s].add(pat)
+    queue = list(goto[0].values())   # 너비 우선: 얕은 상태의 실패 링크가 먼저 정해진다
+    for s in queue:
+        for ch, n in goto[s].items():
+            queue.append(n)
+            f = fail[s]
+            while f and ch not in goto[f]: f = fail[f]
+            fail[n] = goto[f].get(ch, 0) if s else 0
+            out[n] |= out[fail[n]]
+    return goto, fail, out
+
+def automaton_find(automaton, text):
+    """text 안에 들어 있는 패턴 집합(한 번 훑기)."""
+    goto, fail, out = automaton
+    s, found = 0, set()
+    for ch in text:
+        while s and ch not in goto[s]: s = fail[s]
+        s = goto[s].get(ch, 0)
+        if out[s]: found |= out[s]
+    return found
+
+class TermMatcher:
+    """
+    우선 키워드 가중치·사용자 키워드·제외어를 실행마다 한 번 묶어 둔 매처(RunContext.terms).
+    scan()은 넘긴 텍스트들을 한 번만 소문자로 바꿔 (점수, 들어 있는 키워드, 제외어 포함 여부)를 돌려준다.
+    - 대소문자만 다른 용어는 하나로 합치고 가중치는 더한다(idrs·iDRS가 각 3점이라 기존처럼 둘 다 잡혀 6점)
+    - 제외어도 대소문자를 가리지 않는다
+    - 용어+제외어가 TERM_AUTOMATON_MIN개 이상이면(automaton=None일 때) Aho-Corasick으로 한 번 훑고,
+      그보다 적으면 용어마다 C 수준 부분 문자열 검색을 한다. 파이썬으로 도는 오토마톤은 글자당 비용이 커서
+      용어가 적을 때는 더 느리다(benchmarks/bench_scaper.py terms)
+    """
+    def __init__(self, weights=PRIORITY_TERMS_WEIGHTS, custom=None, exclude=EXCLUDE_TERMS, automaton=None):
+        self.custom = dict(custom or {})
+        self.weights = {}
+        for term, w in [*weights.items(), *self.custom.items()]:
+            self.weights[term.lower()] = self.weights.get(term.lower(), 0) + w
+        self.total = sum(self.weights.values())
+        self.exclude = tuple(dict.fromkeys(t.lower() for t in exclude))
+        patterns = [*self.weights, *self.exclude]
+        if automaton is None: automaton = len(patterns) >= TERM_AUTOMATON_MIN
+        self._automaton = build_automaton(patterns) if automaton else None
+
+    def _haystack(self, texts):
+        # 오토마톤이면 찾은 패턴 집합, 아니면 소문자 텍스트 자체. 어느 쪽이든 `용어 in` 으로 묻는다
+        blob = " ".join(t or "" for t in texts).lower()
+        return automaton_find(self._automaton, blob) if self._automaton else blob
+
+    def scan(self, *texts):
+        hay = self._haystack(texts)
+        matched = [t for t in self.weights if t in hay]
+        return sum(self.weights[t] for t in matched), matched, any(x in hay for x in self.exclude)
+
+    def score(self, *texts):
+        hay = self._haystack(texts)
+        return sum(w for t, w in self.weights.items() if t in hay)
+
+    def excluded(self, *texts):
+        hay = self._haystack(texts)
+        return any(x in hay for x in self.exclude)
+
+@lru_cache(maxsize=1)
+def default_term_matcher():
+    return TermMatcher()
+
+def contains_excluded(text:str)->bool:
+    return bool(text) and default_term_matcher().excluded(str(text))
+
+def has_priority_term(title:str, summary:str, url:str)->int:
+    return default_term_matcher().score(title, summary, url)
+
+@timed("download_article")
+def download_article(url:str, run=None, validators=None)->dict:
+    """
+    기사 1건을 받아 {final_url, html(바이트), encoding, etag, last_modified}로 돌려준다(파싱은 parse_article).
+    304면 not_modified=True, 실패/HTML 아님이면 html이 비어 있다.
+    """
+    # ★ 원문으로 언랩
+    try: url = unwrap_google_news_link(url)
+    except: pass
+    # validators: 캐시 재검증용 If-None-Match / If-Modified-Since 헤더
+    # 본문은 스트리밍으로 받아 HTML이 아니면 헤더만 보고 끊고, FETCH_MAX_BYTES 이후는 읽지 않는다
+    resp = http_get(url, allow_redirects=True, run=run, headers=validators, stream=True)
+    if resp is not None and resp.status_code == 304:
+        resp.close()
+        return {"final_url": url, "html": b"", "not_modified": True}
+    final_url = resp.url if resp is not None else url
+    body, encoding = b"", "utf-8"
+    if resp is not None and not is_html_response(resp):
+        resp.close()
+        if run: run.count(rejected=1, rejected_saved=_content_length(resp) or 0)
+        log(f" - HTML 아님({resp.headers.get('Content-Type')}) → 건너뜀: {final_url}", level="debug")
+        resp = None
+    elif resp is not None:
+        body, _ = read_body(resp, run.max_bytes if run else FETCH_MAX_BYTES, run=run)
+        if body is None: resp, body = None, b""
+        else:
+            host = domain_of(final_url)
+            encoding, source = sniff_charset(body, resp.headers.get("Content-Type"), run.host_enc.get(host) if run else None)
+            if run:
+                run.host_enc[host] = encoding; run.count(**{f"charset_{source}": 1})
+    if resp is None or not body:
+        return {"final_url": final_url, "html": b""}
+    return {"final_url": final_url, "html": body, "encoding": encoding,
+            "etag": resp.headers.get("ETag"), "last_modified": resp.headers.get("Last-Modified")}
+
+def parse_article(body, encoding, final_url, title_fallback="", lang=None):
+    """
+    받은 기사 바이트 → (추출 결과 dict 또는 None, 단계별 소요 시간 {단계: [초]}).
+    프로세스 풀에서 돌 수 있게 인자와 결과는 작은 값만 주고받는다(lxml 트리는 이 함수 밖으로 나가지 않는다).
+    lang: known_korean_host로 이미 정해진 한국어 여부. None이면 본문으로 판정한다.
+    결과: {final_url, authors, published, summary, is_korean, simhash, text}
+    """
+    m = Metrics()
+    with m.span("parse_html"):
+        doc = parse_html(body, encoding)  # 이 기사의 유일한 파싱(바이트 그대로)
+    if doc is None: return None, m.stages
+    with m.span("extract_authors"):
+        authors, published = extract_authors_and_published(doc)
+    if lang is None:
+        with m.span("is_korean_source"):
+            lang = looks_korean_by_meta_and_text(doc)
+    with m.span("extract_main_text"):
+        main = extract_main_text(doc) if lang else ""  # 트리 변경 → 마지막
+    with m.span("extract_summary"):
+        summary = extract_summary(doc, title_fallback=title_fallback, main=main) if lang else ""
+    return {"final_url": final_url, "authors": authors, "published": published, "summary": summary,
+            "is_korean": lang, "simhash": simhash(main), "text": main[:SEARCH_TEXT_CHARS]}, m.stages
+
+def extract_authors_and_published(doc):
+    """JSON-LD → meta/DOM 순으로 기자명 목록과 발행 시각을 뽑는다."""
+    authors=[]
+    try:
+        jsonlds = extract_json_ld(doc)
+        authors = extract_authors_from_jsonld(jsonlds)
+    except: pass
+    if not authors: authors = extract_author_meta_and_dom(doc)
+
+    published=None
+    try:
+        for b in (jsonlds if isinstance(jsonlds,list) else []):
+            for key in ("datePublished","dateCreated","uploadDate"):
+                if isinstance(b,dict) and b.get(key):
+                    dt = try_parse_date(b.get(key))
+                    if dt: published = dt; break
+            if published: break
+    except: pass
+    if not published:
+        meta = doc.find(".//meta[@property='article:published_time']")
+        if meta is None: meta = doc.find(".//meta[@name='pubdate']")
+        if meta is not None and meta.get("content"): published = try_parse_date(meta.get("content"))
+    if not published:
+        ttag = doc.find(".//time")
+        if ttag is not None and ttag.get("datetime"): published = try_parse_date(ttag.get("datetime"))
+
+    return authors, published
+
+# -------------------- 기사 캐시 --------------------
+class ArticleCache:
+    """
+    기사 HTML(zlib 압축)과 추출 결과를 SQLite에 보관하는 디스크 캐시.
+    - 키: normalize_url_for_dedupe(final_url). 요청 URL → 키는 aliases 테이블로 연결
+    - CACHE_FRESH_HOURS 이내면 그대로 사용, 지나면 ETag/Last-Modified 조건부 GET으로 재검증
+    - CACHE_TTL_DAYS 지난 항목 삭제, 전체 크기가 CACHE_MAX_MB를 넘으면 LRU 삭제
+    여러 수집 스레드가 공유하므로 연결 하나를 잠금으로 보호한다.
+    """
+    def __init__(self, path=CACHE_DB, fresh_hours=CACHE_FRESH_HOURS, ttl_days=CACHE_TTL_DAYS, max_mb=CACHE_MAX_MB):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.fresh_secs = fresh_hours*3600; self.ttl_secs = ttl_days*86400; self.max_bytes = int(max_mb*1024*1024)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS articles (
+                key TEXT PRIMARY KEY, final_url TEXT, html BLOB, etag TEXT, last_modified TEXT,
+                fields TEXT, fetched_at REAL, accessed_at REAL, size INTEGER, encoding TEXT);
+            CREATE INDEX IF NOT EXISTS articles_accessed ON articles(accessed_at);
+            CREATE TABLE IF NOT EXISTS aliases (url_key TEXT PRIMARY KEY, key TEXT);
+        """)
+        # 원문을 받은 바이트 그대로 보관하면서 추가된 열(이전 캐시는 UTF-8 문자열만 들어 있다)
+        if "encoding" not in {r[1] for r in self._db.execute("PRAGMA table_info(articles)")}:
+            self._db.execute("ALTER TABLE articles ADD COLUMN encoding TEXT")
+        self.hits = self.revalidated = self.misses = 0  # 수집 스레드들이 tally로 더한다
+        self.evict()
+
+    def tally(self, hits=0, revalidated=0, misses=0):
+        with self._lock:
+            self.hits += hits; self.revalidated += revalidated; self.misses += misses
+
+    def _key_for(self, url):
+        k = normalize_url_for_dedupe(url)
+        row = self._db.execute("SELECT key FROM aliases WHERE url_key=?", (k,)).fetchone()
+        return row[0] if row else k
+
+    def get(self, url):
+        """캐시 항목 dict(key, final_url, record, fresh, validators) 또는 None."""
+        with self._lock:
+            key = self._key_for(url)
+            row = self._db.execute("SELECT final_url, etag, last_modified, fields, fetched_at FROM articles WHERE key=?", (key,)).fetchone()
+            if not row: return None
+            self._db.execute("UPDATE articles SET accessed_at=? WHERE key=?", (time.time(), key)); self._db.commit()
+        final_url, etag, last_modified, fields, fetched_at = row
+        validators = {}
+        if etag: validators["If-None-Match"] = etag
+        if last_modified: validators["If-Modified-Since"] = last_modified
+        return {"key": key, "final_url": final_url, "record": _record_from_json(fields),
+                "fresh": (time.time() - fetched_at) < self.fresh_secs, "validators": validators}
+
+    def touch(self, key):
+        """304 재검증 성공: 받은 시각을 갱신해 다시 신선한 항목으로 만든다."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("UPDATE articles SET fetched_at=?, accessed_at=? WHERE key=?", (now, now, key)); self._db.commit()
+
+    def put(self, url, record, html=b"", etag=None, last_modified=None, encoding="utf-8"):
+        """html은 받은 바이트 그대로(encoding과 함께) 또는 문자열."""
+        key = normalize_url_for_dedupe(record["final_url"])
+        if isinstance(html, str): html, encoding = html.encode("utf-8"), "utf-8"
+        blob = zlib.compress(html or b"", 6)
+        fields = _record_to_json(record)
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO articles (key, final_url, html, etag, last_modified, fields, fetched_at, "
+                             "accessed_at, size, encoding) VALUES (?,?,?,?,?,?,?,?,?,?)",
+                             (key, record["final_url"], blob, etag, last_modified, fields, now, now, len(blob)+len(fields), encoding))
+            url_key = normalize_url_for_dedupe(url)
+            if url_key != key:
+                self._db.execute("INSERT OR REPLACE INTO aliases VALUES (?,?)", (url_key, key))
+            self._db.commit()
+
+    def html(self, url):
+        """저장된 원문 HTML(압축 해제) 또는 ""."""
+        with self._lock:
+            row = self._db.execute("SELECT html, encoding FROM articles WHERE key=?", (self._key_for(url),)).fetchone()
+        return zlib.decompress(row[0]).decode(row[1] or "utf-8", errors="replace") if row and row[0] else ""
+
+    def evict(self):
+        with self._lock:
+            self._db.execute("DELETE FROM articles WHERE fetched_at < ?", (time.time() - self.ttl_secs,))
+            total = self._db.execute("SELECT COALESCE(SUM(size),0) FROM articles").fetchone()[0]
+            if total > self.max_bytes:
+                # 가장 오래 안 쓴 것부터 지워 상한의 90%까지 줄인다
+                target = total - int(self.max_bytes*0.9); freed = 0; doomed = []
+                for key, size in self._db.execute("SELECT key, size FROM articles ORDER BY accessed_at"):
+                    if freed >= target: break
+                    doomed.append((key,)); freed += size
+                self._db.executemany("DELETE FROM articles WHERE key=?", doomed)
+            self._db.execute("DELETE FROM aliases WHERE key NOT IN (SELECT key FROM articles)")
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+def _record_to_json(rec):
+    pub = rec.get("published")
+    return json.dumps({**rec, "published": pub.isoformat() if pub else None}, ensure_ascii=False)
+
+def _record_from_json(txt):
+    rec = json.loads(txt)
+    if rec.get("published"):
+        try: rec["published"] = datetime.fromisoformat(rec["published"])
+        except ValueError: rec["published"] = None
+    return rec
+
+def fetch_article_record(url, title_fallback="", run=None):
+    """
+    기사 1건의 추출 결과 {final_url, authors, published, summary, is_korean, simhash, text(본문 앞부분)}를 캐시 우선으로 돌려준다.
+    신선한 캐시는 네트워크 없이, 오래된 캐시는 조건부 GET(304면 재사용)으로 처리. 수집 실패 시 None.
+    """
+    cache = run.cache if run else None
+    url = run.links.resolve(url, run) if run else unwrap_google_news_link(url)
+    if url is None: return None  # 원문을 알 수 없는 Google 뉴스 링크
+    hit = cache.get(url) if cache else None
+    if hit and hit["fresh"]:
+        cache.tally(hits=1)
+        return hit["record"]
+    got = download_article(hit["final_url"] if hit else url, run=run, validators=hit["validators"] if hit else None)
+    if got.get("not_modified"):
+        cache.tally(revalidated=1); cache.touch(hit["key"])
+        return hit["record"]
+    host_lang = run.host_lang if run else None
+    lang = known_korean_host(got["final_url"], host_lang)
+    rec = None
+    if got["html"]:
+        args = (got["html"], got["encoding"], got["final_url"], title_fallback, lang)
+        rec = run.parse(*args) if run else parse_article(*args)[0]
+    if rec is None:
+        return hit["record"] if hit else None  # 네트워크/파싱 실패 시 오래된 캐시라도 사용
+    if lang is None and host_lang is not None:
+        host_lang.record(domain_of(rec["final_url"]), rec["is_korean"])
+    if cache:
+        cache.tally(misses=1)
+        cache.put(url, rec, got["html"], got.get("etag"), got.get("last_modified"), got["encoding"])
+    return rec
+
+# -------------------- 중복 제거 --------------------
+def simhash(text):
+    """본문 앞 SIMHASH_CHARS자의 단어 2-gram으로 만든 64비트 SimHash. 너무 짧으면 None."""
+    words = re.findall(r"\w+", (text or "")[:SIMHASH_CHARS].lower())
+    if len(words) < 8: return None
+    v = [0]*64
+    for feat, w in Counter(zip(words, words[1:])).items():
+        h = int.from_bytes(hashlib.blake2b(" ".join(feat).encode("utf-8"), digest_size=8).digest(), "big")
+        for i in range(64):
+            v[i] += w if h >> i & 1 else -w
+    return sum(1 << i for i in range(64) if v[i] > 0)
+
+def _dedupe_keys(url, title):
+    u = normalize_url_for_dedupe(unwrap_google_news_link(url or ""))
+    t = title_key(title)
+    return u, (t if len(t) >= 8 else "")  # 짧은 제목([포토] 등)은 우연히 겹치기 쉬워 쓰지 않는다
+
+class DedupeIndex:
+    """
+    실행 전체(선택적으로 실행 간)에서 같은 기사를 한 번만 쓰게 하는 색인. 파이프라인 스레드에서만 쓴다.
+    - 수집 전: 후보를 (일자, 순위)로 등록해 두고(register), 정규화 URL·제목 키가 겹치는 후보끼리는 앞선 쪽만 받는다(claim).
+      앞선 쪽이 결과 없이 끝나거나(수집 실패/비한국어/제외) 받지 않은 채 그 일자가 확정되면 키를 놓아(release)
+      기다리던 다음 후보가 받는다. 앞선 쪽이 받아들여지면 나머지는 중복. 검색이 끝나는 순서와 무관하게 같은 결과가 된다
+    - 수집 후: 최종 URL이 같거나 본문 SimHash가 SIMHASH_MAX_DIST 이내면 근접 중복(admit).
+      우선 점수가 더 높은 쪽(같으면 (일자, 순위)가 앞선 쪽)만 남기고, 밀려난 쪽이 아직 확정 전 일자에 있으면 그 일자에서 빼게 돌려준다
+    - path가 있으면 확정된 기사를 DEDUPE_TTL_DAYS 동안 기억해 다음 실행에서도 다시 뽑지 않는다
+    """
+    def __init__(self, path=None, max_dist=SIMHASH_MAX_DIST, ttl_days=DEDUPE_TTL_DAYS):
+        self.path, self.max_dist, self.ttl_secs = path, max_dist, ttl_days*86400
+        self.seen = set()       # 지난 실행에서 뽑힌 기사의 키
+        self.regs = {}          # 키 → 아직 결과 전인 후보 {(일자, 순위)}
+        self.keys_of = {}       # (일자, 순위) → 키 목록
+        self.won = set()        # 받아들여진 후보의 키(이후 같은 키는 중복)
+        self.finals = {}        # 정규화 최종 URL → near 항목
+        self.near = []          # [simhash, prio, owner, det]
+        self.frozen = set()     # 확정된 owner(일자). 확정된 쪽은 밀려나지 않는다
+        self.history = []
+        self.skipped = self.collapsed = 0
+        if not path: return
+        try:
+            with open(path, "r", encoding="utf-8") as f: data = json.load(f)
+        except (OSError, ValueError):
+            data = []
+        now = time.time()
+        for e in data:
+            if now - e.get("ts", 0) > self.ttl_secs: continue
+            self.history.append(e)
+            self.seen.add(e["url"]); self.finals[e["url"]] = [None, float("inf"), None, None]
+            if e.get("title"): self.seen.add(e["title"])
+            if e.get("simhash") is not None: self.near.append([e["simhash"], float("inf"), None, None])
+
+    def register(self, owner, items):
+        """owner(일자)의 후보 [(순위, item)]를 등록한다. 키가 겹치는 후보 사이의 순서는 (일자, 순위)."""
+        for rank, item in items:
+            keys = [k for k in _dedupe_keys(item.get("url"), item.get("title")) if k]
+            self.keys_of[(owner, rank)] = keys
+            for k in keys: self.regs.setdefault(k, set()).add((owner, rank))
+
+    def claim(self, owner, rank):
+        """수집 전 검사: "ok"(받는다) / "wait"(같은 키의 앞선 후보가 아직 결과 전) / "dup"(이미 있는 기사)."""
+        keys = self.keys_of.get((owner, rank), ())
+        if any(k in self.seen or k in self.won for k in keys):
+            self.skipped += 1
+            self.release(owner, rank)
+            return "dup"
+        if any(min(self.regs[k]) < (owner, rank) for k in keys): return "wait"
+        return "ok"
+
+    def release(self, owner, rank):
+        """후보의 키를 놓는다. 같은 키를 기다리던 후보가 있는 일자들을 돌려준다."""
+        woke = set()
+        for k in self.keys_of.pop((owner, rank), ()):
+            regs = self.regs[k]; regs.discard((owner, rank))
+            woke.update(o for o, _ in regs)
+        return woke
+
+    def accept(self, owner, rank):
+        """받아들여진 후보의 키를 중복 판정용으로 남기고, 기다리던 후보가 있는 일자들을 돌려준다."""
+        self.won.update(self.keys_of.get((owner, rank), ()))
+        return self.release(owner, rank)
+
+    def _beats(self, prio, owner, det, e):
+        # 이미 있는 e(확정 전)를 새 기사가 밀어내는지: 점수가 높거나, 같으면 (일자, 순위)가 앞서야 한다
+        if e[2] is None or e[2] in self.frozen: return False
+        return (-prio, owner, det["rank"]) < (-e[1], e[2], e[3]["rank"])
+
+    def admit(self, det, owner):
+        """
+        수집 후 검사. (받아들임 여부, 밀려난 [(owner, det)]).
+        최종 URL이 같거나 SimHash가 가까운 기존 기사 중 하나라도 확정됐거나, 점수가 높거나, 같은 점수에 (일자, 순위)가
+        앞서면 새 기사를 버린다. 아니면 그 기사들을 모두 밀어낸다(비교 순서가 도착 순서에 좌우되지 않게 전부 본다).
+        """
+        fu = normalize_url_for_dedupe(det["url"])
+        h, prio = det.get("simhash"), det["prio_score"]
+        rivals = [x for x in self.near if h is not None and (x[0] ^ h).bit_count() <= self.max_dist]
+        e = self.finals.get(fu)
+        if e is not None and not any(x is e for x in rivals): rivals.append(e)
+        if rivals:
+            self.collapsed += 1
+            if not all(self._beats(prio, owner, det, x) for x in rivals): return False, []
+            self.near = [x for x in self.near if not any(x is r for r in rivals)]
+            for x in rivals: self.finals.pop(normalize_url_for_dedupe(x[3]["url"]), None)
+        entry = [h, prio, owner, det]
+        if h is not None: self.near.append(entry)
+        self.finals[fu] = entry
+        return True, [(x[2], x[3]) for x in rivals]
+
+    def freeze(self, owner, picked=()):
+        """owner(일자) 확정. 영구 색인이면 뽑힌 기사를 기록해 둔다."""
+        self.frozen.add(owner)
+        if not self.path: return
+        now = time.time()
+        for det in picked:
+            u, t = _dedupe_keys(det["url"], det["title"])
+            self.history.append({"url": u, "title": t, "simhash": det.get("simhash"), "ts": now})
+
+    def save(self):
+        if not self.path: return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f: json.dump(self.history, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            log(f"[중복] 색인 저장 실패: {e}", level="warning")
+
+# -------------------- 일자별 후보 저장소(증분 수집) --------------------
+class DayStore:
+    """
+    일자별로 수집·판정을 마친 후보(상세 dict)를 SQLite에 보관한다. 파이프라인 스레드에서만 쓴다.
+    - 키: (검색어 해시, 일자). 수집 조건(per_day, cand_cap)과 수집 시각을 함께 기록
+    - 일자가 끝나고 STORE_SETTLE_HOURS가 지난 뒤에 수집한 일자만 확정으로 보고 재사용한다(오늘은 늘 다시 긁음)
+    - 재사용 조건: 같은 검색어(iter_pipeline이 가중치/지연 여유분을 덧붙인 키), 같은 cand_cap,
+      저장 당시 per_day ≥ 요청 per_day
+      (지연 수집은 상위 per_day를 정확히 확정하므로 그 이하의 상위 목록도 그대로 맞다)
+    - 후보는 중복 제거 전 목록이다. 중복 제거 여부와 상관없이 같은 행을 쓰고, 거르기는 읽는 쪽에서 한다
+    """
+    def __init__(self, path=STORE_DB, settle_hours=STORE_SETTLE_HOURS, ttl_days=STORE_TTL_DAYS):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.settle_secs = settle_hours*3600
+        self._db = sqlite3.connect(path, timeout=30)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS days (
+                query_key TEXT, day TEXT, query TEXT, per_day INTEGER, cand_cap INTEGER, candidates INTEGER,
+                crawled_at REAL, PRIMARY KEY (query_key, day));
+            CREATE TABLE IF NOT EXISTS candidates (
+                query_key TEXT, day TEXT, rank INTEGER, prio_score REAL, title TEXT, url TEXT, summary TEXT,
+                authors TEXT, published TEXT, host TEXT, simhash TEXT, PRIMARY KEY (query_key, day, rank));
+        """)
+        cutoff = (datetime.now(tz=KST).date() - timedelta(days=ttl_days)).isoformat()
+        with self._db:
+            self._db.execute("DELETE FROM days WHERE day < ?", (cutoff,))
+            self._db.execute("DELETE FROM candidates WHERE day < ?", (cutoff,))
+
+    @staticmethod
+    def _qkey(query):
+        return hashlib.sha1(query.encode("utf-8")).hexdigest()[:16]
+
+    def settled(self, d, crawled_at):
+        day_end = datetime.combine(d + timedelta(days=1), datetime.min.time(), tzinfo=KST).timestamp()
+        return crawled_at >= day_end + self.settle_secs
+
+    def load_day(self, query, d, per_day, cand_cap):
+        """재사용할 수 있는 확정 일자면 상세 dict 목록, 아니면 None."""
+        qk = self._qkey(query)
+        row = self._db.execute("SELECT per_day, cand_cap, crawled_at FROM days WHERE query_key=? AND day=?",
+                               (qk, d.isoformat())).fetchone()
+        if not row or row[0] < per_day or row[1] != cand_cap or not self.settled(d, row[2]): return None
+        return [{"rank": rank, "prio_score": prio, "title": title, "url": url, "summary": summary,
+                 "authors_list": json.loads(authors), "published": date.fromisoformat(published), "host": host,
+                 "simhash": int(sh) if sh else None}
+                for rank, prio, title, url, summary, authors, published, host, sh in self._db.execute(
+                    "SELECT rank, prio_score, title, url, summary, authors, published, host, simhash FROM candidates "
+                    "WHERE query_key=? AND day=? ORDER BY rank", (qk, d.isoformat()))]
+
+    def save_day(self, query, d, per_day, cand_cap, dets, candidates):
+        """일자 d의 판정 결과를 통째로 바꿔 넣는다."""
+        qk, day = self._qkey(query), d.isoformat()
+        with self._db:
+            self._db.execute("DELETE FROM candidates WHERE query_key=? AND day=?", (qk, day))
+            self._db.executemany("INSERT INTO candidates VALUES (?,?,?,?,?,?,?,?,?,?,?)", [
+                (qk, day, r["rank"], r["prio_score"], r["title"], r["url"], r["summary"],
+                 json.dumps(r["authors_list"], ensure_ascii=False), r["published"].isoformat(), r["host"],
+                 None if r.get("simhash") is None else str(r["simhash"])) for r in dets])
+            self._db.execute("INSERT OR REPLACE INTO days VALUES (?,?,?,?,?,?,?)",
+                             (qk, day, query, per_day, cand_cap, candidates, time.time()))
+
+    def close(self):
+        self._db.close()
+
+def open_day_store(store):
+    """store 인자 → DayStore 또는 None. True=STORE_DB, 경로 문자열도 가능, DayStore는 그대로."""
+    if not store: return None
+    if isinstance(store, DayStore): return store
+    try: return DayStore(STORE_DB if store is True else store)
+    except (OSError, sqlite3.Error) as e:
+        log(f"[저장소] 열기 실패 → 모든 일자를 새로 수집: {e}", level="warning")
+        return None
+
+def _top_from_stored(stored, per_day, index=None):
+    """
+    저장된 일자들({일자: 상세 목록})의 상위 per_day. 중복 색인이 있으면 일자들을 한꺼번에 걸러 확정한다:
+    수집 때와 같은 규칙(같은 키는 (일자, 순위)가 앞선 후보가 먼저, 본문 중복은 점수가 높은 쪽)이 되도록
+    점수 순으로 보되 앞선 후보를 기다리는 후보는 그 후보가 정해진 뒤에 본다.
+    """
+    order = lambda dd: sorted(dd, key=lambda x: (-x[1]["prio_score"], x[0], x[1]["rank"]))
+    pending = order((d, det) for d, dets in stored.items() for det in dets)
+    if not index: return {d: [det for dd, det in pending if dd == d][:per_day] for d in stored}
+    for d in sorted(stored): index.register(d, [(det["rank"], det) for det in stored[d]])
+    kept = {d: [] for d in stored}
+    while pending:
+        for k, (d, det) in enumerate(pending):
+            verdict = index.claim(d, det["rank"])
+            if verdict != "wait": break
+        else: break                                           # 정상이면 없음(기다리는 후보가 모두 pending에 있음)
+        pending.pop(k)
+        if verdict != "ok": continue
+        ok, bumped = index.admit(det, d)
+        for bd, bdet in bumped:
+            if bdet in kept.get(bd, ()): kept[bd].remove(bdet)
+        if ok: index.accept(d, det["rank"]); kept[d].append(det)
+        else: index.release(d, det["rank"])
+    for d, det in pending: index.release(d, det["rank"])
+    top = {d: [det for _, det in order((d, det) for det in kept[d])][:per_day] for d in stored}
+    for d in sorted(stored): index.freeze(d, top[d])
+    return top
+
+# -------------------- 전문 검색 색인 --------------------
+_SEARCH_WORD_RE = re.compile(r"[가-힣]+|[^\W_가-힣]+")
+
+def search_tokens(text):
+    """
+    색인/질의 공용 토큰화. 한글 음절 묶음은 겹치는 2-gram(분산에너지 → 분산 산에 에너 너지)으로,
+    그 밖의 글자(영문/숫자 등)는 단어 그대로(소문자). 조사가 붙거나 복합어 안에 있어도 부분 문자열로 찾게 된다.
+    """
+    out = []
+    for w in _SEARCH_WORD_RE.findall((text or "").lower()):
+        if len(w) > 1 and "가" <= w[0] <= "힣":
+            out.extend(w[i:i+2] for i in range(len(w) - 1))
+        else:
+            out.append(w)
+    return out
+
+def fts_query(query):
+    """
+    검색어 → FTS5 MATCH 식. 공백으로 나눈 단어는 모두 포함(AND), 단어 하나는 2-gram 구(phrase)로 찾는다.
+    한 글자 한글 단어는 2-gram이 없어 그 글자로 시작하는 토큰 접두어 검색으로 대신한다. 찾을 것이 없으면 "".
+    """
+    parts = []
+    for word in (query or "").split():
+        toks = search_tokens(word)
+        if not toks: continue
+        if len(toks) == 1 and len(toks[0]) == 1 and "가" <= toks[0] <= "힣":
+            parts.append(f'"{toks[0]}"*')
+        else:
+            parts.append('"' + " ".join(toks) + '"')
+    return " AND ".join(parts)
+
+class SearchIndex:
+    """
+    수집한 기사(제목/요약/본문 앞부분)의 전문 검색 색인. SQLite FTS5에 search_tokens의 2-gram을 넣는다.
+    - docs: URL당 1행(일자, 제목, 요약, 매체명(map_publisher_name), 우선 점수, 압축한 본문). 내용이 같으면 다시 넣지 않는다
+    - docs_fts: 내용 없는(contentless) FTS5라 2-gram 문자열은 저장하지 않는다(크기 약 1/3).
+      지울 때는 docs의 원문으로 같은 토큰을 다시 만들어 'delete' 명령에 넘긴다
+    - doc_terms: 기사에 들어 있는 우선 키워드(소문자) → 키워드 필터
+    - add()는 수집 스레드에서 불러도 되고 버퍼에만 쌓는다. flush()가 한 트랜잭션으로 넣는다
+    - 읽기(search)는 여러 스레드가 같이 써도 되게 잠금으로 묶고, WAL이라 쓰는 중인 다른 프로세스를 막지 않는다
+    """
+    def __init__(self, path=SEARCH_DB, ttl_days=SEARCH_TTL_DAYS):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS docs (
+                id INTEGER PRIMARY KEY, url TEXT UNIQUE, day TEXT, title TEXT, summary TEXT, publisher TEXT,
+                host TEXT, prio INTEGER, body BLOB, sig TEXT, indexed_at REAL);
+            CREATE INDEX IF NOT EXISTS docs_day ON docs(day);
+            CREATE INDEX IF NOT EXISTS docs_publisher ON docs(publisher);
+            CREATE TABLE IF NOT EXISTS doc_terms (term TEXT, doc_id INTEGER, PRIMARY KEY (term, doc_id)) WITHOUT ROWID;
+            CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5(title, summary, body, content='', tokenize='unicode61');
+        """)
+        cutoff = (datetime.now(tz=KST).date() - timedelta(days=ttl_days)).isoformat()
+        old = [(i,) for (i,) in self._db.execute("SELECT id FROM docs WHERE day < ?", (cutoff,))]
+        if old:
+            with self._db: self._delete(old)
+
+    def _delete(self, ids):
+        for (doc_id,) in ids:
+            title, summary, body = self._db.execute("SELECT title, summary, body FROM docs WHERE id=?", (doc_id,)).fetchone()
+            self._db.execute("INSERT INTO docs_fts (docs_fts, rowid, title, summary, body) VALUES ('delete',?,?,?,?)",
+                             (doc_id, *self._fts_values(title, summary, zlib.decompress(body).decode("utf-8"))))
+        self._db.executemany("DELETE FROM doc_terms WHERE doc_id=?", ids)
+        self._db.executemany("DELETE FROM docs WHERE id=?", ids)
+
+    @staticmethod
+    def _fts_values(*texts):
+        return tuple(" ".join(search_tokens(t)) for t in texts)
+
+    def add(self, det, text=""):
+        """판정을 통과한 기사(상세 dict)와 본문 앞부분을 색인 대기열에 넣는다."""
+        with self._lock:
+            self._pending[det["url"]] = (det, text or "")
+
+    def flush(self):
+        """대기열을 색인에 넣고 새로 넣거나 바뀐 기사 수를 돌려준다."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if not pending: return 0
+            now, n = time.time(), 0
+            with self._db:
+                for url, (det, text) in pending.items():
+                    title, summary = det["title"] or "", det["summary"] or ""
+                    sig = hashlib.blake2b("\x00".join((title, summary, text)).encode("utf-8"), digest_size=8).hexdigest()
+                    row = self._db.execute("SELECT id, sig FROM docs WHERE url=?", (url,)).fetchone()
+                    if row and row[1] == sig: continue
+                    if row: self._delete([(row[0],)])
+                    host = det.get("host") or domain_of(url)
+                    doc_id = self._db.execute(
+                        "INSERT INTO docs (url, day, title, summary, publisher, host, prio, body, sig, indexed_at) "
+                        "VALUES (?,?,?,?,?,?,?,?,?,?)",
+                        (url, det["published"].isoformat(), title, summary, map_publisher_name(host.replace("www.", "")),
+                         host, det.get("prio_score", 0), zlib.compress(text.encode("utf-8")), sig, now)).lastrowid
+                    self._db.execute("INSERT INTO docs_fts (rowid, title, summary, body) VALUES (?,?,?,?)",
+                                     (doc_id, *self._fts_values(title, summary, text)))
+                    self._db.executemany("INSERT INTO doc_terms VALUES (?,?)",
+                                         [(t, doc_id) for t in default_term_matcher().scan(title, summary, text, url)[1]])
+                    n += 1
+            return n
+
+    def search(self, query="", date_from=None, date_to=None, publishers=None, terms=None, limit=SEARCH_LIMIT):
+        """
+        검색어(fts_query 규칙)와 필터로 기사를 찾는다. 검색어가 있으면 BM25(제목 > 요약 > 본문 가중) 순,
+        없으면 필터만 적용해 최신 일자·우선 점수 순. terms는 우선 키워드 중 하나라도 들어 있는 기사.
+        돌려주는 dict: day, title, url, summary, publisher, prio, score
+        """
+        match = fts_query(query)
+        if match:
+            sql = ("SELECT d.day, d.title, d.url, d.summary, d.publisher, d.prio, bm25(docs_fts, 4.0, 2.0, 1.0) AS score "
+                   "FROM docs_fts JOIN docs d ON d.id = docs_fts.rowid WHERE docs_fts MATCH ?")
+            args = [match]
+        else:
+            sql = "SELECT d.day, d.title, d.url, d.summary, d.publisher, d.prio, 0.0 AS score FROM docs d WHERE 1"
+            args = []
+        if date_from: sql += " AND d.day >= ?"; args.append(date_from.isoformat())
+        if date_to: sql += " AND d.day <= ?"; args.append(date_to.isoformat())
+        if publishers:
+            sql += f" AND d.publisher IN ({','.join('?'*len(publishers))})"; args.extend(publishers)
+        if terms:
+            terms = sorted({t.lower() for t in terms})
+            sql += f" AND d.id IN (SELECT doc_id FROM doc_terms WHERE term IN ({','.join('?'*len(terms))}))"
+            args.extend(terms)
+        sql += (" ORDER BY score, d.day DESC" if match else " ORDER BY d.day DESC, d.prio DESC, d.id DESC") + " LIMIT ?"
+        args.append(int(limit))
+        with self._lock:
+            rows = self._db.execute(sql, args).fetchall()
+        return [dict(zip(("day", "title", "url", "summary", "publisher", "prio", "score"), r)) for r in rows]
+
+    def publishers(self):
+        """[(매체명, 기사 수)] 기사 수가 많은 순."""
+        with self._lock:
+            return self._db.execute("SELECT publisher, COUNT(*) FROM docs GROUP BY publisher ORDER BY 2 DESC, 1").fetchall()
+
+    def count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def close(self):
+        self.flush()
+        self._db.close()
+
+def _shared_search_index():
+    return SearchIndex()
+
+# -------------------- 동시 수집 엔진 --------------------
+@contextmanager
+def _nullslot():
+    yield
+
+class HostLimiter:
+    """호스트별 동시 요청 수를 per_host 이하로 묶는 세마포어 모음."""
+    def __init__(self, per_host=PER_HOST_LIMIT):
+        self.per_host = max(1, int(per_host))
+        self._lock = threading.Lock()
+        self._sems = {}
+
+    @contextmanager
+    def slot(self, url):
+        host = domain_of(url)
+        with self._lock:
+            sem = self._sems.get(host)
+            if sem is None:
+                sem = self._sems[host] = threading.BoundedSemaphore(self.per_host)
+        with sem:
+            yield
+
+def _parse_article_fn():
+    # Streamlit은 이 파일을 __main__으로 실행해 자식 프로세스가 함수를 찾지 못하므로, 모듈 이름으로 import한 쪽을 넘긴다
+    if __name__ != "__main__": return parse_article
+    import importlib
+    return importlib.import_module(os.path.splitext(os.path.basename(__file__))[0]).parse_article
+
+def _attach_log_bus(bus):
+    # 풀 스레드의 log()도 실행을 시작한 세션의 버스로 가게 한다
+    use_log_bus(bus)
+
+class RunContext:
+    """
+    파이프라인 1회 실행 동안 공유되는 동시성 자원.
+    - pool: 전역 동시성 상한(workers)을 갖는 스레드 풀 (검색/기사 수집 공용)
+    - hosts: 호스트별 동시 요청 상한
+    - breaker: 호스트별/Google 차단 회로(실행 단위로 초기화)
+    - cache: 기사 디스크 캐시(ArticleCache) 또는 None
+    - host_lang: 호스트별 한국어 판정 캐시(HostLangCache)
+    - max_bytes: 기사 본문 읽기 상한(FETCH_MAX_BYTES)
+    - metrics: 실행 지표(Metrics). stats는 그 누적 값(counters)
+    - host_enc: 호스트별로 마지막에 판별한 문자 인코딩(선언이 없는 페이지의 힌트)
+    - rss: 검색어별 RSS 피드 색인(RssFeedCache). 일자마다 다시 받지 않는다
+    - fulltext: 전문 검색 색인(SearchIndex) 또는 None. 판정을 통과한 기사를 모아 두었다가 close 때 넣는다
+    - links: Google 뉴스 기사 링크 → 원문 URL 해석기(GoogleLinkResolver). 해독/캐시/요청 건수를 close 때 남긴다
+    - terms: 점수/제외 판정용 TermMatcher(사용자 키워드 가중치 포함). 없으면 기본 우선 키워드/제외어
+    - parse_workers: 기사 파싱(parse_article)을 돌리는 프로세스 수. 0이면 수집 스레드에서 직접.
+      파싱/본문·기자 추출은 CPU 작업이라 스레드로는 GIL에 막혀 코어 하나를 넘지 못한다.
+      프로세스 풀은 처음 파싱할 때 만든다(전부 캐시 적중이면 띄우지 않음). spawn 방식이라 자식이 실행 스크립트를
+      다시 import하므로, 직접 만든 스크립트에서 부를 때는 if __name__ == "__main__": 아래에서 실행한다
+    """
+    def __init__(self, workers=FETCH_WORKERS, per_host=PER_HOST_LIMIT, cache=None, host_lang=None,
+                 max_bytes=FETCH_MAX_BYTES, metrics=None, rss=None, fulltext=None, parse_workers=PARSE_WORKERS,
+                 terms=None, links=None):
+        self.workers = max(1, int(workers))
+        self.parse_workers = max(0, int(parse_workers or 0))
+        self._procs = None
+        self._procs_lock = threading.Lock()
+        self.max_bytes = max_bytes
+        self.metrics = metrics or Metrics()
+        self.stats = self.metrics.counters
+        self.host_enc = {}
+        self.hosts = HostLimiter(per_host)
+        self.breaker = CircuitBreaker()
+        self.cache = cache
+        self.host_lang = host_lang if host_lang is not None else HostLangCache(path=None)
+        self.rss = rss if rss is not None else RssFeedCache(path=None)
+        self.fulltext = fulltext
+        self.links = links if links is not None else GoogleLinkResolver(path=None)
+        self.terms = terms or default_term_matcher()
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="news-fetch",
+                                       initializer=_attach_log_bus, initargs=(get_log_bus(),))
+
+    def count(self, **kw):
+        self.metrics.count(**kw)
+
+    def parse(self, body, encoding, final_url, title_fallback="", lang=None):
+        """parse_article을 프로세스 풀(parse_workers > 0) 또는 이 스레드에서 돌려 추출 결과만 돌려준다."""
+        with span(self, "parse_article"):  # 프로세스 풀이면 전송/대기 시간까지 포함
+            args = (body, encoding, final_url, title_fallback, lang)
+            procs = self._parse_pool()
+            try:
+                rec, stages = procs.submit(_parse_article_fn(), *args).result() if procs else parse_article(*args)
+            except BrokenProcessPool:
+                log("[파싱] 프로세스 풀이 중단됨 → 이 스레드에서 파싱", level="warning")
+                self.parse_workers = 0
+                rec, stages = parse_article(*args)
+        for stage, xs in stages.items():
+            for x in xs: self.metrics.observe(stage, x)
+        return rec
+
+    def _parse_pool(self):
+        if not self.parse_workers: return None
+        with self._procs_lock:
+            if self._procs is None:
+                import multiprocessing
+                # fork는 스레드가 도는 중에 잠금째 복제될 수 있어 spawn(Windows와 같은 방식)으로 띄운다
+                self._procs = ProcessPoolExecutor(self.parse_workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._procs
+
+    def close(self):
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        if self._procs: self._procs.shutdown(wait=True, cancel_futures=True)
+        s = self.stats
+        if s["bytes_read"] or s["rejected"] or s["capped"]:
+            log(f"[다운로드] 수신 {s['bytes_read']//1024}KB / HTML 아님 {s['rejected']}건(≈{s['rejected_saved']//1024}KB 절약)"
+                f" / 크기 상한 {s['capped']}건(≈{s['capped_saved']//1024}KB 절약)")
+        if self.cache:
+            self.count(cache_hits=self.cache.hits, cache_revalidated=self.cache.revalidated, cache_misses=self.cache.misses)
+            log(f"[캐시] 적중 {self.cache.hits} / 재검증 {self.cache.revalidated} / 신규 {self.cache.misses}")
+            self.cache.close()
+        if self.fulltext:
+            try:
+                self.count(fulltext_indexed=self.fulltext.flush())
+                self.fulltext.close()
+            except sqlite3.Error as e:
+                log(f"[검색 색인] 저장 실패: {e}", level="warning")
+        lk, st = self.links, self.links.stats()
+        if sum(st.values()):
+            self.count(gnews_decoded=st["decoded"], gnews_cache_hits=st["hits"], gnews_resolved=st["resolved"],
+                       gnews_failed=st["failed"])
+            log(lk.summary())
+        lk.save()
+        self.host_lang.save()
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close()
+
+def search_day_candidates(query, d, cand_cap, run=None):
+    with log_context(day=d.isoformat()):
+        items = parse_google_news_results(build_news_url_for_date(query, d), run=run)
+        if not items:
+            items = parse_google_news_results_rss(query, d, run=run)
+    if cand_cap:
+        items = items[:cand_cap]
+    return items
+
+def detail_candidate(d, idx, item, run=None):
+    """후보 1건을 수집/판정해 상세 dict를 돌려준다. 제외 대상이면 None. 결과는 기사 문맥과 함께 debug 이벤트로 남긴다."""
+    t0 = time.perf_counter()
+    with log_context(day=d.isoformat(), url=item.get("url", "")):
+        det = _detail_candidate(d, idx, item, run)
+        log(f"[기사] {'후보 채택' if det else '제외'}: {item.get('title', '')[:40]}", level="debug",
+            ms=round((time.perf_counter() - t0)*1000, 1), prio=det["prio_score"] if det else None)
+    return det
+
+def _detail_candidate(d, idx, item, run=None):
+    terms = run.terms if run else default_term_matcher()
+    if terms.excluded(item.get("title",""), item.get("url","")):
+        return None
+    det = fetch_article_record(item["url"], title_fallback=item["title"], run=run)
+    if det is None or not det["is_korean"]:
+        return None
+    summary = det["summary"]
+    score, _, excluded = terms.scan(item["title"], summary, det.get("final_url",""))  # 제목/URL은 위에서 통과
+    if excluded:
+        return None
+    host = domain_of(det["final_url"]) or domain_of(item["url"]) or ""
+    prio = (20 if is_priority_host(det["final_url"]) else 0) + score
+    published = det.get("published")
+    pub_date = (published.astimezone(KST).date() if published and published.tzinfo else (published.date() if published else d))
+    out = {
+        "rank": idx, "prio_score": prio, "title": item["title"],
+        "url": det["final_url"] or item["url"], "summary": clean_text(summary),
+        "authors_list": det.get("authors", []), "published": pub_date, "host": host,
+        "simhash": det.get("simhash"),
+    }
+    if run and run.fulltext: run.fulltext.add(out, det.get("text", ""))
+    return out
+
+class DayPlan:
+    """
+    일자 1개의 후보 수집 계획. 사전 점수 상한이 높은 후보부터(같으면 사전 점수, 그다음 검색 순위) 꺼내 주고,
+    아직 안 받은 후보가 상한을 채워도 상위 per_day가 바뀔 수 없으면 decided가 된다.
+    사전 점수는 검색 결과(제목/언랩된 URL)만으로 매긴 점수로, 수집 후 점수와 같은 규칙이되 요약문이 빠진다.
+    상한 = 사전 점수 + 여유분. 여유분은 slack이 None이면 제목/URL에 없는 키워드 가중치 합
+    (리다이렉트로 호스트가 바뀌지 않는 한 전부 받은 것과 결과가 같다), 숫자면 그 값.
+    slack=None이면 상한은 키워드 가중치 합(+우선 매체 20)으로 매체 종류만 가르고, 같은 상한 안의 순서는 사전 점수가 정한다.
+    원문 호스트를 알 수 없는 링크(해독 안 되는 Google 뉴스 토큰 등)는 우선 매체 가산점을 있다고 본다.
+    그래서 그런 링크만 있는 RSS 일자는 기본 모드(slack=None)에서 전부 받게 되고, 절약은 숫자 slack에서만 생긴다.
+    terms(TermMatcher)가 없으면 기본 우선 키워드/제외어로 매긴다.
+    중복 색인(claim)이 다른 일자의 앞선 후보를 기다리라고 한 후보는 parked에 두었다가 unpark로 되돌린다.
+    아직 받을 수 있는 후보라 decided 판단에는 들어간다.
+    lazy=False면 모든 후보를 검색 순위대로 받는다(기존 동작).
+    """
+    def __init__(self, items, per_day, lazy=True, slack=None, terms=None):
+        terms = terms or default_term_matcher()
+        self.per_day, self.lazy = per_day, lazy
+        self.total = len(items)
+        self.queue = []                    # (-상한, -사전 점수, rank, item)
+        for idx, item in enumerate(items):
+            url = item.get("url","")
+            if terms.excluded(item.get("title",""), url): continue  # 받아 봐야 탈락
+            ub = pre = 0
+            if lazy:
+                # RSS 후보는 대개 Google 뉴스 토큰 링크라 원문 주소로 풀어 본다. 못 풀면(호스트가 Google/불명) 우선 매체일 수도 있다
+                real = unwrap_google_news_link(url)
+                host = domain_of(real)
+                pre = terms.score(item.get("title",""), real)
+                prio_host = not host or is_google_host(host) or is_priority_host(real)
+                ub = (20 if prio_host else 0) + pre + (terms.total - pre if slack is None else slack)
+            self.queue.append((-ub, -pre, idx, item))
+        self.queue.sort(key=lambda x: x[:3], reverse=True)   # pop()이 가장 좋은 후보를 꺼내도록
+        self.inflight = {}                 # rank -> (-상한, rank)
+        self.parked = []                   # 중복 색인이 기다리게 한 queue 항목
+        self.results = []
+        self.judged = []                   # 중복 제거와 상관없이 판정을 통과한 결과 전부(일자 저장소용)
+        self.skipped = 0                   # 중복 색인이 수집 전에 버린 후보 수
+        self.fetched = 0
+
+    def take(self, window, claim=None):
+        """
+        동시 수집 중인 후보가 window개가 되도록 다음 후보들을 꺼낸다.
+        claim(rank)이 "wait"면 parked로 옮기고, "dup"이면 버린다.
+        """
+        out = []
+        while self.queue and len(self.inflight) < window:
+            entry = self.queue.pop()
+            neg_ub, _, idx, item = entry
+            verdict = claim(idx) if claim else "ok"
+            if verdict == "wait": self.parked.append(entry)
+            elif verdict == "dup": self.skipped += 1
+            if verdict != "ok": continue
+            self.inflight[idx] = (neg_ub, idx)
+            out.append((idx, item))
+        return out
+
+    def unpark(self):
+        if not self.parked: return
+        self.queue += self.parked; self.parked = []
+        self.queue.sort(key=lambda x: x[:3], reverse=True)
+
+    def pending(self):
+        """아직 결과가 없는 후보(대기열/기다림/수집 중)의 순위."""
+        return [q[2] for q in self.queue + self.parked] + list(self.inflight)
+
+    def add(self, idx, det, keep=True):
+        """수집 결과 반영. keep=False면 중복으로 접힌 결과라 judged에만 남긴다."""
+        self.inflight.pop(idx, None)
+        self.fetched += 1
+        if det is None: return
+        self.judged.append(det)
+        if keep: self.results.append(det)
+
+    def drop(self, det):
+        """다른 일자의 더 나은 중복에 밀려난 결과를 뺀다."""
+        if det in self.results: self.results.remove(det)
+
+    def top(self):
+        return sorted(self.results, key=lambda x: (-x["prio_score"], x["rank"]))[:self.per_day]
+
+    def decided(self):
+        if not self.queue and not self.inflight and not self.parked: return True
+        if not self.lazy or len(self.results) < self.per_day: return False
+        kth = sorted((-r["prio_score"], r["rank"]) for r in self.results)[self.per_day-1]
+        # 꺼내는 순서는 사전 점수가 끼어 있어 (상한, 순위)가 가장 좋은 후보가 맨 끝이라는 보장이 없다
+        best = min([*self.inflight.values(), *((q[0], q[2]) for q in self.queue + self.parked)])
+        return best > kth
+
+def _collect_details(futs, status=None, progress=None):
+    """
+    futs: {future: (d, rank)}. 끝나는 순서대로 진행도를 갱신하고
+    일자별 상세 목록을 rank 순(직렬 실행과 같은 순서)으로 돌려준다.
+    진행도/상태 위젯은 호출한 스레드(스크립트 스레드)에서만 건드린다.
+    """
+    by_day = {}
+    total = len(futs)
+    for done, f in enumerate(as_completed(futs), start=1):
+        d, idx = futs[f]
+        det = f.result()
+        if det is not None:
+            by_day.setdefault(d, []).append(det)
+        if status: status.info(f"[파싱] {d} {done}/{total}")
+        if progress and total: progress.progress(min(done/total,1.0))
+    for dets in by_day.values():
+        dets.sort(key=lambda x: x["rank"])
+    return by_day
+
+def parse_one_day(query, d, cand_cap, status=None, progress=None, run=None):
+    own = run is None
+    run = run or RunContext()
+    try:
+        items = search_day_candidates(query, d, cand_cap, run=run)
+        futs = {run.pool.submit(detail_candidate, d, idx, item, run): (d, idx) for idx, item in enumerate(items)}
+        return _collect_details(futs, status, progress).get(d, [])
+    finally:
+        if own: run.close()
+
+def _row_from_detail(r):
+    # ["", None, title, url, summary, 기자, 일자] — 순번은 최종 셔플 후에 매긴다
+    return ["", None, r["title"], r["url"], r["summary"], build_reporter_cell(r["host"], r["authors_list"]),
+            r["published"].strftime("%Y-%m-%d")]
+
+def open_dedupe(dedupe):
+    """dedupe 인자 → DedupeIndex 또는 None. True=실행 단위, "history"=DEDUPE_FILE에 실행 간 기억, 경로 문자열도 가능."""
+    if not dedupe: return None
+    if dedupe is True: return DedupeIndex()
+    return DedupeIndex(DEDUPE_FILE if dedupe == "history" else dedupe)
+
+def iter_pipeline(selected_terms, custom_terms, per_day=5, days=7, cand_cap=40,
+                  workers=FETCH_WORKERS, per_host=PER_HOST_LIMIT, use_cache=True, lazy=True, lazy_slack=None,
+                  dedupe=True, max_bytes=FETCH_MAX_BYTES, metrics=None, store=True, parse_workers=PARSE_WORKERS):
+    """
+    run_pipeline의 스트리밍판. 결과가 준비되는 대로 이벤트(dict)를 내보낸다.
+    - {"type":"search", "day":d, "count":n}            일자 검색 완료(후보 n건, 저장소에서 꺼냈으면 "stored":True)
+    - {"type":"article", "day":d, "item":det|None, "done":k, "total":t}
+                                                       후보 1건 처리 완료(제외/실패면 item=None)
+    - {"type":"day", "day":d, "rows":[...]}            일자 확정(상위 per_day건, 순번 없음)
+    - {"type":"done", "rows":[...], "sheet_name":s}    전체 완료(셔플·순번 부여 후 최종 행)
+    후보는 일자별 DayPlan이 사전 점수 순으로 조금씩 내주고, 상위 per_day가 확정되면 나머지는 받지 않는다.
+    dedupe(open_dedupe 참고)가 켜져 있으면 일자를 넘나드는 중복/전재 기사를 한 건으로 접는다.
+    total은 남은 후보 수(검색이 안 끝난 일자는 cand_cap건)로 어림한 값이라 실행 중에 바뀔 수 있다.
+    metrics(Metrics)를 넘기면 단계별 시간/호스트 지연/카운터가 거기에 쌓인다.
+    parse_workers개 프로세스가 기사 파싱을 나눠 맡는다(RunContext 참고, 0이면 수집 스레드에서).
+    custom_terms는 검색어에 더해질 뿐 아니라 점수에도 들어간다(기본 CUSTOM_TERM_WEIGHT, "용어:가중치"로 따로 지정).
+    store(open_day_store 참고, use_cache일 때만)가 있으면 확정된 지난 일자는 저장된 후보로 바로 구성하고,
+    없거나 아직 열린 일자(오늘 등)만 긁어서 그 결과를 다시 저장한다.
+    use_cache면 판정을 통과한 기사(뽑히지 않은 후보 포함)를 전문 검색 색인(SearchIndex)에도 넣는다.
+    소비를 중간에 멈추면(close) 남은 작업은 취소된다.
+    """
+    base_q = parse_query_from_original(DEFAULT_ORIGINAL_URL)
+    custom = custom_term_weights(custom_terms)
+    query = compose_query(base_q, selected_terms, list(custom))
+    terms = TermMatcher(custom=custom)
+    # 저장된 후보를 바꾸는 설정은 모두 일자 저장소 키에 넣는다: 사용자 키워드 가중치(점수), 지연 여유분
+    # (숫자면 상위 목록이 근사라 정확 모드와 섞지 않음. eager와 lazy_slack=None은 같은 상위 목록).
+    # 중복 제거는 키에 넣지 않는다: 저장소에는 중복 제거 전 결과를 두고 읽을 때(_top_from_stored) 거른다
+    store_query = query + (" #" + json.dumps(custom, ensure_ascii=False, sort_keys=True) if custom else "")
+    if lazy and lazy_slack is not None: store_query += f" #slack={lazy_slack}"
+
+    today_kst = datetime.now(tz=KST)
+    date_list = [today_kst.date() - timedelta(days=i) for i in range(days)]
+    # 일자별 동시 수집 폭: per_day + 여유분, 일자가 적을 때도 풀을 채울 만큼
+    window = max(per_day + LAZY_EXTRA, -(-int(workers) // max(1, days)))
+
+    cache = None
+    if use_cache:
+        try: cache = ArticleCache()
+        except Exception as e: log(f"[캐시] 열기 실패 → 캐시 없이 진행: {e}", level="warning")
+    host_lang = HostLangCache() if use_cache else None
+    rss = RssFeedCache() if use_cache else None
+    links = GoogleLinkResolver() if use_cache else None
+    fulltext = None
+    if use_cache:
+        try: fulltext = SearchIndex()
+        except (OSError, sqlite3.Error) as e: log(f"[검색 색인] 열기 실패 → 색인 없이 진행: {e}", level="warning")
+    index = open_dedupe(dedupe)
+    day_store = open_day_store(store) if use_cache or isinstance(store, DayStore) else None
+    picks = {}
+    with RunContext(workers, per_host, cache=cache, host_lang=host_lang, max_bytes=max_bytes, metrics=metrics,
+                    rss=rss, fulltext=fulltext, parse_workers=parse_workers, terms=terms,
+                    links=links) as run:
+        # 저장소에 확정된 일자는 검색/수집 없이 저장된 후보로 바로 구성한다
+        stored = {}
+        for d in date_list:
+            dets = day_store.load_day(store_query, d, per_day, cand_cap) if day_store else None
+            if dets is not None: stored[d] = dets
+        for d, top in _top_from_stored(stored, per_day, index).items():
+            picks[d] = [_row_from_detail(r) for r in top]
+            log(f"[저장소] {d} 저장된 후보 {len(stored[d])}건에서 {len(picks[d])}건 구성")
+            yield {"type": "search", "day": d, "count": len(stored[d]), "stored": True}
+            yield {"type": "day", "day": d, "rows": picks[d]}
+        if picks: run.count(store_days_reused=len(picks))
+        # 나머지 일자의 검색을 동시에 던지고, 끝난 날부터 후보 상세 수집을 풀에 올린다.
+        # 중복 색인이 있으면 모든 일자의 후보를 (일자, 순위)로 등록한 뒤에 시작한다: 일자 사이에 겹치는 기사를
+        # 어느 일자가 가질지가 검색이 끝난 순서에 따라 바뀌지 않도록
+        scrape = [d for d in date_list if d not in picks]
+        futs = {run.pool.submit(search_day_candidates, query, d, cand_cap, run): ("search", d, None) for d in scrape}
+        plans = {d: None for d in scrape}        # None=검색 중
+        searched = {}                            # 중복 색인용: 등록 전까지 모아 둔 일자별 후보
+        done = fetched = candidates = 0
+
+        def submit(d):
+            claim = (lambda i: index.claim(d, i)) if index else None
+            for i, item in plans[d].take(window, claim=claim):
+                futs[run.pool.submit(detail_candidate, d, i, item, run)] = ("detail", d, i)
+
+        def finish(d):
+            # 상위 per_day가 더 바뀔 수 없음: 이 일자의 남은 수집은 취소. (day 이벤트, 깨울 일자들)
+            nonlocal fetched
+            plan = plans.pop(d)
+            for g, (_, gd, _) in list(futs.items()):
+                if gd == d: g.cancel(); futs.pop(g)
+            fetched += plan.fetched
+            if plan.fetched < plan.total:
+                log(f"[지연 수집] {d} 후보 {plan.total}건 중 {plan.fetched}건만 수집하고 확정")
+            top = plan.top()
+            woke = set()
+            if index:
+                index.freeze(d, top)
+                for i in plan.pending(): woke |= index.release(d, i)  # 받지 않고 끝난 후보의 키는 기다리던 일자에 넘긴다
+            # 중복 제거 전 결과를 저장한다(읽을 때 다시 거름). 수집 전에 건너뛴 후보가 있으면 그 일자의 상위 목록이
+            # 중복 제거 없이는 정확하지 않으므로 저장하지 않는다
+            if day_store and not plan.skipped:
+                day_store.save_day(store_query, d, per_day, cand_cap, plan.judged, plan.total)
+            elif day_store:
+                log(f"[저장소] {d} 중복으로 수집 전에 건너뛴 후보 {plan.skipped}건 → 저장하지 않음")
+            picks[d] = [_row_from_detail(r) for r in top]
+            return {"type": "day", "day": d, "rows": picks[d]}, woke
+
+        def settle(days):
+            # 일자들을 다시 돌린다(기다리던 후보 복귀 + 다음 후보 제출). 확정되는 일자가 또 다른 일자를 깨울 수 있다
+            out, todo = [], sorted(days)
+            while todo:
+                d = todo.pop(0)
+                if plans.get(d) is None: continue
+                plans[d].unpark(); submit(d)
+                if plans[d].decided():
+                    ev, woke = finish(d)
+                    out.append(ev); todo += sorted(woke)
+            return out
+
+        while futs:
+            for f in wait(futs, return_when=FIRST_COMPLETED).done:
+                if f not in futs: continue            # 이미 확정된 일자의 남은 작업
+                kind, d, idx = futs.pop(f)
+                if kind == "search":
+                    items = f.result()
+                    plan = plans[d] = DayPlan(items, per_day, lazy, lazy_slack, terms=run.terms)
+                    candidates += plan.total
+                    yield {"type": "search", "day": d, "count": len(items)}
+                    woke = {d}
+                    if index:
+                        searched[d] = items
+                        woke = set(searched) if len(searched) == len(scrape) else set()
+                        for sd in sorted(woke): index.register(sd, list(enumerate(searched[sd])))
+                else:
+                    det = f.result()
+                    plan, woke = plans[d], {d}
+                    ok = True
+                    if index and det is None:
+                        woke |= index.release(d, idx)
+                    elif index:
+                        ok, bumped = index.admit(det, d)
+                        for bd, bdet in bumped:
+                            if plans.get(bd) is not None: plans[bd].drop(bdet); woke.add(bd)
+                        woke |= index.accept(d, idx) if ok else index.release(d, idx)
+                    plan.add(idx, det, keep=ok); done += 1
+                    if not ok: det = None
+                    remaining = sum((cand_cap or 0) if p is None else len(p.queue) + len(p.parked) + len(p.inflight)
+                                    for p in plans.values())
+                    yield {"type": "article", "day": d, "item": det, "done": done, "total": done + remaining}
+                yield from settle(woke)
+        for d in sorted(plans):  # 기다림이 풀리지 않은 채 작업이 끝난 일자(정상이면 없음)는 받은 결과로 확정
+            if plans[d] is None: continue
+            log(f"[중복] {d} 기다리던 후보 {len(plans[d].parked)}건을 받지 못하고 확정", level="warning")
+            yield finish(d)[0]
+        run.count(candidates=candidates, candidates_fetched=fetched)
+        if candidates:
+            log(f"[지연 수집] 전체 후보 {candidates}건 중 {fetched}건 수집 ({candidates-fetched}건 생략)")
+        if index:
+            run.count(dedupe_skipped=index.skipped, dedupe_collapsed=index.collapsed)
+            log(f"[중복] 수집 전 제외 {index.skipped}건 / 본문 중복 접기 {index.collapsed}건")
+            index.save()
+    if day_store and not isinstance(store, DayStore): day_store.close()
+
+    # 셔플 순서가 직렬 실행과 같도록 날짜 순으로 모은 뒤 섞는다
+    rows_all = [row for d in date_list for row in picks.get(d, [])]
+    random.shuffle(rows_all)
+    rows = rows_all[:days*per_day]
+    for i, row in enumerate(rows, start=1): row[1] = i
+    yield {"type": "done", "rows": rows, "sheet_name": week_sheet_name_wed_kst(datetime.now(tz=KST))}
+
+def rows_to_frame(rows):
+    import pandas as pd
+    return pd.DataFrame([[""]*7, ["", "순번","타이틀","링크","세부내용","기자","일자"], *rows])
+
+def run_pipeline(selected_terms, custom_terms, per_day=5, days=7, cand_cap=40, status=None, progress=None,
+                 workers=FETCH_WORKERS, per_host=PER_HOST_LIMIT, use_cache=True, on_event=None, lazy=True, lazy_slack=None,
+                 dedupe=True, max_bytes=FETCH_MAX_BYTES, metrics=None, store=True, parse_workers=PARSE_WORKERS):
+    """iter_pipeline을 끝까지 돌려 (df, sheet_name, rows)를 돌려준다. on_event로 중간 이벤트를 받을 수 있다."""
+    if status: status.info(f"[검색] {days}일치 뉴스 검색 중…")
+    for ev in iter_pipeline(selected_terms, custom_terms, per_day, days, cand_cap, workers=workers, per_host=per_host,
+                            use_cache=use_cache, lazy=lazy, lazy_slack=lazy_slack, dedupe=dedupe, max_bytes=max_bytes,
+                            metrics=metrics, store=store, parse_workers=parse_workers):
+        if on_event: on_event(ev)
+        if ev["type"] == "article":
+            if status: status.info(f"[파싱] {ev['day']} {ev['done']}/{ev['total']}")
+            if progress and ev["total"]: progress.progress(min(ev["done"]/ev["total"], 1.0))
+        elif ev["type"] == "done":
+            rows, sheet_name = ev["rows"], ev["sheet_name"]
+    return rows_to_frame(rows), sheet_name, rows
+
+def build_html_from_rows(rows, sheet_name):
+    def html_br(n=1): return "<br>"*int(n)
+    def html_p(txt, small=False, bold=False):
+        t = pyhtml.escape(str(txt)).replace("\n","<br>")
+        if bold: t=f"<b>{t}</b>"
+        if small: t=f'<span style="font-size:90%">{t}</span>'
+        return f'<p align="left">{t}</p>'
+    def week_label_from_sheet(s):
+        m = re.match(r"(\d{2})\.(\d{2})\.(\d+)주차", s)
+        return f"{m.group(1)}년 {m.group(2)}월 {m.group(3)}주차" if m else s
+
+    parts=['<div align="">', html_p("안녕하세요."), html_br(1),
+           html_p("아이디알서비스 입니다."), html_br(1),
+           html_p(f"{week_label_from_sheet(sheet_name)} 에너지 뉴스 모음 입니다."), html_br(5)]
+    for idx, r in enumerate(rows, start=1):
+        title, url, summary, reporter, d = r[2], r[3], r[4], r[5], r[6]
+        parts.append(html_p(f"{idx}.\u00A0{title}", bold=True)); parts.append(html_br(2))
+        if url:
+            parts.append(f'<p align="left"><a href="{pyhtml.escape(url,quote=True)}" target="_blank" rel="noopener noreferrer">기사원문</a></p>')
+            parts.append(html_br(2))
+        if summary: parts.append(html_p(summary))
+        if reporter: parts.append(html_p(reporter, small=True, bold=True))
+        if d: parts.append(html_p(d, small=True, bold=True))
+        parts.append(html_br(6))
+    parts.append("</div>")
+    return "".join(parts)
+
+def build_item_html_from_row(r, idx):
+    def html_br(n=1): return "<br>"*int(n)
+    def html_p(txt, small=False, bold=False):
+        t = pyhtml.escape(str(txt)).replace("\n","<br>")
+        if bold: t=f"<b>{t}</b>"
+        if small: t=f'<span style="font-size:90%">{t}</span>'
+        return f'<p align="left">{t}</p>'
+    title, url, summary, reporter, d = r[2], r[3], r[4], r[5], r[6]
+    parts=['<div align="">', html_p(f"{idx}. {title}", bold=True), html_br(1)]
+    if url:
+        parts.append(f'<p align="left"><a href="{pyhtml.escape(url,quote=True)}" target="_blank" rel="noopener noreferrer">기사원문</a></p>')
+        parts.append(html_br(1))
+    if summary: parts.append(html_p(summary))
+    if reporter: parts.append(html_p(reporter, small=True, bold=True))
+    if d: parts.append(html_p(d, small=True, bold=True))
+    parts.append("</div>")
+    return "".join(parts)
+
+# -------------------- 저장 --------------------
+# 형식마다 한 번만 직렬화하고, 같은 바이트를 파일 저장과 다운로드 버튼이 함께 쓴다.
+EXPORT_COLUMNS = ("순번", "타이틀", "링크", "세부내용", "기자", "일자")
+EXPORT_MIME = {"xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+               "txt": "text/plain; charset=utf-8", "csv": "text/csv; charset=utf-8",
+               "jsonl": "application/x-ndjson; charset=utf-8", "parquet": "application/vnd.apache.parquet"}
+
+def save_excel(df, sheet_name, path):
+    with open(path, "wb") as f:
+        f.write(_xlsx_bytes(df, sheet_name))
+
+def save_text(text, path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+def preview_frame(rows):
+    """결과 행 → 표 미리보기용 DataFrame(엑셀을 다시 읽지 않고 메모리의 행에서 바로)."""
+    import pandas as pd
+    return pd.DataFrame([r[1:7] for r in rows], columns=list(EXPORT_COLUMNS))
+
+def _xlsx_bytes(df, sheet_name):
+    import pandas as pd
+    buf = io.BytesIO()
+    with pd.ExcelWriter(buf, engine="openpyxl") as writer:
+        df.to_excel(writer, index=False, header=False, sheet_name=sheet_name)
+    return buf.getvalue()
+
+def available_export_formats():
+    """이 환경에서 고를 수 있는 내보내기 형식: 기본 형식 + 필요한 패키지가 설치된 선택 형식(import 하지 않고 확인)."""
+    import importlib.util
+    return EXPORT_FORMATS + tuple(f for f, mod in OPTIONAL_EXPORT_FORMATS.items() if importlib.util.find_spec(mod))
+
+def export_bytes(fmt, rows, sheet_name, df=None):
+    """
+    결과 행을 fmt 형식의 바이트로 직렬화한다.
+    - xlsx: 화면/메일용 시트(rows_to_frame 배치, df를 넘기면 그대로 사용)
+    - txt: 메일 본문 HTML 코드(build_html_from_rows)
+    - csv(UTF-8 BOM, 엑셀에서 바로 열림) / jsonl / parquet: 분석용, 열은 EXPORT_COLUMNS
+    """
+    if fmt == "xlsx":
+        return _xlsx_bytes(rows_to_frame(rows) if df is None else df, sheet_name)
+    if fmt == "txt":
+        return build_html_from_rows(rows, sheet_name).encode("utf-8")
+    if fmt == "jsonl":
+        return "".join(json.dumps(dict(zip(EXPORT_COLUMNS, r[1:7])), ensure_ascii=False) + "\n" for r in rows).encode("utf-8")
+    if fmt == "csv":
+        import csv
+        buf = io.StringIO()
+        w = csv.writer(buf, lineterminator="\n")
+        w.writerow(EXPORT_COLUMNS); w.writerows(r[1:7] for r in rows)
+        return buf.getvalue().encode("utf-8-sig")
+    if fmt == "parquet":
+        buf = io.BytesIO()
+        preview_frame(rows).astype({"순번": "int64"}).to_parquet(buf, index=False)
+        return buf.getvalue()
+    raise ValueError(f"알 수 없는 내보내기 형식: {fmt}")
+
+def build_exports(rows, sheet_name, formats=EXPORT_FORMATS, df=None, metrics=None):
+    """
+    요청한 형식을 각각 한 번씩 직렬화해 {형식: 바이트}로 돌려준다.
+    형식별 소요 시간은 metrics의 export_<형식> 단계로, 크기는 export_bytes_<형식> 카운터로 남는다.
+    필요한 패키지가 없는 형식(parquet인데 pyarrow 없음 등)은 경고를 남기고 건너뛴다.
+    """
+    metrics = metrics or Metrics()
+    out = {}
+    for fmt in formats:
+        try:
+            with metrics.span(f"export_{fmt}"):
+                out[fmt] = export_bytes(fmt, rows, sheet_name, df=df)
+        except ImportError as e:
+            log(f"[저장] {fmt} 건너뜀(필요한 패키지 없음: {e})", level="warning")
+            continue
+        metrics.count(**{f"export_bytes_{fmt}": len(out[fmt])})
+    return out
+
+def save_exports(exports, out_dir, name, metrics=None):
+    """build_exports 결과를 out_dir/name.<형식>으로 기록하고 {형식: 경로}를 돌려준다. 실패한 형식은 로그만 남긴다."""
+    metrics = metrics or Metrics()
+    paths = {}
+    with metrics.span("export_write"):
+        for fmt, data in exports.items():
+            path = os.path.join(out_dir, f"{name}.{fmt}")
+            try:
+                with open(path, "wb") as f:
+                    f.write(data)
+            except OSError as e:
+                log(f"[저장 실패] {fmt}: {e}", level="warning")
+                continue
+            paths[fmt] = path
+            log(f"[저장] {fmt}: {path}")
+    return paths
+
+# -------------------- 헤드리스 CLI --------------------
+class _ConsoleProgress:
+    """run_pipeline의 status/progress 자리에 넣는 콘솔 진행 막대(tqdm)."""
+    def __init__(self):
+        from tqdm import tqdm
+        self.bar = tqdm(total=1000, unit="‰", file=sys.stderr, leave=False, bar_format="{desc} {bar} {percentage:3.0f}%")
+    def info(self, msg): self.bar.set_description_str(msg)
+    def progress(self, frac): self.bar.update(int(frac*1000) - self.bar.n)
+    def close(self): self.bar.close()
+
+def _split_terms(s):
+    return [t.strip() for t in (s or "").split(",") if t.strip()]
+
+def cmd_run(args):
+    global LOG_ECHO
+    LOG_ECHO = not args.quiet
+    name = args.name or f"에너지뉴스_{datetime.now(tz=KST).strftime('%Y%m%d_%H%M%S')}"
+    os.makedirs(args.out, exist_ok=True)
+    bar = None if args.quiet or not sys.stderr.isatty() else _ConsoleProgress()
+    # 일자가 확정될 때마다 중간 결과를 한 줄씩 기록(중단돼도 그때까지의 결과는 남는다)
+    partial_path = os.path.join(args.out, f"{name}.partial.jsonl")
+    metrics = Metrics()
+    use_log_bus(EventBus(name=name, path=args.log_file or None))
+    log("[시작] 파이프라인 실행")
+    with open(partial_path, "w", encoding="utf-8") as partial:
+        def on_event(ev):
+            if ev["type"] != "day": return
+            for r in ev["rows"]:
+                partial.write(json.dumps(dict(zip(("타이틀","링크","세부내용","기자","일자"), r[2:])), ensure_ascii=False) + "\n")
+            partial.flush()
+            log(f"[일자 확정] {ev['day']} {len(ev['rows'])}건 → {partial_path}")
+        try:
+            df_out, sheet_name, rows = run_pipeline(
+                selected_terms=set(_split_terms(args.terms)), custom_terms=_split_terms(args.custom),
+                per_day=args.per_day, days=args.days, cand_cap=args.cand_cap, status=bar, progress=bar,
+                workers=args.workers, per_host=args.per_host, use_cache=not args.no_cache, on_event=on_event,
+                lazy=not args.eager, lazy_slack=args.lazy_slack, max_bytes=args.max_kb*1024,
+                dedupe=False if args.no_dedupe else ("history" if args.dedupe_history else True), metrics=metrics,
+                store=not args.no_store, parse_workers=args.parse_workers)
+        finally:
+            if bar: bar.close()
+    log(f"[완료] 파이프라인 종료 ({len(rows)}건)")
+    exports = build_exports(rows, sheet_name, formats=_split_terms(args.formats), df=df_out, metrics=metrics)
+    paths = save_exports(exports, args.out, name, metrics=metrics)
+    os.remove(partial_path)
+    for path in paths.values(): print(path)
+    if not args.no_metrics:
+        json_path = os.path.join(args.out, f"{name}.metrics.json")
+        prom_path = args.prom or os.path.join(args.out, f"{name}.prom")
+        metrics.save(json_path, prom_path)
+        log(f"[지표] {json_path} / {prom_path}")
+    return 0
+
+def cmd_crawl(args):
+    """
+    매일 돌리는 증분 수집(cron 등): 저장소에 없거나 아직 열린 일자만 긁어 일자별 후보를 STORE_PER_DAY건까지 확정해 둔다.
+    보고서는 만들지 않는다. 이후 run(기본 저장소 사용)은 확정된 일자를 네트워크 없이 구성한다
+    (저장된 후보는 중복 제거 전 목록이라 run의 중복 제거는 읽을 때 적용된다).
+    """
+    global LOG_ECHO
+    LOG_ECHO = not args.quiet
+    use_log_bus(EventBus(name="crawl", path=args.log_file or None))
+    metrics = Metrics()
+    stored = days_done = 0
+    log(f"[크롤] 최근 {args.days}일, 일자별 상위 {args.per_day}건 확정")
+    for ev in iter_pipeline(set(_split_terms(args.terms)), _split_terms(args.custom), per_day=args.per_day,
+                            days=args.days, cand_cap=args.cand_cap, workers=args.workers, per_host=args.per_host,
+                            dedupe=False, metrics=metrics, store=True, parse_workers=args.parse_workers):
+        if ev["type"] == "search" and ev.get("stored"): stored += 1
+        elif ev["type"] == "day": days_done += 1
+    log(f"[크롤] 새로 수집 {days_done - stored}일 / 저장소 재사용 {stored}일 → {os.path.abspath(STORE_DB)}")
+    return 0
+
+def cmd_search(args):
+    """수집하며 쌓은 전문 검색 색인에서 기사를 찾는다(네트워크 없음)."""
+    if not os.path.exists(args.db):
+        print(f"검색 색인이 없습니다: {os.path.abspath(args.db)} (run/crawl로 먼저 수집하세요)", file=sys.stderr)
+        return 1
+    index = SearchIndex(args.db)
+    t0 = time.perf_counter()
+    hits = index.search(" ".join(args.query), date_from=args.date_from, date_to=args.date_to,
+                        publishers=_split_terms(args.publisher), terms=_split_terms(args.term), limit=args.limit)
+    ms = (time.perf_counter() - t0)*1000
+    for h in hits:
+        if args.json: print(json.dumps(h, ensure_ascii=False))
+        else: print(f"{h['day']}  {h['publisher']}  {h['title']}  {h['url']}")
+    print(f"[검색] {len(hits)}건 / 색인 {index.count()}건 / {ms:.1f}ms", file=sys.stderr)
+    index.close()
+    return 0
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="News_scaper", description="대한민국 에너지 뉴스 스크랩 (헤드리스 실행)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("run", help="뉴스를 수집해 엑셀(.xlsx)과 HTML 코드(.txt)로 저장")
+    p.add_argument("--days", type=int, default=7, help="최근 N일(오늘 포함), 기본 7")
+    p.add_argument("--per-day", type=int, default=5, help="일자별 최대 건수, 기본 5")
+    p.add_argument("--cand-cap", type=int, default=40, help="일자별 후보 파싱 상한, 기본 40")
+    p.add_argument("--terms", default=",".join(BASE_PRIORITY_TERMS), help="우선 키워드(쉼표 구분)")
+    p.add_argument("--custom", default="",
+                   help=f"사용자 직접 입력 키워드(쉼표 구분, 점수 가중치 기본 {CUSTOM_TERM_WEIGHT}, 예: 한전:2,송전망)")
+    p.add_argument("--out", default="./outputs", help="저장 폴더, 기본 ./outputs")
+    p.add_argument("--name", default=None, help="저장 파일명(확장자 없이), 기본 에너지뉴스_YYYYmmdd_HHMMSS")
+    p.add_argument("--workers", type=int, default=FETCH_WORKERS, help="전역 동시 요청 상한")
+    p.add_argument("--per-host", type=int, default=PER_HOST_LIMIT, help="호스트별 동시 요청 상한")
+    p.add_argument("--parse-workers", type=int, default=PARSE_WORKERS,
+                   help=f"기사 파싱 프로세스 수(0이면 수집 스레드에서), 기본 {PARSE_WORKERS}(코어 수-1)")
+    p.add_argument("--no-cache", action="store_true", help="기사 디스크 캐시를 쓰지 않음")
+    p.add_argument("--max-kb", type=int, default=FETCH_MAX_BYTES//1024, help="기사 1건당 읽는 본문 상한(KB), 0이면 무제한")
+    p.add_argument("--no-dedupe", action="store_true", help="일자 간/전재 기사 중복 제거 끄기")
+    p.add_argument("--dedupe-history", action="store_true",
+                   help=f"최근 {DEDUPE_TTL_DAYS}일 동안 뽑은 기사를 기억해 다음 실행에서 다시 뽑지 않음")
+    p.add_argument("--eager", action="store_true", help="상위 per_day가 확정돼도 후보를 전부 수집(지연 수집 끄기)")
+    p.add_argument("--lazy-slack", type=int, default=None,
+                   help="지연 수집 시 후보 점수 여유분(기본: 제목/URL에 없는 키워드 가중치 합 = 결과 동일)")
+    p.add_argument("--formats", default=",".join(EXPORT_FORMATS),
+                   help=f"저장 형식(쉼표 구분, {'/'.join(EXPORT_FORMATS + tuple(OPTIONAL_EXPORT_FORMATS))}),"
+                        f" 기본 {','.join(EXPORT_FORMATS)}. parquet은 pyarrow 설치 시")
+    p.add_argument("--no-metrics", action="store_true", help="실행 지표(.metrics.json, .prom) 저장 안 함")
+    p.add_argument("--prom", default=None, help="Prometheus 텍스트 파일 경로(node_exporter textfile 수집기용), 기본 저장 폴더/{이름}.prom")
+    p.add_argument("--log-file", default=LOG_FILE, help="이벤트 기록(JSONL, 크기별로 돌림) 경로, 빈 문자열이면 기록 안 함")
+    p.add_argument("--no-store", action="store_true", help="일자별 후보 저장소를 쓰지 않고 모든 일자를 새로 수집")
+    p.add_argument("-q", "--quiet", action="store_true", help="진행 로그/막대 출력 끄기")
+    p.set_defaults(func=cmd_run)
+    c = sub.add_parser("crawl", help="증분 수집: 확정 안 된 최근 일자만 긁어 일자별 후보 저장소에 저장(매일 실행용)")
+    c.add_argument("--days", type=int, default=2, help="최근 N일(오늘 포함), 기본 2(어제 확정 + 오늘)")
+    c.add_argument("--per-day", type=int, default=STORE_PER_DAY, help=f"일자별로 확정해 둘 상위 건수, 기본 {STORE_PER_DAY}")
+    c.add_argument("--cand-cap", type=int, default=40, help="일자별 후보 파싱 상한(run과 같아야 재사용), 기본 40")
+    c.add_argument("--terms", default=",".join(BASE_PRIORITY_TERMS), help="우선 키워드(쉼표 구분, run과 같아야 재사용)")
+    c.add_argument("--custom", default="", help="사용자 직접 입력 키워드(쉼표 구분, \"용어:가중치\" 가능, run과 같아야 재사용)")
+    c.add_argument("--workers", type=int, default=FETCH_WORKERS, help="전역 동시 요청 상한")
+    c.add_argument("--per-host", type=int, default=PER_HOST_LIMIT, help="호스트별 동시 요청 상한")
+    c.add_argument("--parse-workers", type=int, default=PARSE_WORKERS, help="기사 파싱 프로세스 수(0이면 수집 스레드에서)")
+    c.add_argument("--log-file", default=LOG_FILE, help="이벤트 기록(JSONL) 경로, 빈 문자열이면 기록 안 함")
+    c.add_argument("-q", "--quiet", action="store_true", help="진행 로그 출력 끄기")
+    c.set_defaults(func=cmd_crawl)
+    s = sub.add_parser("search", help="수집한 기사 전문 검색(제목/요약/본문, 색인은 run/crawl이 자동으로 쌓음)")
+    s.add_argument("query", nargs="*", help="검색어(공백으로 나눈 단어를 모두 포함), 비우면 필터만 적용")
+    s.add_argument("--from", dest="date_from", type=date.fromisoformat, default=None, help="시작 일자 YYYY-MM-DD")
+    s.add_argument("--to", dest="date_to", type=date.fromisoformat, default=None, help="끝 일자 YYYY-MM-DD")
+    s.add_argument("--publisher", default="", help="매체명(쉼표 구분, 예: 전자신문,연합뉴스)")
+    s.add_argument("--term", default="", help="우선 키워드 필터(쉼표 구분, 하나라도 들어 있는 기사)")
+    s.add_argument("--limit", type=int, default=SEARCH_LIMIT, help=f"결과 건수, 기본 {SEARCH_LIMIT}")
+    s.add_argument("--db", default=SEARCH_DB, help="검색 색인 경로")
+    s.add_argument("--json", action="store_true", help="결과를 JSON 한 줄씩 출력")
+    s.set_defaults(func=cmd_search)
+    args = ap.parse_args(argv)
+    return args.func(args)
+
+# -------------------- 결과 보관(Streamlit 재실행용) --------------------
+def result_key(selected_terms, custom_terms, per_day, days, cand_cap, store=True, day=None):
+    """
+    실행 조건 → 결과 저장소 키. 같은 날(KST) 같은 조건이면 같은 키.
+    저장 폴더/파일명/형식은 넣지 않는다(결과 행은 같다). 합류한 요청의 파일은 JobRunner가 따로 기록한다.
+    """
+    day = day or datetime.now(tz=KST).date()
+    return json.dumps([sorted(selected_terms or []), list(custom_terms or []), int(per_day), int(days), int(cand_cap),
+                       bool(store), day.isoformat()], ensure_ascii=False)
+
+class ResultStore:
+    """
+    실행 결과(행/DataFrame/HTML/내보내기 바이트/지표)를 실행 조건 키로 메모리에 보관한다.
+    Streamlit은 위젯을 누를 때마다 스크립트를 처음부터 다시 실행하므로 결과 화면은 여기서 꺼내 그린다.
+    ttl_hours가 지난 결과는 버리고, max_entries를 넘으면 가장 오래 안 본 결과부터 버린다(LRU).
+    cache_resource로 세션 간에 공유되므로 잠금으로 보호한다.
+    """
+    def __init__(self, ttl_hours=RESULTS_TTL_HOURS, max_entries=RESULTS_MAX_ENTRIES):
+        self.ttl_secs = ttl_hours*3600; self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._items = OrderedDict()  # key → (저장 시각, 결과 dict)
+
+    def get(self, key):
+        if key is None: return None
+        with self._lock:
+            hit = self._items.get(key)
+            if hit is None: return None
+            if time.time() - hit[0] > self.ttl_secs:
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return hit[1]
+
+    def put(self, key, result):
+        with self._lock:
+            self._items[key] = (time.time(), result)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+def _shared_result_store():
+    return ResultStore()
+
+# -------------------- 백그라운드 작업(Streamlit 스크립트 실행과 분리) --------------------
+class Job:
+    """백그라운드 수집 작업 1건. 상태 필드는 작업 스레드만 쓰고 화면은 읽기만 한다."""
+    def __init__(self, key, params):
+        self.id = os.urandom(6).hex()
+        self.key, self.params = key, params
+        self.state = "queued"   # queued → running → done | failed | cancelled
+        self.status = "대기 중"
+        self.done = self.total = 0
+        self.live_rows = []     # 확정된 일자의 행(최종 셔플 전)
+        self.targets = []       # 요청별 저장 위치 (save_dir, save_name, formats). JobRunner 잠금 아래에서만 바꾼다
+        self.error = None
+        self.watchers = 1       # 이 작업에 합류한 요청 수
+        self.created, self.started, self.finished = time.time(), None, None
+        self.bus = EventBus(name=f"job-{self.id}", path=LOG_FILE)
+        self._cancel = threading.Event()
+
+    @property
+    def active(self): return self.state in ("queued", "running")
+
+    @property
+    def fraction(self):
+        if self.state == "done": return 1.0
+        return min(self.done / self.total, 1.0) if self.total else 0.0
+
+    def cancel(self): self._cancel.set()
+
+class JobRunner:
+    """
+    수집 파이프라인을 Streamlit 스크립트 실행과 분리해 백그라운드 스레드(JOB_WORKERS개)에서 돌린다.
+    탭을 닫거나 화면이 다시 실행돼도 작업은 계속되고, 화면은 get(job_id)로 상태/진행도/로그 버스를 읽어 간다.
+    - 같은 키(result_key)의 작업이 대기/실행 중이면 새로 만들지 않고 그 작업에 합류시킨다.
+      합류한 요청의 저장 위치/형식도 기억해 두었다가 작업이 끝날 때 각각 기록한다
+    - 끝난 결과는 ResultStore에 넣으므로 다른 세션도 같은 조건으로 실행하면 바로 본다
+    """
+    def __init__(self, store, workers=JOB_WORKERS):
+        self.store = store
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()  # id → Job
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="news-job")
+
+    def submit(self, key, params):
+        """
+        (job, 합류 여부)를 돌려준다.
+        params: iter_pipeline 인자(selected_terms, custom_terms, per_day, days, cand_cap …) + save_dir, save_name, formats.
+        """
+        params = dict(params)
+        target = (params.pop("save_dir"), params.pop("save_name"), tuple(params.pop("formats")))
+        with self._lock:
+            for job in self._jobs.values():
+                if job.key == key and job.active:
+                    job.watchers += 1
+                    job.targets.append(target)
+                    return job, True
+            job = Job(key, params)
+            job.targets.append(target)
+            self._jobs[job.id] = job
+            finished = [j for j in self._jobs.values() if not j.active]
+            for j in finished[:max(0, len(finished) - JOB_HISTORY)]:
+                self._jobs.pop(j.id)
+        self._pool.submit(self._execute, job)
+        return job, False
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _execute(self, job):
+        use_log_bus(job.bus)
+        if job._cancel.is_set():
+            job.state, job.finished = "cancelled", time.time()
+            return
+        job.state, job.started = "running", time.time()
+        metrics = Metrics()
+        log("[시작] 파이프라인 실행")
+        job.status = f"[검색] {job.params.get('days', 7)}일치 뉴스 검색 중…"
+        events = iter_pipeline(**job.params, metrics=metrics)
+        try:
+            for ev in events:
+                if job._cancel.is_set():
+                    events.close()  # 남은 수집 취소
+                    job.state = "cancelled"; job.status = "중단됨"
+                    log("[작업] 중단됨", level="warning")
+                    return
+                if ev["type"] == "article":
+                    job.done, job.total = ev["done"], ev["total"]
+                    job.status = f"[파싱] {ev['day']} {ev['done']}/{ev['total']}"
+                elif ev["type"] == "day":
+                    job.live_rows = job.live_rows + ev["rows"]  # 화면이 읽는 중인 목록은 건드리지 않는다
+                    log(f"[일자 확정] {ev['day']} {len(ev['rows'])}건")
+                elif ev["type"] == "done":
+                    rows, sheet_name = ev["rows"], ev["sheet_name"]
+            log("[완료] 파이프라인 종료")
+            job.status = "[저장] 내보내는 중…"
+            df_out = rows_to_frame(rows)
+            exports, written = {}, 0
+            while True:
+                # 내보내는 사이에 합류한 요청이 있으면 그 파일도 마저 쓴다. 완료 표시는 잠금 아래에서(이후엔 합류 없음)
+                with self._lock:
+                    todo = job.targets[written:]; written = len(job.targets)
+                    if not todo:
+                        job.state, job.status = "done", "완료!"
+                        break
+                for save_dir, save_name, formats in todo:
+                    missing = [f for f in formats if f not in exports]
+                    exports.update(build_exports(rows, sheet_name, formats=missing, df=df_out, metrics=metrics))
+                    try: os.makedirs(save_dir, exist_ok=True)
+                    except OSError as e: log(f"[저장] 폴더 생성 실패: {e}", level="warning")
+                    save_exports({f: exports[f] for f in formats if f in exports}, save_dir, save_name, metrics=metrics)
+                if written == len(todo):  # 첫 묶음: 화면용 결과(다운로드 바이트 포함)를 보관. 파일명은 처음 요청의 것
+                    self.store.put(job.key, {"rows": rows, "df_out": df_out, "sheet_name": sheet_name,
+                                             "html_txt": exports["txt"].decode("utf-8"), "exports": dict(exports),
+                                             "preview": preview_frame(rows), "save_name": todo[0][1],
+                                             "metrics": metrics.report(), "prom": metrics.prometheus(),
+                                             "created": datetime.now(tz=KST)})
+        except Exception as e:
+            job.state, job.error = "failed", f"{type(e).__name__}: {e}"
+            job.status = "실패"
+            log(f"[작업 실패] {job.error}", level="error")
+        finally:
+            job.finished = time.time()
+
+def _shared_job_runner(_store):
+    return JobRunner(_store)
+
+# -------------------- GUI (Tk 기능 이식) --------------------
+def render_app():
+    import streamlit as st
+    from uuid import uuid4
+
+    st.set_page_config(page_title="대한민국 에너지 뉴스 스크랩", layout="wide")
+    st.title("대한민국 에너지 뉴스 스크랩 (Streamlit GUI 확장판)")
+    # 프로세스 전체에서 하나(cache_resource): 재실행·다른 세션도 같은 저장소를 본다
+    store = st.cache_resource(show_spinner=False)(_shared_result_store)()
+    runner = st.cache_resource(show_spinner=False)(_shared_job_runner)(store)
+
+    # 세션마다 고유한 로그 위젯 키와 이벤트 버스를 한 번만 만든다(버스는 수집 스레드도 같이 쓴다)
+    if "logs_widget_key" not in st.session_state:
+        st.session_state.logs_widget_key = f"logs_text_area_{uuid4().hex}"
+    if "log_bus" not in st.session_state:
+        st.session_state.log_bus = EventBus(name=uuid4().hex[:8], path=LOG_FILE)
+        st.session_state.log_view = {"seq": 0, "level": "info", "lines": deque(maxlen=LOG_VIEW_LINES), "drawn": 0.0}
+    bus, log_view = st.session_state.log_bus, st.session_state.log_view
+    use_log_bus(bus)
+
+    tab_collect, tab_search = st.tabs(["뉴스 수집", "기사 검색"])
+    with tab_search:
+        render_search_tab()
+    with tab_collect:
+        _render_collect_tab(store, runner, bus, log_view)
+
+def _render_collect_tab(store, runner, bus, log_view):
+    import streamlit as st
+    import pandas as pd
+
+    left, right = st.columns([1.1,1])
+
+    with left:
+        st.markdown("#### 우선 키워드")
+        selected = st.multiselect("체크/해제", BASE_PRIORITY_TERMS, default=BASE_PRIORITY_TERMS)
+        custom_raw = st.text_input("사용자 직접 입력 키워드(쉼표로 구분)", placeholder="예: 전력거래소, 한전:2, 송전망, 재생에너지",
+                                   help=f"우선 점수에도 들어갑니다(기본 가중치 {CUSTOM_TERM_WEIGHT}). '용어:가중치'로 따로 지정")
+
+        c1, c2, c3 = st.columns(3)
+        with c1:
+            per_day = st.number_input("일자별 최대 건수", 1, 20, 5, 1)
+        with c2:
+            days = st.number_input("최근 N일(오늘 포함)", 1, 14, 7, 1)
+        with c3:
+            cand_cap = st.number_input("일자별 후보 파싱 상한", 10, 200, 40, 10)
+
+        st.markdown("#### 저장 설정")
+        dir_options = list_save_dir_options()
+        dir_labels = [lab for lab, _ in dir_options]
+    
+        # 기본 선택은 ./outputs (없으면 첫 번째 옵션)
+        default_idx = 0
+        for i, (lab, p) in enumerate(dir_options):
+            if os.path.abspath(p) == os.path.abspath(os.path.expanduser("./outputs")):
+                default_idx = i
+                break
+
+        selected_label = st.selectbox("저장 폴더 선택", dir_labels, index=default_idx)
+        extra_formats = st.multiselect("추가 저장 형식(분석용)", [f for f in available_export_formats() if f not in ("xlsx", "txt")],
+                                       default=[f for f in EXPORT_FORMATS if f not in ("xlsx", "txt")])
+        # 선택된 경로
+        save_dir = dict(dir_options)[selected_label]
+    
+        save_name = st.text_input(
+            "저장 파일명(확장자 없이)",
+            value=f"에너지뉴스_{datetime.now(tz=KST).strftime('%Y%m%d_%H%M%S')}"
+        )
+
+
+        run = st.button("실행", type="primary")
+        fresh = st.checkbox("저장된 결과가 있어도 새로 수집", value=False)
+        use_store = st.checkbox("확정된 지난 일자는 저장소에서 재사용(증분)", value=True,
+                                help="crawl 명령이나 이전 실행이 확정해 둔 일자는 다시 긁지 않습니다. 오늘은 항상 새로 수집")
+        reset = st.button("초기화")
+
+    with right:
+        panel = st.container()  # 진행도/로그(작업 중에는 주기적으로 다시 그리는 fragment)
+        log_level = st.selectbox("로그 수준", ("info", "debug", "warning"), key="log_level",
+                                 help="debug: 기사별 처리 시간/HTTP 재시도까지 표시")
+        st.caption(f"전체 이벤트 기록(JSONL): {os.path.abspath(LOG_FILE)}")
+
+    def reset_log_view(view_bus):
+        log_view.update(seq=0, level=log_level, bus=view_bus.name, drawn=0.0); log_view["lines"].clear()
+
+    if reset:
+        bus.clear()
+        st.session_state.pop("result_key", None)
+        st.session_state.pop("job_id", None)
+
+    # -------------------- 실행(백그라운드 작업) --------------------
+    custom_terms = [s.strip() for s in (custom_raw or "").split(",") if s.strip()]
+    key = result_key(selected, custom_terms, per_day, days, cand_cap, store=use_store)
+    if run and not fresh and store.get(key) is not None:
+        # 오늘 같은 조건으로 이미 수집한 결과가 있으면 다시 긁지 않는다
+        st.session_state.result_key = key
+        st.session_state.pop("job_id", None)
+        log("[결과] 같은 조건의 저장된 결과를 표시합니다 (새로 수집하려면 체크 후 실행)")
+        run = False
+
+    if run:
+        # 수집은 작업 스레드에서: 탭을 닫거나 다시 실행돼도 끊기지 않고, 같은 조건의 동시 요청은 한 작업으로 합친다
+        job, joined = runner.submit(key, dict(
+            selected_terms=set(selected), custom_terms=custom_terms,
+            per_day=int(per_day), days=int(days), cand_cap=int(cand_cap), store=use_store,
+            save_dir=save_dir, save_name=save_name, formats=("xlsx", "txt", *extra_formats)))
+        if joined:
+            job.bus.publish("[작업] 같은 조건의 작업이 이미 진행 중이라 그 작업에 합류합니다")
+        st.session_state.job_id = job.id
+        st.session_state.pop("result_key", None)
+
+    job = runner.get(st.session_state.get("job_id"))
+    view_bus = job.bus if job else bus  # 작업을 보고 있으면 그 작업의 로그를 보여준다
+    if log_view.get("bus") != view_bus.name or log_view["level"] != log_level:
+        reset_log_view(view_bus)
+
+    def write_logs():
+        # 마지막으로 본 뒤의 이벤트만 받아 화면용 줄 목록에 덧붙인다(전체 버퍼를 다시 포맷하지 않음)
+        new = view_bus.since(log_view["seq"], level=log_level)
+        if new:
+            log_view["seq"] = new[-1]["seq"]
+            log_view["lines"].extend(format_event(e) for e in new)
+        # 로그 자리를 매번 새 위젯으로 그린다. 같은 세션에서 여러 번 그리므로 key에 순번을 붙여 중복 key를 피한다.
+        st.session_state.logs_renders = st.session_state.get("logs_renders", 0) + 1
+        st.text_area(
+            "실시간 로그",
+            value="\n".join(log_view["lines"]),
+            height=260,
+            key=f"{st.session_state.logs_widget_key}_{st.session_state.logs_renders}",
+            disabled=True
+        )
+
+    @st.fragment(run_every=JOB_POLL_SECS if job and job.active else None)
+    def activity_panel():
+        st.markdown("#### 진행도")
+        if job is None:
+            st.progress(0.0)
+        else:
+            st.progress(job.fraction, text=job.status)
+            if job.state == "failed":
+                st.error(f"수집 작업이 실패했습니다: {job.error}")
+            elif job.state == "cancelled":
+                st.warning("수집 작업이 중단되었습니다.")
+            elif job.active:
+                elapsed = time.time() - (job.started or job.created)
+                st.caption(f"작업 {job.id} · {'대기 중' if job.state == 'queued' else '실행 중'} {elapsed:.0f}초"
+                           f" · 같은 조건 요청 {job.watchers}건 (탭을 닫아도 계속됩니다)")
+                if st.button("작업 중단", key="job_cancel"):
+                    job.cancel()
+        st.markdown("#### 로그")
+        write_logs()
+        if job is not None and job.active and job.live_rows:
+            # 일자가 확정되는 대로 표에 이어 붙인다(최종 셔플/순번 부여 전의 중간 결과)
+            st.markdown(f"#### 수집 중 결과 (일자 확정 순, {len(job.live_rows)}건)")
+            st.dataframe(pd.DataFrame([{"일자": r[6], "제목": r[2], "기자": r[5], "링크": r[3]} for r in job.live_rows]),
+                         use_container_width=True, hide_index=True, height=260)
+        if job is not None and job.state == "done" and st.session_state.get("result_key") != job.key:
+            st.session_state.result_key = job.key
+            st.rerun()  # 결과 화면 전체를 다시 그린다
+        elif job is not None and not job.active and st.session_state.get("job_polling"):
+            st.session_state.job_polling = False
+            st.rerun()  # 실패/중단: 주기적 갱신을 멈춘다
+        else:
+            st.session_state.job_polling = bool(job and job.active)
+
+    with panel:
+        activity_panel()
+
+    # -------------------- 결과 표시 --------------------
+    # 실행 직후뿐 아니라 버튼/대화상자로 인한 재실행 때도 저장소의 결과로 다시 그린다
+    result = store.get(st.session_state.get("result_key"))
+    if st.session_state.get("result_key") and result is None:
+        st.info("저장된 결과가 만료되었습니다. 다시 실행하세요.")
+        st.session_state.pop("result_key", None)
+    if result is not None:
+        rows, sheet_name, html_txt = result["rows"], result["sheet_name"], result["html_txt"]
+        save_name, report = result["save_name"], result["metrics"]
+        st.caption(f"수집 시각 {result['created'].strftime('%Y-%m-%d %H:%M:%S')} · {len(rows)}건 · 시트 {sheet_name}")
+
+        # 다운로드 버튼(실행 때 만든 바이트 그대로)
+        labels = {"xlsx": "엑셀 다운로드 (.xlsx)", "txt": "HTML 코드 다운로드 (.txt)"}
+        exports = result["exports"]
+        for col, fmt in zip(st.columns(len(exports)), exports):
+            with col:
+                st.download_button(labels.get(fmt, f"{fmt.upper()} 다운로드"), data=exports[fmt],
+                    file_name=f"{save_name}.{fmt}", mime=EXPORT_MIME[fmt], key=f"dl_export_{fmt}")
+
+        # 실행 지표: 단계별 시간, 호스트별 지연, 카운터
+        with st.expander(f"실행 지표 (총 {report['wall_s']:.1f}초)"):
+            cnt = report["counters"]
+            m1, m2, m3, m4 = st.columns(4)
+            m1.metric("HTTP 요청", cnt.get("http_requests", 0), f"재시도 {cnt.get('http_retries', 0)}", delta_color="off")
+            m2.metric("수신", f"{cnt.get('bytes_read', 0)/1024/1024:.1f} MB")
+            m3.metric("후보 수집", f"{cnt.get('candidates_fetched', 0)}/{cnt.get('candidates', 0)}")
+            m4.metric("캐시 적중", cnt.get("cache_hits", 0))
+            st.markdown("**단계별 소요 시간**")
+            st.dataframe(pd.DataFrame([{"단계": k, "횟수": s["count"], "합계(초)": round(s["total_s"], 2), "평균(ms)": s["mean_ms"],
+                                        "p95(ms)": s["p95_ms"], "최대(ms)": s["max_ms"]}
+                                       for k, s in sorted(report["stages"].items(), key=lambda kv: -kv[1]["total_s"])]),
+                         use_container_width=True, hide_index=True)
+            st.markdown("**호스트별 응답 지연 (상위 15, 합계 순)**")
+            st.dataframe(pd.DataFrame([{"호스트": k, "요청": s["count"], "p50(ms)": s["p50_ms"], "p95(ms)": s["p95_ms"],
+                                        "최대(ms)": s["max_ms"], "합계(초)": round(s["total_s"], 2)}
+                                       for k, s in sorted(report["hosts"].items(), key=lambda kv: -kv[1]["total_s"])[:15]]),
+                         use_container_width=True, hide_index=True)
+            st.markdown("**카운터**")
+            st.json(cnt, expanded=False)
+            k1, k2 = st.columns(2)
+            k1.download_button("지표 JSON", json.dumps(report, ensure_ascii=False, indent=1).encode("utf-8"),
+                               file_name=f"{save_name}.metrics.json", mime="application/json")
+            k2.download_button("Prometheus 텍스트", result["prom"].encode("utf-8"),
+                               file_name=f"{save_name}.prom", mime="text/plain; charset=utf-8")
+
+        st.divider()
+
+        # ===== 결과 목록(페이지 단위) + 선택한 기사 미리보기 =====
+        # 행마다 버튼을 만들지 않는다: 현재 페이지만 담은 표 하나와 미리보기 창 하나만 그린다
+        st.subheader(f"수집 결과 ({len(rows)}건)")
+        table = result["preview"]
+        p1, p2, _ = st.columns([0.2, 0.2, 0.6])
+        with p1:
+            page_size = st.selectbox("페이지당 행 수", (20, 50, 100), key="results_page_size")
+        pages = max(1, -(-len(table) // page_size))
+        if st.session_state.get("results_page", 1) > pages:
+            st.session_state.results_page = 1
+        with p2:
+            page = st.number_input(f"페이지 (전체 {pages})", min_value=1, max_value=pages, step=1, key="results_page")
+        page_df = table.iloc[(page-1)*page_size : page*page_size]
+
+        t_col, v_col = st.columns([1.25, 1])
+        with t_col:
+            event = st.dataframe(
+                page_df, use_container_width=True, hide_index=True, height=min(36*(len(page_df)+1)+3, 740),
+                column_config={"링크": st.column_config.LinkColumn("링크")},
+                on_select="rerun", selection_mode="single-row",
+                key=f"results_table_{result['created'].timestamp():.0f}_{page}_{page_size}")
+        with v_col:
+            picked = event.selection.rows if event is not None else []
+            if not picked:
+                st.caption("표에서 행을 선택하면 여기에 기사 미리보기가 나옵니다.")
+            else:
+                r = rows[page_df.index[picked[0]]]
+                idx, title, url = r[1], r[2] or "(제목 없음)", r[3]
+                item_html = build_item_html_from_row(r, idx)
+                st.write(f"**{idx}. {title}**")
+                b1, b2 = st.columns(2)
+                with b1:
+                    if url: st.link_button("원문 열기", url, use_container_width=True)
+                    else: st.button("원문 없음", disabled=True, use_container_width=True)
+                with b2:
+                    # 파일명은 '순번_YYYYMMDD_제목앞몇자' 형태
+                    safe_title = re.sub(r"[^\w\-가-힣]+", "_", title)[:20] or "no_title"
+                    fname = f"{idx}_{result['created'].strftime('%Y%m%d')}_{safe_title}"
+                    st.download_button("HTML 코드 .txt", data=item_html.encode("utf-8"), file_name=f"{fname}.txt",
+                                       mime="text/plain; charset=utf-8", use_container_width=True, key="dl_item_code")
+                tab_view, tab_code = st.tabs(["미리보기", "HTML 코드"])
+                with tab_view:
+                    st.components.v1.html(item_html, height=420, scrolling=True)
+                with tab_code:
+                    st.code(item_html, language="html")
+
+        st.divider()
+
+        # HTML 코드 미리보기(렌더 + 코드)
+        with st.expander("전체 HTML 미리보기 (렌더 / 코드)"):
+            tab_view, tab_code = st.tabs(["렌더", "코드 (txt)"])
+            with tab_view:
+                st.components.v1.html(html_txt, height=600, scrolling=True)
+            with tab_code:
+                st.code(html_txt, language="html")
+
+def render_search_tab():
+    """수집하며 쌓은 기사 전문 검색. 검색어/필터를 바꿀 때마다 색인에서 바로 찾는다(네트워크 없음)."""
+    import streamlit as st
+    import pandas as pd
+
+    try:
+        index = st.cache_resource(show_spinner=False)(_shared_search_index)()
+    except (OSError, sqlite3.Error) as e:
+        st.error(f"검색 색인을 열 수 없습니다: {e}")
+        return
+    total = index.count()
+    if not total:
+        st.info("아직 색인된 기사가 없습니다. 수집을 실행하면 판정을 통과한 기사가 자동으로 색인됩니다.")
+        return
+    query = st.text_input("검색어", placeholder="예: 분산에너지 계통 (공백으로 나눈 단어를 모두 포함)", key="fts_query")
+    today = datetime.now(tz=KST).date()
+    counts = dict(index.publishers())
+    term_options = list({t.lower(): t for t in PRIORITY_TERMS_WEIGHTS}.values())  # idrs/iDRS는 하나로
+    f1, f2, f3, f4 = st.columns([1, 1.2, 1.2, 0.5])
+    with f1:
+        period = st.date_input("기간", value=(today - timedelta(days=30), today), key="fts_period")
+    with f2:
+        publishers = st.multiselect("매체", list(counts), format_func=lambda p: f"{p} ({counts[p]})", key="fts_publishers")
+    with f3:
+        terms = st.multiselect("우선 키워드(하나라도 포함)", term_options, key="fts_terms")
+    with f4:
+        limit = st.selectbox("건수", (50, 100, 200), key="fts_limit")
+    date_from, date_to = (tuple(period) + (None, None))[:2] if isinstance(period, (tuple, list)) else (period, period)
+
+    t0 = time.perf_counter()
+    hits = index.search(query, date_from=date_from, date_to=date_to, publishers=publishers, terms=terms, limit=limit)
+    st.caption(f"{len(hits)}건 · {(time.perf_counter() - t0)*1000:.1f}ms · 색인 {total:,}건"
+               + ("" if query.strip() else " · 검색어가 없으면 최신 일자순"))
+    if hits:
+        st.dataframe(pd.DataFrame([{"일자": h["day"], "매체": h["publisher"], "제목": h["title"], "요약": h["summary"],
+                                    "링크": h["url"]} for h in hits]),
+                     use_container_width=True, hide_index=True, height=min(36*(len(hits)+1)+3, 740),
+                     column_config={"링크": st.column_config.LinkColumn("링크")})
+
+
+if __name__ == "__main__":
+    if running_in_streamlit():
+        render_app()
+    else:
+        sys.exit(main())
@@ -0,0 +1,544 @@
+# ===== News_scaper 추출 단계 벤치마크 =====
+# 사용법:
+#   python benchmarks/bench_scaper.py parse-once [--dir benchmarks/fixtures/articles] [--repeat 20]
+#   python benchmarks/bench_scaper.py authors [--repeat 20] [--record]
+#   python benchmarks/bench_scaper.py charset [--dir benchmarks/fixtures/articles] [--repeat 20]
+#   python benchmarks/bench_scaper.py suite [--repeat 15] [--tolerance 0.3] [--save-baseline] [--only 이름]
+#   python benchmarks/bench_scaper.py fulltext [--docs 30000] [--repeat 20]
+#   python benchmarks/bench_scaper.py parse-pool [--docs 400] [--workers 0,2,4]
+#   python benchmarks/bench_scaper.py terms [--extra 0,20,100,400] [--repeat 2000]
+#   python benchmarks/bench_scaper.py gnews [--opaque 1000] [--repeat 20]
+#   python benchmarks/bench_scaper.py lazy [--trials 500] [--per-day 2,5] [--opaque 0,0.3,1] [--slack N]
+#
+# parse-once: 기사 1건당 CPU 시간을 두 방식으로 비교한다.
+#   legacy - BeautifulSoup 트리 + readability에 원문 문자열(재파싱) + 본문 HTML 재파싱 (이전 방식)
+#   single - parse_html로 만든 lxml 트리 하나를 모든 추출기가 공유 (현재 방식)
+# authors: 단일 순회 기자 추출기가 이전 선택자 순회 방식과 같은 후보/결과를 내는지
+#   fixtures/authors_expected.json(회귀 코퍼스 기대값)과 대조하고, 두 방식의 시간을 비교한다.
+#   --record 는 이전 방식의 결과로 기대값을 다시 기록한다(코퍼스에 케이스를 추가했을 때).
+# charset: 응답 헤더 3가지(charset 있음 / "text/html"만 / Content-Type 없음)마다 디코딩+파싱 CPU 시간과
+#   결과 텍스트가 원래 인코딩으로 읽은 것과 같은지를 비교한다.
+#   legacy - requests의 r.text 규칙(헤더 charset, text/*면 ISO-8859-1, 없으면 통계적 추정) → 문자열 파싱
+#   sniff  - sniff_charset(BOM/헤더/<meta>) → 바이트 그대로 parse_html
+# suite: 핫 함수를 문서 1건 단위로 잰다(CPU ms 최솟값, 초당 문서 수, tracemalloc 최대 할당 KB).
+#   tracemalloc은 파이썬 객체 할당만 본다(lxml/libxml2 트리의 C 메모리는 빠진다).
+#   검색/RSS는 네트워크를 뺀 파싱 본체(extract_google_news_items = parse_google_news_results의 파싱,
+#   extract_rss_items = parse_google_news_results_rss의 파싱)를 fixtures/search, fixtures/rss 로 잰다.
+#   benchmarks/baseline.json 과 비교해 시간이나 할당이 tolerance(기본 30%) 넘게 늘면 종료 코드 1.
+#   기준값은 기록한 기계에 묶이므로 다른 기계에서는 --save-baseline 으로 먼저 새로 기록한다.
+# fulltext: fixtures/articles 본문 문장 몇 개와 무작위 음절로 만든 낱말을 섞은 합성 기사 N건(1년치, PUB_NAME_MAP 매체)을
+#   임시 SearchIndex에 넣고, 색인 시간/파일 크기와 질의별 응답 시간(중앙값/최대, 검색어·기간·매체·키워드 필터 조합)을 잰다.
+# parse-pool: 수집 스레드 FETCH_WORKERS개가 RunContext.parse로 기사 N건(fixtures/articles 반복)을 동시에 파싱할 때의
+#   처리량을 parse_workers(0 = 스레드에서 직접, GIL에 묶임)별로 잰다. 프로세스 기동 시간은 따로 뺀다.
+# terms: 후보 1건의 키워드 점수/제외 판정(검색 카드 제목+URL, 기사 본문)을 방식별로 잰다.
+#   legacy - 용어마다 has_priority_term 식 부분 문자열 검색 + contains_excluded를 텍스트마다 따로(이전 방식)
+#   scan - TermMatcher(automaton=False).scan: 소문자 변환 1회 + 용어별 C 수준 검색
+#   ac - TermMatcher(automaton=True).scan: Aho-Corasick 한 번 훑기
+#   regex - re 대안(a|b|…) 한 번 훑기(참고용)
+#   --extra 로 사용자 키워드 수를 늘려 TERM_AUTOMATON_MIN(방식 전환 기준)이 맞는지 본다.
+# gnews: fixtures/rss 의 Google 뉴스 기사 링크가 네트워크 없이 몇 %나 해독되는지와, 링크 1건을 푸는 시간을
+#   경로별로 잰다(decode - 토큰 해독, hit - 해독 못 하는 AU_yqL 형식 토큰 N개를 넣어 둔 링크 캐시 적중).
+#   요청 경로(리디렉트 1회)는 네트워크라 재지 않는다.
+# lazy: Google 뉴스 토큰 링크(원문 호스트: 우선 매체/일반 매체, --opaque 비율만큼은 해독 불가 AU_yqL 형식)로 만든
+#   합성 RSS 일자를 DayPlan으로 지연 수집했을 때 고른 per_day건이 전부 받은 경우(eager)와 같은지와, 보낸 요청 수
+#   (끝난 수집 + 확정 때 취소된 진행 중 수집)가 후보 수보다 얼마나 적은지를 본다.
+#   기사 "수집"은 _detail_candidate와 같은 규칙(우선 매체 +20, 제목/요약/최종 URL 키워드)으로 점수만 매기고,
+#   모든 수집이 같은 시간이 걸린다고 보고 먼저 보낸 것부터 끝낸다.
+#   다르게 고른 시행이 있거나, 전부 해독되는 일자(opaque 0)에서 절약이 없으면 종료 코드 1.
+#   해독 안 되는 토큰은 우선 매체일 수 있어 상한이 최대라, opaque 1이면 기본 모드에서는 절약이 없는 게 정상이다.
+#   --slack 을 주면 그 여유분(--lazy-slack, 근사)으로 돌리고 다르게 고른 건수는 보고만 한다.
+# fixtures/articles 의 페이지는 국내 기사 페이지 구조를 본뜬 합성 샘플이다.
+# 실제로 저장한 기사 페이지(.html)를 같은 폴더에 넣으면 함께 측정된다.
+
+import os, sys, re, json, glob, time, argparse, platform, tracemalloc
+from datetime import date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+FIXTURES = os.path.join(ROOT, "benchmarks", "fixtures")
+BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+import News_scaper as ns
+from bs4 import BeautifulSoup
+from lxml import etree
+from lxml.cssselect import CSSSelector
+from readability import Document
+
+
+def read_page(path):
+    with open(path, "rb") as f:
+        raw = f.read()
+    return raw.decode(ns.sniff_charset(raw)[0], errors="replace"), raw
+
+def load_pages(folder):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(folder, "*.html"))):
+        text, raw = read_page(path)
+        pages.append((os.path.basename(path), text, len(raw)))
+    return pages
+
+
+# -------------------- 이전 방식(문서당 파싱 3~4회) --------------------
+def _legacy_authors(soup):
+    cands = []
+    for sel in [('meta', {'name': 'author'}), ('meta', {'property': 'article:author'}),
+                ('meta', {'name': 'parsely-author'}), ('meta', {'name': 'byl'})]:
+        tag = soup.find(*sel)
+        if tag and tag.get("content"): cands.append(tag["content"])
+    for sel in ns._AUTHOR_SELECTORS:
+        for el in soup.select(sel):
+            t = ns.clean_text(el.get_text(" "))
+            if t: cands.append(t)
+    for el in soup.find_all(True):
+        for attr in el.attrs:
+            if "author" in attr or "writer" in attr or "reporter" in attr:
+                val = el.get(attr)
+                if isinstance(val, str) and len(val) <= 40: cands.append(val)
+    return cands
+
+def legacy_extract(html_text):
+    soup = BeautifulSoup(html_text, "lxml")
+    jsonlds = []
+    for tag in soup.find_all("script", type="application/ld+json"):
+        try:
+            block = json.loads(tag.string or "")
+            jsonlds.extend(block if isinstance(block, list) else [block])
+        except Exception: pass
+    authors = ns.extract_authors_from_jsonld(jsonlds) or _legacy_authors(soup)
+    text = soup.get_text(" ", strip=True) or BeautifulSoup(html_text, "lxml").get_text(" ", strip=True)
+    is_ko = len(re.findall(r"[가-힣]", text)) >= 40
+    main_html = Document(html_text).summary()
+    main = ns.clean_text(BeautifulSoup(main_html, "lxml").get_text(" "))
+    return authors, is_ko, ns.concise_summary_from_text(main)
+
+
+# -------------------- 현재 방식(문서당 파싱 1회) --------------------
+def single_extract(html_text):
+    doc = ns.parse_html(html_text)
+    authors, published = ns.extract_authors_and_published(doc)
+    is_ko = ns.looks_korean_by_meta_and_text(doc)
+    return authors, is_ko, ns.extract_summary(doc)
+
+
+# -------------------- 기자 추출: 이전 선택자 순회(규칙마다 전체 트리 순회) --------------------
+_SWEEP_SELECTORS = [CSSSelector(sel) for sel in ns._AUTHOR_SELECTORS]
+
+def sweep_author_candidates(doc):
+    cands = []
+    for attr, value in ns._AUTHOR_META:
+        content = ns.meta_content(doc, attr, value)
+        if content: cands.append(content)
+    for sel in _SWEEP_SELECTORS:
+        for el in sel(doc):
+            t = ns.clean_text(ns.node_text(el))
+            if t: cands.append(t)
+    for el in doc.iter(etree.Element):
+        for attr, val in el.attrib.items():
+            if "author" in attr or "writer" in attr or "reporter" in attr:
+                if len(val) <= 40: cands.append(val)
+    return cands
+
+def sweep_authors(doc):
+    orig = ns._author_candidates
+    ns._author_candidates = sweep_author_candidates
+    try: return ns.extract_author_meta_and_dom(doc)
+    finally: ns._author_candidates = orig
+
+def author_corpus():
+    return sorted(glob.glob(os.path.join(FIXTURES, "authors", "*.html"))) + \
+           sorted(glob.glob(os.path.join(FIXTURES, "articles", "*.html")))
+
+
+def cpu_ms(fn, arg, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.process_time(); fn(arg); dt = time.process_time() - t0
+        best = min(best, dt)
+    return best * 1000
+
+def cmd_parse_once(args):
+    pages = load_pages(args.dir)
+    if not pages:
+        print(f"페이지 없음: {args.dir}"); return 1
+    print(f"{'page':<24}{'KB':>7}{'legacy ms':>12}{'single ms':>12}{'speedup':>9}")
+    tot_l = tot_s = 0.0
+    for name, html_text, size in pages:
+        ms_l = cpu_ms(legacy_extract, html_text, args.repeat)
+        ms_s = cpu_ms(single_extract, html_text, args.repeat)
+        tot_l += ms_l; tot_s += ms_s
+        print(f"{name:<24}{size/1024:>7.1f}{ms_l:>12.2f}{ms_s:>12.2f}{ms_l/ms_s:>8.2f}x")
+    print(f"{'TOTAL':<24}{'':>7}{tot_l:>12.2f}{tot_s:>12.2f}{tot_l/tot_s:>8.2f}x")
+    return 0
+
+
+def cmd_authors(args):
+    expected_path = os.path.join(FIXTURES, "authors_expected.json")
+    docs = []
+    for path in author_corpus():
+        docs.append((os.path.relpath(path, FIXTURES).replace(os.sep, "/"), read_page(path)[0]))
+    if args.record:
+        expected = {key: {"candidates": sweep_author_candidates(ns.parse_html(h)), "authors": sweep_authors(ns.parse_html(h))}
+                    for key, h in docs}
+        with open(expected_path, "w", encoding="utf-8") as f:
+            json.dump(expected, f, ensure_ascii=False, indent=1, sort_keys=True)
+        print(f"기대값 기록: {expected_path} ({len(expected)}건)"); return 0
+    with open(expected_path, encoding="utf-8") as f:
+        expected = json.load(f)
+    failures = 0
+    print(f"{'case':<36}{'sweep ms':>10}{'single ms':>11}{'speedup':>9}  parity")
+    for key, h in docs:
+        doc = ns.parse_html(h)
+        got = {"candidates": ns._author_candidates(doc), "authors": ns.extract_author_meta_and_dom(doc)}
+        ok = key in expected and got == expected[key]
+        failures += not ok
+        ms_w = cpu_ms(sweep_author_candidates, doc, args.repeat)
+        ms_s = cpu_ms(ns._author_candidates, doc, args.repeat)
+        print(f"{key:<36}{ms_w:>10.3f}{ms_s:>11.3f}{ms_w/max(ms_s,1e-6):>8.2f}x  {'OK' if ok else 'MISMATCH'}")
+        if not ok:
+            print(f"    expected: {expected.get(key)}\n    got:      {got}")
+    print(f"parity: {len(docs)-failures}/{len(docs)}")
+    return 1 if failures else 0
+
+
+# -------------------- 문자 인코딩: r.text 방식 vs sniff + 바이트 파싱 --------------------
+def legacy_decode_parse(raw, content_type):
+    import requests.utils
+    from requests.compat import chardet
+    enc = requests.utils.get_encoding_from_headers({"content-type": content_type}) if content_type else None
+    enc = enc or chardet.detect(raw)["encoding"] or "utf-8"
+    return ns.parse_html(str(raw, enc, errors="replace"))
+
+def sniff_decode_parse(raw, content_type):
+    enc, _ = ns.sniff_charset(raw, content_type)
+    return ns.parse_html(raw, enc)
+
+def cmd_charset(args):
+    paths = sorted(glob.glob(os.path.join(args.dir, "*.html")))
+    if not paths:
+        print(f"페이지 없음: {args.dir}"); return 1
+    print(f"{'page':<22}{'header':<28}{'legacy ms':>10}{'sniff ms':>10}{'speedup':>9}  legacy/sniff 텍스트")
+    tot_l = tot_s = 0.0; wrong = 0
+    for path in paths:
+        text, raw = read_page(path)
+        truth = ns.node_text(ns.parse_html(text))
+        true_cs = ns.sniff_charset(raw)[0]
+        for ct in (f"text/html; charset={'euc-kr' if true_cs == 'cp949' else true_cs}", "text/html", ""):
+            ms_l = cpu_ms(lambda r: legacy_decode_parse(r, ct), raw, args.repeat)
+            ms_s = cpu_ms(lambda r: sniff_decode_parse(r, ct), raw, args.repeat)
+            ok_l = ns.node_text(legacy_decode_parse(raw, ct)) == truth
+            ok_s = ns.node_text(sniff_decode_parse(raw, ct)) == truth
+            wrong += not ok_s
+            tot_l += ms_l; tot_s += ms_s
+            print(f"{os.path.basename(path):<22}{ct or '(없음)':<28}{ms_l:>10.2f}{ms_s:>10.2f}{ms_l/ms_s:>8.2f}x  "
+                  f"{'OK' if ok_l else '깨짐'}/{'OK' if ok_s else '깨짐'}")
+    print(f"{'TOTAL':<50}{tot_l:>10.2f}{tot_s:>10.2f}{tot_l/tot_s:>8.2f}x")
+    return 1 if wrong else 0
+
+
+# -------------------- 핫 함수 묶음(기준값 대비 회귀 검사) --------------------
+def _rss_target_date(raw):
+    m = re.search(rb"\d{4}-\d{2}-\d{2}", raw[:400])  # 피드 머리 주석의 기준일
+    return date.fromisoformat(m.group().decode()) if m else date.today()
+
+def suite_cases():
+    """
+    (함수 이름, 문서 이름, setup, fn). setup()이 만든 인자로 fn을 부르고 시간은 fn만 잰다.
+    readability가 트리를 바꾸므로 기사 추출기는 매번 새로 파싱한 트리를 받는다.
+    """
+    cases = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES, "search", "*.html"))):
+        text = read_page(path)[0]
+        cases.append(("extract_google_news_items", os.path.basename(path), lambda t=text: t,
+                      lambda t: ns.extract_google_news_items(BeautifulSoup(t, "lxml"))))
+    for path in sorted(glob.glob(os.path.join(FIXTURES, "rss", "*.xml"))):
+        with open(path, "rb") as f: raw = f.read()
+        d = _rss_target_date(raw)
+        cases.append(("extract_rss_items", os.path.basename(path), lambda r=raw: r, lambda r, d=d: ns.extract_rss_items(r, d)))
+    for path in sorted(glob.glob(os.path.join(FIXTURES, "articles", "*.html"))):
+        name = os.path.basename(path)
+        with open(path, "rb") as f: raw = f.read()
+        enc = ns.sniff_charset(raw)[0]
+        fresh = lambda r=raw, e=enc: ns.parse_html(r, e)
+        cases.append(("parse_html", name, lambda r=raw: r, lambda r, e=enc: ns.parse_html(r, e)))
+        for fn in (ns.extract_main_text, ns.extract_summary, ns.extract_author_meta_and_dom,
+                   ns.extract_json_ld, ns.looks_korean_by_meta_and_text):
+            cases.append((fn.__name__, name, fresh, fn))
+    return cases
+
+def measure(setup, fn, repeat):
+    """(CPU ms 최솟값, tracemalloc 최대 할당 바이트)."""
+    fn(setup())  # 예열(지연 import, lru_cache 선택자 컴파일)
+    best = float("inf")
+    for _ in range(repeat):
+        arg = setup()
+        t0 = time.process_time(); fn(arg); best = min(best, time.process_time() - t0)
+    arg = setup()
+    tracemalloc.start()
+    try:
+        fn(arg); peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best*1000, peak
+
+def cmd_suite(args):
+    try:
+        with open(BASELINE, encoding="utf-8") as f: baseline = json.load(f)
+    except (OSError, ValueError):
+        baseline = {"results": {}}
+    base = baseline.get("results", {})
+    machine = {"python": platform.python_version(), "machine": platform.machine(), "system": platform.system()}
+    if base and not args.save_baseline and baseline.get("machine") != machine:
+        print(f"주의: 기준값을 기록한 환경이 다름 ({baseline.get('machine')} ≠ {machine})")
+    results, regressions = {}, 0
+    print(f"{'function':<32}{'document':<24}{'ms':>8}{'docs/s':>9}{'peak KB':>9}{'base ms':>9}{'Δ':>8}  status")
+    for fname, doc, setup, fn in suite_cases():
+        if args.only and args.only not in fname: continue
+        key = f"{fname}:{doc}"
+        ms, peak = measure(setup, fn, args.repeat)
+        results[key] = {"ms": round(ms, 4), "peak_kb": round(peak/1024, 1)}
+        b = base.get(key)
+        status, delta = "NEW", ""
+        if b:
+            delta = f"{(ms/b['ms']-1)*100:+.0f}%" if b["ms"] else ""
+            slow = ms > b["ms"]*(1+args.tolerance) and ms - b["ms"] > args.min_ms
+            fat = peak/1024 > b["peak_kb"]*(1+args.tolerance) and peak/1024 - b["peak_kb"] > args.min_kb
+            status = "REGRESSION" if (slow or fat) else "ok"
+            if slow or fat:
+                regressions += 1
+                status += " (" + ", ".join(x for x, y in (("시간", slow), ("할당", fat)) if y) + ")"
+        print(f"{fname:<32}{doc:<24}{ms:>8.2f}{1000/max(ms,1e-6):>9.0f}{peak/1024:>9.0f}"
+              f"{(b['ms'] if b else float('nan')):>9.2f}{delta:>8}  {status}")
+    if args.save_baseline:
+        merged = {**base, **results} if args.only else results
+        with open(BASELINE, "w", encoding="utf-8") as f:
+            json.dump({"machine": machine, "recorded": time.strftime("%Y-%m-%d"), "results": merged},
+                      f, ensure_ascii=False, indent=1, sort_keys=True)
+        print(f"기준값 기록: {BASELINE} ({len(merged)}건)"); return 0
+    print(f"회귀: {regressions}건 (허용 +{args.tolerance*100:.0f}%)")
+    return 1 if regressions else 0
+
+
+# -------------------- 전문 검색 색인: 규모별 질의 시간 --------------------
+def cmd_fulltext(args):
+    import random, tempfile
+    from datetime import timedelta
+    sents = []
+    for _, html_text, _ in load_pages(os.path.join(FIXTURES, "articles")):
+        sents += [x for x in re.split(ns.SENT_SPLIT_RE, ns.extract_main_text(ns.parse_html(html_text))) if len(x) > 10]
+    if not sents:
+        print("본문 문장 없음"); return 1
+    rnd, today = random.Random(7), date.today()
+    terms, hosts = list(ns.PRIORITY_TERMS_WEIGHTS), list(ns.PUB_NAME_MAP)
+    syll = [chr(0xAC00 + rnd.randrange(11172)) for _ in range(400)]
+    words = ["".join(rnd.choices(syll, k=rnd.randint(2, 4))) for _ in range(20000)]
+    def filler(n):  # 문서마다 다른 낱말(실제 기사처럼 흔한 문장은 일부만 겹치게)
+        return " ".join(rnd.choices(words, k=n))
+    with tempfile.TemporaryDirectory() as tmp:
+        index = ns.SearchIndex(os.path.join(tmp, "search.sqlite3"))
+        t0 = time.perf_counter()
+        for i in range(args.docs):
+            title = filler(6) + (f" {rnd.choice(terms)}" if rnd.random() < 0.3 else "")
+            host = rnd.choice(hosts)
+            det = {"url": f"https://{host}/news/{i}", "title": title, "summary": filler(15),
+                   "published": today - timedelta(days=rnd.randrange(365)), "host": host, "prio_score": 0}
+            index.add(det, (" ".join(rnd.sample(sents, min(len(sents), 3))) + " " + filler(250))[:ns.SEARCH_TEXT_CHARS])
+            if i % 1000 == 999: index.flush()
+        index.flush()
+        build = time.perf_counter() - t0
+        size = sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp))
+        print(f"색인 {index.count()}건: {build:.1f}s ({args.docs/build:.0f}건/s), {size/1024/1024:.1f}MB")
+        month = today - timedelta(days=30)
+        cases = [("분산에너지", {}), ("전력 계통", {}), ("전", {}), ("그리드위즈", {"date_from": month}),
+                 ("수요", {"publishers": ["전자신문", "연합뉴스"]}), ("", {"terms": ["idrs"], "date_from": month}),
+                 ("", {"publishers": ["이투뉴스"]}), ("기사", {"limit": 200})]
+        print(f"{'query':<16}{'filters':<36}{'hits':>6}{'p50 ms':>9}{'max ms':>9}")
+        for q, kw in cases:
+            times = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter(); hits = index.search(q, **kw); times.append((time.perf_counter() - t0)*1000)
+            times.sort()
+            flt = ",".join(f"{k}={v if not isinstance(v, date) else v.isoformat()}" for k, v in kw.items())
+            print(f"{q or '(없음)':<16}{flt[:35]:<36}{len(hits):>6}{times[len(times)//2]:>9.2f}{times[-1]:>9.2f}")
+        index.close()
+    return 0
+
+
+# -------------------- 파싱 프로세스 풀: 처리량 --------------------
+def cmd_parse_pool(args):
+    from concurrent.futures import ThreadPoolExecutor
+    pages = []
+    for path in sorted(glob.glob(os.path.join(args.dir, "*.html"))):
+        _, raw = read_page(path)
+        pages.append((raw, ns.sniff_charset(raw)[0], f"https://bench/{os.path.basename(path)}"))
+    if not pages:
+        print(f"페이지 없음: {args.dir}"); return 1
+    jobs = [pages[i % len(pages)] for i in range(args.docs)]
+    print(f"cpu {os.cpu_count()} / 수집 스레드 {ns.FETCH_WORKERS} / 기사 {len(jobs)}건")
+    print(f"{'parse_workers':<15}{'start s':>9}{'wall s':>9}{'docs/s':>9}")
+    for n in [int(x) for x in args.workers.split(",")]:
+        with ns.RunContext(parse_workers=n) as run:
+            t0 = time.perf_counter()
+            run.parse(*jobs[0])  # 프로세스 기동(첫 파싱)
+            start = time.perf_counter() - t0
+            with ThreadPoolExecutor(ns.FETCH_WORKERS) as pool:
+                t0 = time.perf_counter()
+                list(pool.map(lambda j: run.parse(*j), jobs))
+                wall = time.perf_counter() - t0
+        print(f"{n:<15}{start:>9.2f}{wall:>9.2f}{len(jobs)/wall:>9.0f}")
+    return 0
+
+
+# -------------------- 키워드 점수/제외 판정 --------------------
+def cmd_terms(args):
+    import random
+    html_text = read_page(os.path.join(FIXTURES, "articles", "etnews_utf8.html"))[0]
+    body = ns.extract_main_text(ns.parse_html(html_text))
+    card = ("한전, 분산에너지 특별법 시행 앞두고 계통 안정화 대책", "https://www.etnews.com/20240101000123")
+    rnd = random.Random(7)
+    print(f"{'extra':>6}{'text':>7}{'legacy us':>11}{'scan us':>9}{'ac us':>9}{'regex us':>10}  기본 선택")
+    for extra in [int(x) for x in args.extra.split(",")]:
+        custom = {"".join(chr(0xAC00 + rnd.randrange(11172)) for _ in range(rnd.randint(2, 4))): 1 for _ in range(extra)}
+        m, ac = ns.TermMatcher(custom=custom, automaton=False), ns.TermMatcher(custom=custom, automaton=True)
+        weights = {**ns.PRIORITY_TERMS_WEIGHTS, **custom}
+        pats = list(m.weights) + list(m.exclude)
+        pick = "ac" if ns.TermMatcher(custom=custom)._automaton else "scan"
+        rx = re.compile("(?=(" + "|".join(map(re.escape, sorted(pats, key=len, reverse=True))) + "))")
+        def legacy(texts):
+            if any(x in str(t) for t in texts for x in ns.EXCLUDE_TERMS): return None
+            blob = " ".join(texts).lower()
+            return sum(w for term, w in weights.items() if term.lower() in blob)
+        for name, texts in (("card", card), ("body", (body,))):
+            assert m.scan(*texts) == ac.scan(*texts)
+            row = []
+            for fn in (lambda: legacy(texts), lambda: m.scan(*texts), lambda: ac.scan(*texts),
+                       lambda: {g.group(1) for g in rx.finditer(" ".join(texts).lower())}):
+                t0 = time.perf_counter()
+                for _ in range(args.repeat): fn()
+                row.append((time.perf_counter() - t0) / args.repeat * 1e6)
+            print(f"{extra:>6}{name:>7}" + "".join(f"{x:>{w}.1f}" for x, w in zip(row, (11, 9, 9, 10))) + f"  {pick}")
+    return 0
+
+def cmd_gnews(args):
+    import base64, tempfile, feedparser
+    links = []
+    for path in glob.glob(os.path.join(FIXTURES, "rss", "*.xml")):
+        with open(path, "rb") as f:
+            links += [e.link for e in feedparser.parse(f.read()).entries if ns.google_news_token(e.link)]
+    decodable = [l for l in links if ns.decode_google_news_token(ns.google_news_token(l))]
+    print(f"RSS 기사 링크 {len(links)}건 중 해독 {len(decodable)}건({len(decodable)*100/max(1, len(links)):.0f}%)")
+    opaque = {}
+    for i in range(args.opaque):
+        ident = f"AU_yqL{i:08d}".encode() + os.urandom(40)
+        token = base64.urlsafe_b64encode(b"\x08\x13\x22" + bytes([len(ident)]) + ident + b"\xd2\x01\x00").decode().rstrip("=")
+        opaque[f"https://news.google.com/rss/articles/{token}?oc=5"] = f"https://www.example.co.kr/news/{i}"
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "gnews_links.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({ns.google_news_token(l): [u, time.time()] for l, u in opaque.items()}, f)
+        t0 = time.perf_counter(); res = ns.GoogleLinkResolver(path=path); load_ms = (time.perf_counter() - t0)*1000
+        print(f"링크 캐시 {len(opaque)}건 읽기 {load_ms:.1f}ms / 파일 {os.path.getsize(path)//1024}KB")
+        for name, batch in (("decode", decodable), ("hit", list(opaque))):
+            t0 = time.perf_counter()
+            for _ in range(args.repeat):
+                for l in batch: res.resolve(l)
+            us = (time.perf_counter() - t0) / (args.repeat * max(1, len(batch))) * 1e6
+            print(f"{name:>7}: 링크당 {us:.1f}us")
+        print(res.summary())
+        assert not res.resolved and not res.failed
+    return 0
+
+def _token_link(url, opaque, rnd):
+    import base64
+    payload = (f"AU_yqL{rnd.randrange(10**12)}".encode() + bytes(rnd.randrange(256) for _ in range(30))) if opaque else url.encode()
+    ident = bytes([len(payload) | 0x80, len(payload) >> 7]) if len(payload) >= 0x80 else bytes([len(payload)])
+    token = base64.urlsafe_b64encode(b"\x08\x13\x22" + ident + payload + b"\xd2\x01\x00").decode().rstrip("=")
+    return f"https://news.google.com/rss/articles/{token}?oc=5"
+
+def cmd_lazy(args):
+    import random
+    from collections import deque
+    rnd = random.Random(11)
+    hosts = sorted(ns.PRIORITY_DOMAINS) + ["www.newsis.com", "www.news1.kr", "www.yna.co.kr", "biz.chosun.com", "www.hankyung.com"]
+    words = list(ns.PRIORITY_TERMS_WEIGHTS) + ["전력", "에너지", "정책", "발표", "시장", "태양광", "요금"]
+    terms = ns.TermMatcher()
+    bad = 0
+    print(f"{'per_day':>8}{'opaque':>8}{'다름':>6}{'요청 평균':>10}{'후보 평균':>10}{'절약':>7}")
+    for per_day in [int(x) for x in args.per_day.split(",")]:
+        for opaque in [float(x) for x in args.opaque.split(",")]:
+            diff = fetched = cands = 0
+            for _ in range(args.trials):
+                items, dets = [], {}
+                for i in range(rnd.randint(per_day, 40)):
+                    final = f"https://{rnd.choice(hosts)}/news/{rnd.randrange(10**6)}"
+                    title = " ".join(rnd.choice(words) for _ in range(4)) + f" {i}"
+                    summary = " ".join(rnd.choice(words) for _ in range(6))
+                    items.append({"title": title, "url": _token_link(final, rnd.random() < opaque, rnd)})
+                    score = terms.score(title, summary, final)
+                    dets[i] = {"rank": i, "prio_score": (20 if ns.is_priority_host(final) else 0) + score}
+                eager = ns.DayPlan(items, per_day, lazy=False, terms=terms)
+                for idx, _ in eager.take(len(items)): eager.add(idx, dets[idx])
+                plan = ns.DayPlan(items, per_day, lazy=True, slack=args.slack, terms=terms)
+                window, order = per_day + ns.LAZY_EXTRA, deque()
+                while not plan.decided():
+                    order.extend(idx for idx, _ in plan.take(window))
+                    idx = order.popleft()
+                    plan.add(idx, dets[idx])
+                fetched += plan.fetched + len(plan.inflight); cands += len(items)
+                diff += [r["rank"] for r in plan.top()] != [r["rank"] for r in eager.top()]
+            saved = 1 - fetched / max(1, cands)
+            if args.slack is None: bad += diff + (opaque == 0 and saved <= 0)
+            print(f"{per_day:>8}{opaque:>8.1f}{diff:>6}{fetched/args.trials:>10.1f}{cands/args.trials:>10.1f}{saved:>7.0%}")
+    return 1 if bad else 0
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="News_scaper 추출 단계 벤치마크")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("parse-once", help="이전(다중 파싱) 대비 단일 파싱 CPU 시간 비교")
+    p.add_argument("--dir", default=os.path.join(FIXTURES, "articles"))
+    p.add_argument("--repeat", type=int, default=20)
+    p.set_defaults(func=cmd_parse_once)
+    p = sub.add_parser("authors", help="기자 추출 회귀 코퍼스 대조 + 선택자 순회 대비 시간 비교")
+    p.add_argument("--repeat", type=int, default=20)
+    p.add_argument("--record", action="store_true", help="이전 방식 결과로 기대값 재기록")
+    p.set_defaults(func=cmd_authors)
+    p = sub.add_parser("charset", help="r.text 방식 대비 charset 스니핑 + 바이트 파싱 시간/정확도 비교")
+    p.add_argument("--dir", default=os.path.join(FIXTURES, "articles"))
+    p.add_argument("--repeat", type=int, default=20)
+    p.set_defaults(func=cmd_charset)
+    p = sub.add_parser("suite", help="핫 함수 문서별 시간/할당 측정 + 기준값 회귀 검사")
+    p.add_argument("--repeat", type=int, default=15)
+    p.add_argument("--tolerance", type=float, default=0.3, help="기준값 대비 허용 증가율(0.3 = 30%%)")
+    p.add_argument("--min-ms", type=float, default=0.2, help="이보다 작은 시간 증가는 잡음으로 보고 무시")
+    p.add_argument("--min-kb", type=float, default=64, help="이보다 작은 할당 증가는 무시")
+    p.add_argument("--only", default=None, help="함수 이름에 이 문자열이 든 항목만")
+    p.add_argument("--save-baseline", action="store_true", help=f"결과를 기준값으로 기록({os.path.relpath(BASELINE, ROOT)})")
+    p.set_defaults(func=cmd_suite)
+    p = sub.add_parser("fulltext", help="합성 기사 N건 전문 검색 색인의 색인/질의 시간")
+    p.add_argument("--docs", type=int, default=30000)
+    p.add_argument("--repeat", type=int, default=20)
+    p.set_defaults(func=cmd_fulltext)
+    p = sub.add_parser("parse-pool", help="파싱 프로세스 수별 기사 파싱 처리량")
+    p.add_argument("--dir", default=os.path.join(FIXTURES, "articles"))
+    p.add_argument("--docs", type=int, default=400)
+    p.add_argument("--workers", default="0,2,4", help="비교할 parse_workers 값(쉼표 구분)")
+    p.set_defaults(func=cmd_parse_pool)
+    p = sub.add_parser("terms", help="키워드 점수/제외 판정 방식별 시간(TermMatcher vs 이전 방식, Aho-Corasick, re)")
+    p.add_argument("--extra", default="0,20,100,400", help="추가할 사용자 키워드 수(쉼표 구분)")
+    p.add_argument("--repeat", type=int, default=2000)
+    p.set_defaults(func=cmd_terms)
+    p = sub.add_parser("gnews", help="Google 뉴스 기사 링크 해독률과 해독/링크 캐시 경로별 시간")
+    p.add_argument("--opaque", type=int, default=1000, help="캐시에 넣어 둘 해독 불가 토큰 수")
+    p.add_argument("--repeat", type=int, default=20)
+    p.set_defaults(func=cmd_gnews)
+    p = sub.add_parser("lazy", help="토큰 링크 RSS 일자에서 지연 수집이 전부 받은 경우와 같은 기사를 고르는지")
+    p.add_argument("--trials", type=int, default=500)
+    p.add_argument("--per-day", default="2,5", help="비교할 per_day 값(쉼표 구분)")
+    p.add_argument("--opaque", default="0,0.3,1", help="해독 불가 토큰 비율(쉼표 구분)")
+    p.add_argument("--slack", type=int, default=None, help="지연 수집 여유분(기본: 정확 모드)")
+    p.set_defaults(func=cmd_lazy)
+    args = ap.parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())